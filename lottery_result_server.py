@@ -15,15 +15,34 @@ Usage:
 """
 
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
+from pydantic import AnyUrl
 from srilanka_lottery import (
     scrape_nlb_result,
     scrape_dlb_result,
     scrape_nlb_active_lottery_names,
     scrape_dlb_lottery_names,
     scrape_nlb_latest_results,
-    scrape_dlb_latest_results
+    scrape_dlb_latest_results,
+    scrape_all_latest_results
 )
+from srilanka_lottery.archive import archive_mtime
+from srilanka_lottery.drawindex import DrawIndex
+from srilanka_lottery.profiling import Profiler, parse_rates, profiled
+from srilanka_lottery.responsecache import ALL, ResponseCache
+from srilanka_lottery.scraper import Watermark, get_nlb_session, iter_dlb_pages_since
+from srilanka_lottery.transport import deadline_expired, deadline_scope
+from srilanka_lottery.watch import DrawWatcher
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
 import re
+import tempfile
+import threading
+import time
 from typing import Union
 
 # Initialize MCP server with detailed instructions
@@ -38,6 +57,9 @@ mcp = FastMCP(
     1. Get lists of all active lotteries from NLB and DLB
     2. Fetch specific lottery results by draw number or date
     3. Get the latest results for any lottery (up to a specified limit)
+    4. Get the newest result of every lottery on both boards in one call
+    5. Search a lottery's draw history by winning numbers and letters
+    6. Keep watchlists of ticket numbers and check them for hits on new draws
     
     Lottery Name Format:
     - NLB: Use lowercase with hyphens (e.g., 'mega-power', 'govisetha', 'dhana-nidhanaya')
@@ -51,6 +73,56 @@ mcp = FastMCP(
 )
 
 
+# Cache shared by all worker processes on the host. Set LOTTERY_CACHE_PATH to a
+# SQLite file (e.g. /var/cache/lanka-lottery/cache.sqlite3) to enable it.
+CACHE_PATH = os.environ.get("LOTTERY_CACHE_PATH")
+shared_cache = None
+if CACHE_PATH:
+    from srilanka_lottery.cache import DEFAULT_MAX_BYTES, SharedCache
+    shared_cache = SharedCache(
+        CACHE_PATH,
+        max_bytes=int(os.environ.get("LOTTERY_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
+
+NAMES_TTL = 6 * 60 * 60
+RESULT_TTL = 7 * 24 * 60 * 60  # Published draws do not change
+LATEST_TTL = 2 * 60
+
+
+def cacheable(result: dict) -> bool:
+    """Errors, partial failures and results cut short by a deadline are never cached."""
+    return "error" not in result and not result.get("truncated") and not result.get("failed")
+
+
+def cached(key: str, ttl: int, compute, fresh_if=None) -> dict:
+    """Return compute(), shared through the cross-process cache when enabled.
+
+    Stored values rejected by ``fresh_if`` are recomputed (see ``latest_is_fresh``).
+    """
+    if shared_cache is None:
+        return compute()
+    return shared_cache.get_or_compute(key, ttl, compute, cache_if=cacheable, fresh_if=fresh_if)
+
+
+# Every tool call runs under an overall deadline shared by all upstream
+# requests it makes (session challenge, fetches, pagination).
+TOOL_TIMEOUT = float(os.environ.get("LOTTERY_TOOL_TIMEOUT", 30))
+
+
+def tool_deadline(timeout_seconds: Union[float, None]):
+    """Deadline scope for a tool call, defaulting to LOTTERY_TOOL_TIMEOUT."""
+    if timeout_seconds is not None and timeout_seconds <= 0:
+        raise ValueError("timeout_seconds must be a positive number")
+    return deadline_scope(timeout_seconds or TOOL_TIMEOUT)
+
+
+# Sampled profiling of live tool calls, off unless LOTTERY_PROFILE sets a rate,
+# e.g. "0.01" for 1% of all calls or "0.01,get_all_latest_results=0.5".
+# Results are read from the lottery://metrics/profile resources.
+profiler = Profiler(*parse_rates(os.environ.get("LOTTERY_PROFILE")),
+                    allocations=os.environ.get("LOTTERY_PROFILE_ALLOCATIONS", "1") == "1")
+
+
 def validate_date_format(date_str: str) -> bool:
     """Validate if date string is in YYYY-MM-DD format."""
     pattern = r'^\d{4}-\d{2}-\d{2}$'
@@ -65,10 +137,15 @@ def normalize_nlb_lottery_name(name: str) -> str:
 # ==================== LOTTERY NAME TOOLS ====================
 
 @mcp.tool(description="Get the list of all active NLB (National Lottery Board) lotteries currently available.")
-def get_nlb_lottery_names() -> dict:
+@profiled(profiler)
+def get_nlb_lottery_names(timeout_seconds: Union[float, None] = None) -> dict:
     """
     Retrieves the list of all active NLB lotteries.
     
+    Args:
+        timeout_seconds (float, optional): Overall time budget for this call
+                         (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
     Returns:
         dict: Contains 'NLB_Active' key with sorted list of active lottery names,
               or 'error' key if the operation fails.
@@ -86,17 +163,22 @@ def get_nlb_lottery_names() -> dict:
         }
     """
     try:
-        result, _ = scrape_nlb_active_lottery_names()
-        return result
+        with tool_deadline(timeout_seconds):
+            return cached("nlb:names", NAMES_TTL, lambda: scrape_nlb_active_lottery_names()[0])
     except Exception as e:
         return {"error": f"Failed to fetch NLB lottery names: {str(e)}"}
 
 
 @mcp.tool(description="Get the list of all available DLB (Development Lottery Board) lotteries.")
-def get_dlb_lottery_names() -> dict:
+@profiled(profiler)
+def get_dlb_lottery_names(timeout_seconds: Union[float, None] = None) -> dict:
     """
     Retrieves the list of all available DLB lotteries.
     
+    Args:
+        timeout_seconds (float, optional): Overall time budget for this call
+                         (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
     Returns:
         dict: Contains 'DLB' key with sorted list of lottery names,
               or 'error' key if the operation fails.
@@ -114,8 +196,8 @@ def get_dlb_lottery_names() -> dict:
         }
     """
     try:
-        result = scrape_dlb_lottery_names()
-        return result
+        with tool_deadline(timeout_seconds):
+            return cached("dlb:names", NAMES_TTL, scrape_dlb_lottery_names)
     except Exception as e:
         return {"error": f"Failed to fetch DLB lottery names: {str(e)}"}
 
@@ -123,7 +205,8 @@ def get_dlb_lottery_names() -> dict:
 # ==================== NLB RESULT TOOLS ====================
 
 @mcp.tool(description="Fetch NLB lottery result by draw number. Lottery name should be in lowercase with hyphens (e.g., 'mega-power', 'govisetha').")
-def get_nlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
+@profiled(profiler)
+def get_nlb_result_by_draw(lottery_name: str, draw_number: int, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the NLB lottery result for a specific draw number.
     
@@ -131,6 +214,8 @@ def get_nlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
         lottery_name (str): Name of the lottery in lowercase with hyphens 
                            (e.g., 'mega-power', 'govisetha', 'dhana-nidhanaya')
         draw_number (int): The draw number to fetch (e.g., 4263)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Lottery result containing:
@@ -150,18 +235,20 @@ def get_nlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
         }
     """
     try:
-        if not isinstance(draw_number, int) or draw_number <= 0:
-            return {"error": "Draw number must be a positive integer"}
+        with tool_deadline(timeout_seconds):
+            if not isinstance(draw_number, int) or draw_number <= 0:
+                return {"error": "Draw number must be a positive integer"}
         
-        normalized_name = normalize_nlb_lottery_name(lottery_name)
-        result = scrape_nlb_result(normalized_name, draw_number)
-        return result
+            normalized_name = normalize_nlb_lottery_name(lottery_name)
+            return cached(f"nlb:result:{normalized_name}:{draw_number}", RESULT_TTL,
+                          lambda: scrape_nlb_result(normalized_name, draw_number))
     except Exception as e:
         return {"error": f"Failed to fetch NLB result: {str(e)}"}
 
 
 @mcp.tool(description="Fetch NLB lottery result by date. Date must be in YYYY-MM-DD format (e.g., '2025-11-23'). Lottery name should be in lowercase with hyphens.")
-def get_nlb_result_by_date(lottery_name: str, date: str) -> dict:
+@profiled(profiler)
+def get_nlb_result_by_date(lottery_name: str, date: str, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the NLB lottery result for a specific date.
     
@@ -169,6 +256,8 @@ def get_nlb_result_by_date(lottery_name: str, date: str) -> dict:
         lottery_name (str): Name of the lottery in lowercase with hyphens
                            (e.g., 'mega-power', 'govisetha', 'handahana')
         date (str): The date in YYYY-MM-DD format (e.g., '2025-11-23')
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Lottery result containing:
@@ -188,18 +277,21 @@ def get_nlb_result_by_date(lottery_name: str, date: str) -> dict:
         }
     """
     try:
-        if not validate_date_format(date):
-            return {"error": "Date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
+        with tool_deadline(timeout_seconds):
+            if not validate_date_format(date):
+                return {"error": "Date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
         
-        normalized_name = normalize_nlb_lottery_name(lottery_name)
-        result = scrape_nlb_result(normalized_name, date)
-        return result
+            normalized_name = normalize_nlb_lottery_name(lottery_name)
+            return cached(f"nlb:result:{normalized_name}:{date}", RESULT_TTL,
+                          lambda: scrape_nlb_result(normalized_name, date))
     except Exception as e:
         return {"error": f"Failed to fetch NLB result: {str(e)}"}
 
 
-@mcp.tool(description="Get the latest NLB lottery results. Specify how many recent results you want (default 5, max recommended 20).")
-def get_nlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
+@mcp.tool(description="Get the latest NLB lottery results. Specify how many recent results you want (default 5, max recommended 20). When polling, pass the last seen draw as since_draw to get only newer draws.")
+@profiled(profiler)
+def get_nlb_latest_results(lottery_name: str, limit: int = 5, since_draw: Union[int, None] = None,
+                           since_date: Union[str, None] = None, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the latest results for a specified NLB lottery.
     
@@ -207,6 +299,10 @@ def get_nlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
         lottery_name (str): Name of the lottery in lowercase with hyphens
                            (e.g., 'mega-power', 'govisetha')
         limit (int): Maximum number of recent results to return (default: 5, max recommended: 20)
+        since_draw (int, optional): Only return draws newer than this draw number
+        since_date (str, optional): Only return draws after this date (YYYY-MM-DD)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Contains 'NLB_Results' key with list of recent results, each containing:
@@ -214,6 +310,10 @@ def get_nlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
               - date: Draw date
               - letter: Winning letter
               - numbers: List of winning numbers
+              With since_draw or since_date, only newer draws are listed, plus:
+              - changed: False if there is nothing new
+              - watermark, watermark_date: Newest draw; pass it as since_draw next time
+              - has_more: True if there are more new draws than 'limit'
               Or 'error' key if the operation fails.
               
     Example:
@@ -232,18 +332,25 @@ def get_nlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
         }
     """
     try:
-        if not isinstance(limit, int) or limit <= 0:
-            return {"error": "Limit must be a positive integer"}
+        with tool_deadline(timeout_seconds):
+            if not isinstance(limit, int) or limit <= 0:
+                return {"error": "Limit must be a positive integer"}
         
-        if limit > 50:
-            return {"error": "Limit should not exceed 50 for performance reasons"}
+            if limit > 50:
+                return {"error": "Limit should not exceed 50 for performance reasons"}
         
-        normalized_name = normalize_nlb_lottery_name(lottery_name)
-        # Get session from scrape_nlb_active_lottery_names
-        from srilanka_lottery.scraper import get_nlb_session
-        session = get_nlb_session()
-        result = scrape_nlb_latest_results(session, normalized_name, limit)
-        return result
+            if since_date is not None and not validate_date_format(since_date):
+                return {"error": "since_date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
+        
+            normalized_name = normalize_nlb_lottery_name(lottery_name)
+            if since_draw is not None or since_date is not None:
+                return latest_delta("nlb", normalized_name, limit, since_draw, since_date)
+            # A session is only set up if the lottery is not a known miss
+            result = cached(f"nlb:latest:{normalized_name}:{limit}", LATEST_TTL,
+                            lambda: scrape_nlb_latest_results(None, normalized_name, limit),
+                            latest_is_fresh("nlb", normalized_name))
+            note_newest("nlb", normalized_name, result.get("NLB_Results", []))
+            return result
     except Exception as e:
         return {"error": f"Failed to fetch latest NLB results: {str(e)}"}
 
@@ -251,7 +358,8 @@ def get_nlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
 # ==================== DLB RESULT TOOLS ====================
 
 @mcp.tool(description="Fetch DLB lottery result by draw number. Lottery name must match exactly (e.g., 'Ada Kotipathi', 'Jayoda', 'Shanida').")
-def get_dlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
+@profiled(profiler)
+def get_dlb_result_by_draw(lottery_name: str, draw_number: int, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the DLB lottery result for a specific draw number.
     
@@ -261,6 +369,8 @@ def get_dlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
                            'Shanida', 'Super Ball', 'Supiri Dhana Sampatha', 
                            'Jaya Sampatha', 'Kapruka'
         draw_number (int): The draw number to fetch (e.g., 2608)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Lottery result containing:
@@ -282,17 +392,19 @@ def get_dlb_result_by_draw(lottery_name: str, draw_number: int) -> dict:
         }
     """
     try:
-        if not isinstance(draw_number, int) or draw_number <= 0:
-            return {"error": "Draw number must be a positive integer"}
+        with tool_deadline(timeout_seconds):
+            if not isinstance(draw_number, int) or draw_number <= 0:
+                return {"error": "Draw number must be a positive integer"}
         
-        result = scrape_dlb_result(lottery_name, draw_number)
-        return result
+            return cached(f"dlb:result:{lottery_name}:{draw_number}", RESULT_TTL,
+                          lambda: scrape_dlb_result(lottery_name, draw_number))
     except Exception as e:
         return {"error": f"Failed to fetch DLB result: {str(e)}"}
 
 
 @mcp.tool(description="Fetch DLB lottery result by date. Date must be in YYYY-MM-DD format. Lottery name must match exactly.")
-def get_dlb_result_by_date(lottery_name: str, date: str) -> dict:
+@profiled(profiler)
+def get_dlb_result_by_date(lottery_name: str, date: str, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the DLB lottery result for a specific date.
     
@@ -302,6 +414,8 @@ def get_dlb_result_by_date(lottery_name: str, date: str) -> dict:
                            'Shanida', 'Super Ball', 'Supiri Dhana Sampatha',
                            'Jaya Sampatha', 'Kapruka'
         date (str): The date in YYYY-MM-DD format (e.g., '2025-11-23')
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Lottery result containing:
@@ -323,17 +437,20 @@ def get_dlb_result_by_date(lottery_name: str, date: str) -> dict:
         }
     """
     try:
-        if not validate_date_format(date):
-            return {"error": "Date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
+        with tool_deadline(timeout_seconds):
+            if not validate_date_format(date):
+                return {"error": "Date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
         
-        result = scrape_dlb_result(lottery_name, date)
-        return result
+            return cached(f"dlb:result:{lottery_name}:{date}", RESULT_TTL,
+                          lambda: scrape_dlb_result(lottery_name, date))
     except Exception as e:
         return {"error": f"Failed to fetch DLB result: {str(e)}"}
 
 
-@mcp.tool(description="Get the latest DLB lottery results. Specify how many recent results you want (default 5, max recommended 20).")
-def get_dlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
+@mcp.tool(description="Get the latest DLB lottery results. Specify how many recent results you want (default 5, max recommended 20). When polling, pass the last seen draw as since_draw to get only newer draws.")
+@profiled(profiler)
+def get_dlb_latest_results(lottery_name: str, limit: int = 5, since_draw: Union[int, None] = None,
+                           since_date: Union[str, None] = None, timeout_seconds: Union[float, None] = None) -> dict:
     """
     Fetches the latest results for a specified DLB lottery.
     
@@ -343,6 +460,11 @@ def get_dlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
                            'Shanida', 'Super Ball', 'Supiri Dhana Sampatha',
                            'Jaya Sampatha', 'Kapruka'
         limit (int): Maximum number of recent results to return (default: 5, max recommended: 20)
+        since_draw (int, optional): Only return draws newer than this draw number;
+                           paging stops at the first draw already seen
+        since_date (str, optional): Only return draws after this date (YYYY-MM-DD)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
     
     Returns:
         dict: Contains 'DLB_Results' key with list of recent results, each containing:
@@ -350,6 +472,11 @@ def get_dlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
               - date: Draw date
               - letter: Winning letter
               - numbers: List of winning numbers
+              With since_draw or since_date, only newer draws are listed, plus
+              'changed', 'watermark', 'watermark_date' and 'has_more' as for
+              get_nlb_latest_results.
+              'truncated': True is added if the time budget ran out while
+              paging, with the results fetched so far.
               Or 'error' key if the operation fails.
               
     Example:
@@ -368,18 +495,556 @@ def get_dlb_latest_results(lottery_name: str, limit: int = 5) -> dict:
         }
     """
     try:
-        if not isinstance(limit, int) or limit <= 0:
-            return {"error": "Limit must be a positive integer"}
+        with tool_deadline(timeout_seconds):
+            if not isinstance(limit, int) or limit <= 0:
+                return {"error": "Limit must be a positive integer"}
+        
+            if limit > 50:
+                return {"error": "Limit should not exceed 50 for performance reasons"}
         
-        if limit > 50:
-            return {"error": "Limit should not exceed 50 for performance reasons"}
+            if since_date is not None and not validate_date_format(since_date):
+                return {"error": "since_date must be in YYYY-MM-DD format (e.g., '2025-11-23')"}
         
-        result = scrape_dlb_latest_results(lottery_name, limit)
-        return result
+            if since_draw is not None or since_date is not None:
+                return latest_delta("dlb", lottery_name, limit, since_draw, since_date)
+            result = cached(f"dlb:latest:{lottery_name}:{limit}", LATEST_TTL,
+                            lambda: scrape_dlb_latest_results(lottery_name, limit),
+                            latest_is_fresh("dlb", lottery_name))
+            note_newest("dlb", lottery_name, result.get("DLB_Results", []))
+            return result
     except Exception as e:
         return {"error": f"Failed to fetch latest DLB results: {str(e)}"}
 
 
+@mcp.tool(description="Get the newest result of every active NLB and DLB lottery in one call. Use this for questions like 'what were today's results?'.")
+@profiled(profiler)
+def get_all_latest_results(timeout_seconds: Union[float, None] = None) -> dict:
+    """
+    Fetches the most recent draw of every active lottery on both boards.
+    
+    The lottery lists are read once and the per-lottery requests run
+    concurrently over shared connections. A lottery that fails is reported in
+    its own row and does not fail the whole call.
+    
+    Args:
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
+    Returns:
+        dict: Contains 'results', one row per lottery sorted by board and name:
+              - board: 'nlb' or 'dlb'
+              - lottery: Lottery name
+              - draw, date, letter, numbers: Newest draw
+              - error: Instead of the draw fields, if that lottery failed
+              'failed' counts the rows (and lottery lists) that failed;
+              'board_errors' is added if a board's lottery list could not be read.
+              Or 'error' key if neither board could be reached.
+              
+    Example:
+        >>> get_all_latest_results()
+        {
+            "results": [
+                {"board": "dlb", "lottery": "Ada Kotipathi", "draw": "2608",
+                 "date": "2025-05-01", "letter": "Y", "numbers": ["11", "22", "33", "44"]},
+                {"board": "nlb", "lottery": "Govisetha", "error": "Request failed: ..."},
+                ...
+            ],
+            "failed": 1
+        }
+    """
+    try:
+        with tool_deadline(timeout_seconds):
+            return cached("all:latest", LATEST_TTL, scrape_all_latest_results, all_latest_is_fresh)
+    except Exception as e:
+        return {"error": f"Failed to fetch latest results: {str(e)}"}
+
+
+# ==================== SEARCH AND WATCHLIST TOOLS ====================
+#
+# search_draws answers from an in-memory number/letter index, and watchlists
+# are matched against each new draw once. Both are fed from the same place:
+# the newest draws of a lottery (up to 50), read from the board at most every
+# LATEST_TTL seconds, plus draws announced to subscription watchers. Set
+# LOTTERY_ARCHIVE_PATH to a draw archive (see srilanka_lottery.archive) to
+# index full histories.
+
+ARCHIVE_PATH = os.environ.get("LOTTERY_ARCHIVE_PATH")
+WATCHLIST_PATH = os.environ.get("LOTTERY_WATCHLIST_PATH") or os.path.join(
+    tempfile.gettempdir(), "lanka-lottery", "watchlist.sqlite3")
+INDEX_TOP_UP = 50
+draw_index = DrawIndex()
+_index_lock = threading.Lock()
+_archive_mtime = None
+_topped_up = {}  # (board, lottery name) -> time.monotonic() of the last top-up
+_watchlist = None
+_newest = {}  # (board, lottery name) -> (newest draw, its date, time.monotonic() when read)
+
+
+def get_watchlist():
+    """Open the watchlist database on first use."""
+    global _watchlist
+    with _index_lock:
+        if _watchlist is None:
+            from srilanka_lottery.watchlist import Watchlist
+            _watchlist = Watchlist(WATCHLIST_PATH)
+            _topped_up.clear()  # draws topped up so far never reached the watchlist
+        return _watchlist
+
+
+def note_newest(board: str, lottery_name: str, rows: list) -> None:
+    """Remember the newest draw just read from the board, for the delta fast path."""
+    newest = max(((int(row["draw"]), row.get("date", "")) for row in rows if str(row.get("draw", "")).isdigit()),
+                 default=None)
+    key = (board, lottery_name)
+    if newest is not None and (key not in _newest or newest[0] >= _newest[key][0]):
+        if key in _newest and newest[0] > _newest[key][0]:
+            response_cache.bump(f"{board}:{lottery_name}")
+        _newest[key] = (newest[0], newest[1], time.monotonic())
+
+
+def latest_is_fresh(board: str, lottery_name: str):
+    """Shared-cache check for a lottery's latest or delta result.
+
+    A stored result is only reused while its newest draw is at least the
+    newest one this worker has seen, so the first call after a new draw
+    refetches it once and every worker then reads the refreshed entry.
+    """
+    def fresh(result: dict) -> bool:
+        seen = _newest.get((board, lottery_name))
+        rows = result.get("NLB_Results") or result.get("DLB_Results") or []
+        newest = str(result.get("watermark") or (rows[0].get("draw", "") if rows else ""))
+        return seen is None or not newest.isdigit() or int(newest) >= seen[0]
+    return fresh
+
+
+def all_latest_is_fresh(result: dict) -> bool:
+    """Shared-cache check for get_all_latest_results: no lottery has a newer draw than its row."""
+    for row in result.get("results", []):
+        if str(row.get("draw", "")).isdigit():
+            name = normalize_nlb_lottery_name(row["lottery"]) if row["board"] == "nlb" else row["lottery"]
+            if not latest_is_fresh(row["board"], name)({"watermark": row["draw"]}):
+                return False
+    return True
+
+
+def newest_known(board: str, lottery_name: str) -> Union[tuple[int, str], None]:
+    """Newest draw (number, date) of a lottery from its live watcher or read within LATEST_TTL."""
+    watcher = watchers.get((board, lottery_name))
+    if watcher is not None and watcher.running and watcher.latest is not None:
+        rows = watcher.latest.get("NLB_Results") or watcher.latest.get("DLB_Results") or []
+        if rows and str(rows[0]["draw"]).isdigit():
+            return int(rows[0]["draw"]), rows[0].get("date", "")
+    entry = _newest.get((board, lottery_name))
+    if entry is not None and time.monotonic() - entry[2] < LATEST_TTL:
+        return entry[0], entry[1]
+    return None
+
+
+def latest_delta(board: str, lottery_name: str, limit: int, since_draw: Union[int, None],
+                 since_date: Union[str, None]) -> dict:
+    """Draws newer than a client's watermark; answered without upstream requests when nothing changed."""
+    results_key = "NLB_Results" if board == "nlb" else "DLB_Results"
+    known = newest_known(board, lottery_name)
+    if known is not None and Watermark(since_draw, since_date)({"draw": str(known[0]), "date": known[1]}):
+        return {results_key: [], "changed": False, "watermark": str(known[0]), "watermark_date": known[1]}
+
+    key = f"{board}:delta:{lottery_name}:{limit}:{since_draw}:{since_date}"
+    if board == "nlb":
+        result = cached(key, LATEST_TTL,
+                        lambda: scrape_nlb_latest_results(None, lottery_name, limit, since_draw, since_date),
+                        latest_is_fresh(board, lottery_name))
+    else:
+        result = cached(key, LATEST_TTL,
+                        lambda: scrape_dlb_latest_results(lottery_name, limit, since_draw, since_date),
+                        latest_is_fresh(board, lottery_name))
+    if "watermark" in result:
+        note_newest(board, lottery_name, [{"draw": result["watermark"], "date": result["watermark_date"]}])
+    return result
+
+
+def ingest_draws(board: str, lottery_name: str, rows: list) -> None:
+    """Add new draws to the search index and match them against the watchlists."""
+    note_newest(board, lottery_name, rows)
+    draw_index.add(board, lottery_name, rows)
+    if _watchlist is not None:
+        _watchlist.ingest(board, lottery_name, rows)
+        numbers = [int(row["draw"]) for row in rows if str(row.get("draw", "")).isdigit()]
+        watermark = _watchlist.watermark(board, lottery_name)
+        if numbers and watermark is not None and max(numbers) > watermark:
+            fill_watchlist_gap(board, lottery_name, watermark, rows)
+
+
+def fill_watchlist_gap(board: str, lottery_name: str, watermark: int, rows: list) -> None:
+    """Match the draws between the watchlist's watermark and ``rows`` that a partial read skipped.
+
+    A delta read covers a short gap in one request. A longer one is read
+    oldest first, DLB page by page and NLB draw by draw, moving the watermark
+    as it goes, so a gap longer than one call's time budget is finished by
+    later ingests instead of holding the watermark back for good.
+    """
+    results_key = "NLB_Results" if board == "nlb" else "DLB_Results"
+    newest = max(int(row["draw"]) for row in rows if str(row.get("draw", "")).isdigit())
+    result = latest_delta(board, lottery_name, newest - watermark + INDEX_TOP_UP, watermark, None)
+    if "error" not in result and not result.get("has_more") and not result.get("truncated"):
+        draw_index.add(board, lottery_name, result[results_key])
+        _watchlist.ingest(board, lottery_name, result[results_key], complete=True)
+        return
+    try:
+        if board == "dlb":
+            read = []
+            for page in iter_dlb_pages_since(lottery_name, watermark):
+                # Pages read from the watermark up list every draw in their range
+                read.extend(page)
+                draw_index.add(board, lottery_name, page)
+                _watchlist.ingest(board, lottery_name, read, complete=True)
+        else:
+            _fill_nlb_gap(lottery_name, watermark, rows)
+    except Exception:
+        pass  # the watermark stays where the read stopped; the next ingest carries on
+
+
+def _fill_nlb_gap(lottery_name: str, watermark: int, rows: list) -> None:
+    """Look up the NLB draws between the watermark and ``rows`` one by one, oldest first."""
+    first = min(int(row["draw"]) for row in rows if str(row.get("draw", "")).isdigit())
+    found = []
+    read_through = watermark
+    session = get_nlb_session()
+    try:
+        for number in range(watermark + 1, first):
+            if deadline_expired():
+                break
+            result = scrape_nlb_result(lottery_name, number, session=session)
+            if "error" in result and "retry_after" not in result:
+                break  # the request failed; try again on the next ingest
+            if "error" not in result:
+                found.append(result)  # a miss below a published draw was never held
+            read_through = number
+    finally:
+        session.close()
+    if read_through == first - 1:
+        found.extend(rows)
+    if found:
+        draw_index.add("nlb", lottery_name, found)
+        _watchlist.ingest("nlb", lottery_name, found, complete=True)
+
+
+def refresh_draws(board: str, lottery_name: str) -> Union[str, None]:
+    """Ingest new archive draws and the board's latest draws; returns an error message or None."""
+    global _archive_mtime
+    with _index_lock:
+        mtime = archive_mtime(ARCHIVE_PATH) if ARCHIVE_PATH else None
+        if mtime is not None and mtime != _archive_mtime:
+            draw_index.update_from_archive(ARCHIVE_PATH)
+            _archive_mtime = mtime
+        key = (board, lottery_name)
+        if key in _topped_up and time.monotonic() - _topped_up[key] < LATEST_TTL:
+            return None
+
+    if board == "nlb":
+        latest = cached(f"nlb:latest:{lottery_name}:{INDEX_TOP_UP}", LATEST_TTL,
+                        lambda: scrape_nlb_latest_results(None, lottery_name, INDEX_TOP_UP),
+                        latest_is_fresh(board, lottery_name))
+    else:
+        latest = cached(f"dlb:latest:{lottery_name}:{INDEX_TOP_UP}", LATEST_TTL,
+                        lambda: scrape_dlb_latest_results(lottery_name, INDEX_TOP_UP),
+                        latest_is_fresh(board, lottery_name))
+    if "error" in latest:
+        return latest["error"]
+    ingest_draws(board, lottery_name, latest.get("NLB_Results" if board == "nlb" else "DLB_Results", []))
+    with _index_lock:
+        _topped_up[key] = time.monotonic()
+    return None
+
+
+@mcp.tool(description="Search a lottery's draw history by winning numbers and/or letters, e.g. when 27 and 41 last came up together in Govisetha, or which draws had letter K. match='all' needs every term in the draw, match='any' at least one.")
+@profiled(profiler)
+def search_draws(board: str, lottery_name: str, numbers: Union[list[int], None] = None,
+                 letters: Union[list[str], None] = None, match: str = "all", limit: int = 10,
+                 timeout_seconds: Union[float, None] = None) -> dict:
+    """
+    Finds draws of one lottery that contain the given numbers and letters.
+    
+    Args:
+        board (str): 'nlb' or 'dlb'
+        lottery_name (str): NLB name in lowercase with hyphens (e.g., 'govisetha'),
+                           or exact DLB name (e.g., 'Ada Kotipathi')
+        numbers (list, optional): Winning numbers to look for (e.g., [27, 41])
+        letters (list, optional): Winning letters to look for (e.g., ['K'])
+        match (str): 'all' (default) for draws containing every number and letter,
+                     'any' for draws containing at least one
+        limit (int): Maximum number of draws to return, newest first (default: 10, max: 100)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
+    Returns:
+        dict: Contains:
+              - matches: Number of indexed draws that match
+              - draws: Matching draws, newest first (draw, date, letter, numbers)
+              - indexed_draws, first_draw, latest_draw: The history searched
+              'note' is added if the index does not hold every draw up to
+              latest_draw, saying which draws were searched (e.g. "Not seen
+              since draw 4214").
+              'warning' is added if the newest draws could not be fetched and
+              only previously indexed draws were searched.
+              Or 'error' key if the operation fails.
+              
+    Example:
+        >>> search_draws('nlb', 'govisetha', numbers=[27, 41], limit=1)
+        {
+            "matches": 12,
+            "draws": [
+                {"draw": "4241", "date": "2025-10-28", "letter": "K",
+                 "numbers": ["09", "27", "41", "66"]}
+            ],
+            "indexed_draws": 4263,
+            "first_draw": "1",
+            "latest_draw": "4263"
+        }
+    """
+    try:
+        with tool_deadline(timeout_seconds):
+            if board not in ("nlb", "dlb"):
+                return {"error": "Board must be 'nlb' or 'dlb'"}
+            if not numbers and not letters:
+                return {"error": "Give at least one number or letter to search for"}
+            if match not in ("all", "any"):
+                return {"error": "Match must be 'all' or 'any'"}
+            if not isinstance(limit, int) or limit <= 0 or limit > 100:
+                return {"error": "Limit must be a positive integer no greater than 100"}
+        
+            if board == "nlb":
+                lottery_name = normalize_nlb_lottery_name(lottery_name)
+            problem = refresh_draws(board, lottery_name)
+            result = draw_index.search(board, lottery_name, numbers or [], letters or [], match, limit)
+            if problem is not None:
+                if not result["indexed_draws"]:
+                    return {"error": problem}
+                result["warning"] = f"Searched indexed draws only; latest draws unavailable: {problem}"
+            note = history_note(result)
+            if note is not None:
+                result["note"] = note
+            return result
+    except Exception as e:
+        return {"error": f"Failed to search draws: {str(e)}"}
+
+
+def history_note(result: dict) -> Union[str, None]:
+    """Say which draws a search covered if the index does not hold the full history, else None."""
+    if result["first_draw"] is None:
+        return None
+    first, latest = int(result["first_draw"]), int(result["latest_draw"])
+    missing = latest - first + 1 - result["indexed_draws"]
+    if first <= 1 and not missing:
+        return None
+    window = f"draws {first} to {latest}" + (f" ({missing} missing)" if missing else "")
+    if result["matches"]:
+        note = f"Searched {window} only; older draws are not indexed"
+    else:
+        note = f"Not seen since draw {first}; only {window} are indexed"
+    if not ARCHIVE_PATH:
+        note += ". Set LOTTERY_ARCHIVE_PATH to a draw archive to search the full history"
+    return note
+
+
+@mcp.tool(description="Add a ticket to a named watchlist so it is checked against every new draw of its lottery. A hit is reported when at least min_matches of its numbers are drawn, or its letter is.")
+@profiled(profiler)
+def add_to_watchlist(watchlist: str, board: str, lottery_name: str, numbers: list[int],
+                     letter: Union[str, None] = None, min_matches: int = 1,
+                     timeout_seconds: Union[float, None] = None) -> dict:
+    """
+    Registers a ticket; it is checked against draws after the lottery's current latest draw.
+    
+    Args:
+        watchlist (str): Name of the watchlist, e.g. a user or family name
+        board (str): 'nlb' or 'dlb'
+        lottery_name (str): NLB name in lowercase with hyphens (e.g., 'govisetha'),
+                           or exact DLB name (e.g., 'Ada Kotipathi')
+        numbers (list): Ticket numbers (e.g., [13, 25, 29, 51])
+        letter (str, optional): Ticket letter (e.g., 'T')
+        min_matches (int): Numbers that must be drawn for a hit (default: 1)
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
+    Returns:
+        dict: The stored ticket (ticket id, board, lottery, numbers, letter,
+              min_matches, after_draw).
+              Or 'error' key if the operation fails.
+              
+    Example:
+        >>> add_to_watchlist('family', 'nlb', 'govisetha', [13, 25, 29, 51], 'T', 2)
+        {"ticket": 7, "board": "nlb", "lottery": "govisetha", "numbers": [13, 25, 29, 51],
+         "letter": "T", "min_matches": 2, "after_draw": 4263}
+    """
+    try:
+        with tool_deadline(timeout_seconds):
+            if board not in ("nlb", "dlb"):
+                return {"error": "Board must be 'nlb' or 'dlb'"}
+            if board == "nlb":
+                lottery_name = normalize_nlb_lottery_name(lottery_name)
+            watchlist_db = get_watchlist()
+            problem = refresh_draws(board, lottery_name)
+            after_draw = watchlist_db.watermark(board, lottery_name)
+            if after_draw is None:
+                return {"error": f"Could not find the latest draw of {lottery_name}: {problem}"}
+            return watchlist_db.add(watchlist, board, lottery_name, numbers, letter or "", min_matches, after_draw)
+    except Exception as e:
+        return {"error": f"Failed to add ticket: {str(e)}"}
+
+
+@mcp.tool(description="Remove a ticket from a watchlist by its ticket id.")
+@profiled(profiler)
+def remove_from_watchlist(watchlist: str, ticket: int) -> dict:
+    """
+    Deletes a ticket and its recorded hits.
+    
+    Args:
+        watchlist (str): Name of the watchlist
+        ticket (int): Ticket id returned by add_to_watchlist
+    
+    Returns:
+        dict: 'removed': True, or 'error' key if the watchlist has no such ticket.
+    """
+    try:
+        if not get_watchlist().remove(watchlist, ticket):
+            return {"error": f"Watchlist '{watchlist}' has no ticket {ticket}"}
+        return {"removed": True}
+    except Exception as e:
+        return {"error": f"Failed to remove ticket: {str(e)}"}
+
+
+@mcp.tool(description="Check a watchlist for winning tickets. Returns hits on draws after since_draw (all hits if omitted), along with the watchlist's tickets.")
+@profiled(profiler)
+def check_watchlist(watchlist: str, since_draw: Union[int, None] = None, lottery_name: Union[str, None] = None,
+                    timeout_seconds: Union[float, None] = None) -> dict:
+    """
+    Fetches any new draws of the watched lotteries, matches them against the
+    watchlist and returns its hits.
+    
+    Each new draw is matched once, against only the tickets that share a
+    number or the letter with it; earlier draws are never re-checked.
+    
+    Args:
+        watchlist (str): Name of the watchlist
+        since_draw (int, optional): Only return hits on draws after this one
+        lottery_name (str, optional): Only return hits on this lottery
+        timeout_seconds (float, optional): Overall time budget for this call
+                           (default: LOTTERY_TOOL_TIMEOUT, 30 seconds)
+    
+    Returns:
+        dict: Contains:
+              - hits: Oldest draw first; each has ticket, board, lottery, draw,
+                date, letter, numbers (as drawn), matched (ticket numbers drawn)
+                and letter_match
+              - tickets: The watchlist's tickets
+              - checked_through: Newest draw checked, per lottery
+              'errors' is added for lotteries whose new draws could not be fetched.
+              Or 'error' key if the operation fails.
+              
+    Example:
+        >>> check_watchlist('family', since_draw=4260)
+        {
+            "hits": [
+                {"ticket": 7, "watchlist": "family", "board": "nlb", "lottery": "govisetha",
+                 "draw": 4264, "date": "2025-11-25", "letter": "T",
+                 "numbers": ["13", "33", "51", "70"], "matched": [13, 51], "letter_match": true}
+            ],
+            "tickets": [...],
+            "checked_through": {"govisetha": 4264}
+        }
+    """
+    try:
+        with tool_deadline(timeout_seconds):
+            watchlist_db = get_watchlist()
+            errors = {}
+            checked = {}
+            for board, name in watchlist_db.lotteries(watchlist):
+                problem = refresh_draws(board, name)
+                if problem is not None:
+                    errors[name] = problem
+                checked[name] = watchlist_db.watermark(board, name)
+            if lottery_name is not None and lottery_name not in checked:
+                lottery_name = normalize_nlb_lottery_name(lottery_name)
+            result = {
+                "hits": watchlist_db.hits(watchlist, since_draw=since_draw, lottery_name=lottery_name),
+                "tickets": watchlist_db.tickets(watchlist),
+                "checked_through": checked,
+            }
+            if errors:
+                result["errors"] = errors
+            return result
+    except Exception as e:
+        return {"error": f"Failed to check watchlist: {str(e)}"}
+
+
+# ==================== RESPONSE CACHE ====================
+#
+# Responses of the read-only tools are kept ready to send, already
+# serialized, under the tool name and its normalized arguments. Latest-result
+# responses are dropped as soon as note_newest sees a newer draw of their
+# lottery, and every response expires with the TTL of the data behind it.
+# LOTTERY_RESPONSE_CACHE_SIZE=0 turns the cache off; its hit rate and the time
+# it saved are read from lottery://metrics/responses.
+
+response_cache = ResponseCache(int(os.environ.get("LOTTERY_RESPONSE_CACHE_SIZE", 1024)))
+
+# tool name -> (tool, TTL, scope of the draw data the response depends on)
+CACHED_TOOLS = {
+    "get_nlb_lottery_names": (get_nlb_lottery_names, NAMES_TTL, lambda args: None),
+    "get_dlb_lottery_names": (get_dlb_lottery_names, NAMES_TTL, lambda args: None),
+    "get_nlb_result_by_draw": (get_nlb_result_by_draw, RESULT_TTL, lambda args: None),
+    "get_nlb_result_by_date": (get_nlb_result_by_date, RESULT_TTL, lambda args: None),
+    "get_dlb_result_by_draw": (get_dlb_result_by_draw, RESULT_TTL, lambda args: None),
+    "get_dlb_result_by_date": (get_dlb_result_by_date, RESULT_TTL, lambda args: None),
+    "get_nlb_latest_results": (get_nlb_latest_results, LATEST_TTL, lambda args: f"nlb:{args['lottery_name']}"),
+    "get_dlb_latest_results": (get_dlb_latest_results, LATEST_TTL, lambda args: f"dlb:{args['lottery_name']}"),
+    "get_all_latest_results": (get_all_latest_results, LATEST_TTL, lambda args: ALL),
+}
+
+
+def response_key(tool_name: str, arguments: Union[dict, None]) -> Union[tuple[str, Union[str, None]], None]:
+    """Cache key and data scope of a tool call, or None if its response is not cached."""
+    if tool_name not in CACHED_TOOLS:
+        return None
+    tool, _, scope = CACHED_TOOLS[tool_name]
+    try:
+        bound = inspect.signature(tool.fn).bind(**(arguments or {}))
+    except TypeError:
+        return None  # let the tool report the bad arguments
+    bound.apply_defaults()
+    args = {name: value for name, value in bound.arguments.items() if name != "timeout_seconds"}
+    if tool_name.startswith("get_nlb_") and isinstance(args.get("lottery_name"), str):
+        args["lottery_name"] = normalize_nlb_lottery_name(args["lottery_name"])
+    try:
+        return f"{tool_name}:{json.dumps(args, sort_keys=True)}", scope(args)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCacheMiddleware(Middleware):
+    """Answers repeated read-only tool calls from response_cache."""
+
+    async def on_call_tool(self, context, call_next):
+        key = response_key(context.message.name, context.message.arguments) if response_cache.enabled else None
+        if key is None:
+            return await call_next(context)
+        key, scope = key
+        response = response_cache.get(key)
+        if response is not None:
+            return response
+
+        token = response_cache.token(scope)
+        started = time.perf_counter()
+        response = await call_next(context)
+        cost = time.perf_counter() - started  # the whole call: upstream fetches and waits included
+        if isinstance(response.structured_content, dict) and cacheable(response.structured_content):
+            size = sum(len(block.text) for block in response.content if hasattr(block, "text"))
+            response_cache.put(key, response, scope, token, CACHED_TOOLS[context.message.name][1], cost, size)
+        return response
+
+
+mcp.add_middleware(ResponseCacheMiddleware())
+
+
 # ==================== PROMPTS ====================
 
 @mcp.prompt()
@@ -546,5 +1211,221 @@ def usage_examples() -> str:
     - Get lottery names first to ensure you use the correct format
     """
 
+@mcp.resource("lottery://metrics/http", mime_type="application/json")
+def http_metrics() -> dict:
+    """Upstream request counters: retries, failures, hedges sent/won and latency percentiles."""
+    from srilanka_lottery.transport import get_metrics
+    return get_metrics()
+
+
+@mcp.resource("lottery://metrics/responses", mime_type="application/json")
+def response_cache_metrics() -> dict:
+    """Response cache counters: hits, misses, invalidations, size and call time saved."""
+    return response_cache.stats()
+
+
+@mcp.resource("lottery://metrics/profile", mime_type="application/json")
+def profile_report() -> dict:
+    """Sampled tool profiles: calls, wall time, allocations and top functions by cumulative time."""
+    return profiler.report()
+
+
+@mcp.resource("lottery://metrics/profile/folded", mime_type="text/plain")
+def profile_folded() -> str:
+    """Stack samples of profiled calls in folded format, for flamegraph.pl or speedscope."""
+    return profiler.folded()
+
+
+def configure_profiling(rate: float, tool_name: Union[str, None] = None, allocations: bool = True,
+                        reset: bool = False) -> dict:
+    """
+    Turns sampled profiling of tool calls on or off at runtime.
+    
+    Only registered when LOTTERY_ADMIN_TOOLS=1.
+    
+    Args:
+        rate (float): Fraction of calls to profile, 0 (off) to 1 (every call)
+        tool_name (str, optional): Only change the rate of this tool
+        allocations (bool): Also record allocation stats (default: True)
+        reset (bool): Discard the profiles collected so far
+    
+    Returns:
+        dict: The new profiling settings, or 'error' key if the rate is invalid.
+    """
+    try:
+        if reset:
+            profiler.reset()
+        return profiler.configure(rate=rate, tool=tool_name, allocations=allocations)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+if os.environ.get("LOTTERY_ADMIN_TOOLS") == "1":
+    mcp.tool(description="Admin: set the fraction of tool calls to profile (0 turns profiling off). Results are in lottery://metrics/profile.")(configure_profiling)
+
+
+# ==================== SUBSCRIPTIONS ====================
+#
+# Clients subscribe to lottery://nlb/{name}/latest or lottery://dlb/{name}/latest.
+# Each subscribed lottery gets one DrawWatcher polling upstream; subscribers
+# receive notifications/resources/updated only when a new draw number appears.
+
+WATCH_INTERVAL = float(os.environ.get("LOTTERY_WATCH_INTERVAL", 120))
+LATEST_URI = re.compile(r"^lottery://(nlb|dlb)/([^/]+)/latest$")
+
+# (board, lottery name) -> watcher, and -> {uri: set of subscribed sessions}
+watchers: dict[tuple[str, str], DrawWatcher] = {}
+subscribers: dict[tuple[str, str], dict[str, set]] = {}
+
+# (key, uri, session) subscriptions made on the current connection; see
+# _drop_subscriptions_on_close
+_connection_subscriptions: contextvars.ContextVar = contextvars.ContextVar("connection_subscriptions")
+
+
+def parse_latest_uri(uri: str) -> Union[tuple[str, str], None]:
+    """Split a latest-result resource URI into (board, normalized lottery name)."""
+    from urllib.parse import unquote
+
+    match = LATEST_URI.match(uri)
+    if not match:
+        return None
+    board, name = match.group(1), unquote(match.group(2))
+    return board, normalize_nlb_lottery_name(name) if board == "nlb" else name
+
+
+def fetch_latest_draw(board: str, lottery_name: str) -> dict:
+    """Fetch the single newest result of a lottery."""
+    if board == "nlb":
+        return scrape_nlb_latest_results(None, lottery_name, 1)
+    return scrape_dlb_latest_results(lottery_name, 1)
+
+
+def drop_subscriber(key: tuple[str, str], uri: str, session) -> None:
+    """Remove a session's subscription; the lottery's watcher stops with its last subscriber."""
+    uris = subscribers.get(key)
+    if uris is None:
+        return
+    uris.get(uri, set()).discard(session)
+    if not uris.get(uri):
+        uris.pop(uri, None)
+    if not uris:
+        del subscribers[key]
+        watcher = watchers.pop(key, None)
+        if watcher is not None:
+            watcher.stop()
+
+
+async def notify_subscribers(key: tuple[str, str]) -> None:
+    """Send resources/updated to every session subscribed to a lottery."""
+    for uri, sessions in list(subscribers.get(key, {}).items()):
+        for session in list(sessions):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                drop_subscriber(key, uri, session)  # client went away
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_latest(uri: AnyUrl) -> None:
+    key = parse_latest_uri(str(uri))
+    if key is None:
+        raise ValueError(f"Subscriptions are only supported for lottery://<board>/<name>/latest, not {uri}")
+    session = mcp._mcp_server.request_context.session
+    subscribers.setdefault(key, {}).setdefault(str(uri), set()).add(session)
+    _connection_subscriptions.get([]).append((key, str(uri), session))
+    if key not in watchers:
+        async def on_new_draw(result, key=key):
+            rows = result.get("NLB_Results") or result.get("DLB_Results") or []
+            try:
+                await asyncio.to_thread(ingest_draws, *key, rows)
+            except Exception:
+                pass  # the next top-up ingests these draws again
+            await notify_subscribers(key)
+
+        watchers[key] = DrawWatcher(lambda: fetch_latest_draw(*key), on_new_draw, interval=WATCH_INTERVAL)
+    watchers[key].start()
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_latest(uri: AnyUrl) -> None:
+    key = parse_latest_uri(str(uri))
+    if key is None:
+        return
+    drop_subscriber(key, str(uri), mcp._mcp_server.request_context.session)
+
+
+def _advertise_subscriptions(get_capabilities):
+    # The low-level server hardcodes resources.subscribe=False
+    def wrapper(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+    return wrapper
+
+
+mcp._mcp_server.get_capabilities = _advertise_subscriptions(mcp._mcp_server.get_capabilities)
+
+
+def _drop_subscriptions_on_close(run):
+    # The low-level server has no session-closed hook, but run() serves one
+    # session and returns when it ends. Requests are handled in tasks started
+    # from run(), so they see the list set here.
+    @functools.wraps(run)
+    async def wrapper(*args, **kwargs):
+        subscribed = []
+        token = _connection_subscriptions.set(subscribed)
+        try:
+            return await run(*args, **kwargs)
+        finally:
+            _connection_subscriptions.reset(token)
+            for key, uri, session in subscribed:
+                drop_subscriber(key, uri, session)
+    return wrapper
+
+
+mcp._mcp_server.run = _drop_subscriptions_on_close(mcp._mcp_server.run)
+
+
+def read_latest(board: str, lottery_name: str) -> dict:
+    """Newest result of a lottery, from its watcher when one is running."""
+    watcher = watchers.get((board, lottery_name))
+    if watcher is not None and watcher.latest is not None:
+        return watcher.latest
+    return cached(f"{board}:latest:{lottery_name}:1", LATEST_TTL,
+                  lambda: fetch_latest_draw(board, lottery_name), latest_is_fresh(board, lottery_name))
+
+
+@mcp.resource("lottery://nlb/{name}/latest", mime_type="application/json")
+def nlb_latest_result(name: str) -> dict:
+    """Newest NLB result for a lottery. Subscribe to be notified of new draws."""
+    return read_latest("nlb", normalize_nlb_lottery_name(name))
+
+
+@mcp.resource("lottery://dlb/{name}/latest", mime_type="application/json")
+def dlb_latest_result(name: str) -> dict:
+    """Newest DLB result for a lottery. Subscribe to be notified of new draws."""
+    return read_latest("dlb", name)
+
+
+# ==================== STARTUP ====================
+
+def warm_up() -> None:
+    """Load the scraping stack and prime the lottery name catalog.
+
+    srilanka_lottery defers importing requests and BeautifulSoup until the
+    first scrape. With LOTTERY_WARMUP=1 this runs in a background thread right
+    after startup so the first client does not pay for it.
+    """
+    import bs4  # noqa: F401
+    import requests  # noqa: F401
+    if shared_cache is not None:
+        cached("nlb:names", NAMES_TTL, lambda: scrape_nlb_active_lottery_names()[0])
+        cached("dlb:names", NAMES_TTL, scrape_dlb_lottery_names)
+
+
+if os.environ.get("LOTTERY_WARMUP") == "1":
+    threading.Thread(target=warm_up, name="lottery-warmup", daemon=True).start()
+
 # if __name__ == "__main__":  # please uncomment this, when U use this in locally (STDIO)
 #     mcp.run()
\ No newline at end of file
@@ -5,6 +5,7 @@ from .scraper import (
     scrape_nlb_active_lottery_names,
     scrape_nlb_latest_results,
     scrape_dlb_latest_results,
+    scrape_all_latest_results,
     get_nlb_session
 )
 
@@ -0,0 +1,46 @@
+"""Deferred imports for heavy dependencies.
+
+``requests`` and ``bs4`` together add well over 100 ms to a cold start. Modules
+bind them through ``LazyModule`` so the cost is paid by the first scrape
+instead of by every process that merely imports the package.
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Example:
+        >>> requests = LazyModule("requests")
+        >>> requests.Session()  # imports requests here
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def optional_import(name):
+    """Import an optional dependency, returning None if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
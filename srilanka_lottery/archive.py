@@ -0,0 +1,550 @@
+"""Memory-mapped columnar archive of lottery draws.
+
+The archive keeps every lottery's draws as fixed-width little-endian arrays so
+analytics can slice them straight out of the page cache, without parsing JSON
+or building Python objects per draw.
+
+File layout:
+    magic ``LKDA`` | version (u16) | reserved (u16) | header length (u32)
+    header: UTF-8 JSON with the letter table and one index entry per lottery
+    per lottery, each section 8-byte aligned:
+        draw     uint32[count]          draw numbers, ascending
+        date     int32[count]           ``date.toordinal()``, 0 if unknown
+        letter   uint8[count]           index into the letter table + 1, 0 if none
+        numbers  uint16[count * width]  winning numbers, 0xFFFF pads short rows
+    Each index entry also records ``pad``, the digits the board zero-pads its
+    numbers to (0 if it does not), so records read back as '07', not '7'.
+
+Appends go to a tail file beside the archive (``<path>.tail``), one JSON line
+per draw, so adding a batch costs the batch and not the whole archive. Once
+the tail holds ``COMPACT_ROWS`` draws it is compacted: the columnar file is
+rebuilt beside the original and ``os.replace``-d, then the tail is emptied.
+Readers merge the tail in when they open the archive, under a shared lock, so
+they see the archive either before or after a write, never a torn one.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from ._lazy import optional_import
+from .dates import parse_draw_date
+from .export import iter_draws
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MAGIC = b"LKDA"
+VERSION = 1
+NO_NUMBER = 0xFFFF
+COMPACT_ROWS = 2000
+_PREFIX = struct.Struct("<4sHHI")
+_COLUMNS = (
+    # name, array typecode, numpy dtype, item size
+    ("draw", "I", "<u4", 4),
+    ("date", "i", "<i4", 4),
+    ("letter", "B", "u1", 1),
+    ("numbers", "H", "<u2", 2),
+)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _native(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _number_pad(numbers):
+    """Digits a row's numbers are zero-padded to, 0 if none is."""
+    return max((len(n) for n in map(str, numbers) if len(n) > 1 and n.startswith("0")), default=0)
+
+
+def _tail_path(path):
+    return path + ".tail"
+
+
+class _ArchiveLock:
+    """Lock file next to an archive: exclusive for writers, shared for readers.
+
+    Readers that cannot create the lock file (e.g. a read-only directory)
+    go ahead unlocked.
+    """
+
+    def __init__(self, path, exclusive):
+        self.path = path + ".lock"
+        self.exclusive = exclusive
+        self._fp = None
+
+    def __enter__(self):
+        try:
+            self._fp = open(self.path, "a")
+        except OSError:
+            if self.exclusive:
+                raise
+            return self
+        if fcntl is not None:
+            fcntl.flock(self._fp, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._fp is not None:
+            self._fp.close()
+
+
+def _read_tail(path):
+    """Read the tail into ``({(board, name): {draw: row}}, {(board, name): pad}, lines)``.
+
+    A line cut short by a crashed writer is skipped.
+    """
+    lotteries, pads, lines = {}, {}, 0
+    try:
+        with open(_tail_path(path), "rb") as fp:
+            data = fp.read()
+    except FileNotFoundError:
+        return lotteries, pads, lines
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        key = (record["board"], record["lottery"])
+        lotteries.setdefault(key, {})[record["draw"]] = (record["date"], record["letter"], tuple(record["numbers"]))
+        pads[key] = max(pads.get(key, 0), record["pad"])
+        lines += 1
+    return lotteries, pads, lines
+
+
+def _build_columns(draws, letter_codes):
+    """Lay out ``{draw: (ordinal, letter, numbers)}`` as native column arrays; returns ``(width, columns)``."""
+    ordered = sorted(draws)
+    width = max((len(draws[d][2]) for d in ordered), default=0)
+    numbers = array("H")
+    for d in ordered:
+        row = draws[d][2]
+        numbers.extend(row)
+        numbers.extend([NO_NUMBER] * (width - len(row)))
+    return width, {
+        "draw": array("I", ordered),
+        "date": array("i", (draws[d][0] for d in ordered)),
+        "letter": array("B", (letter_codes.get(draws[d][1], 0) for d in ordered)),
+        "numbers": numbers,
+    }
+
+
+class DrawArchive:
+    """Read-only, memory-mapped view of a draw archive.
+
+    Column accessors return zero-copy views into the mapping: numpy arrays when
+    numpy is installed, otherwise ``memoryview`` objects cast to the column type
+    (with 'numbers' flattened, ``width`` values per draw). An archive replaced by
+    a writer keeps serving the old data until it is reopened. Lotteries with
+    draws still in the tail file are merged into memory on open, so their
+    columns are copies rather than views until the tail is compacted.
+
+    Example:
+        >>> with DrawArchive("draws.lkda") as archive:
+        ...     cols = archive.columns("dlb", "Ada Kotipathi")
+        ...     cols["draw"][-1], cols["numbers"][-1]
+    """
+
+    def __init__(self, path, tail=True):
+        """Open an archive.
+
+        Args:
+            path (str): Archive file path.
+            tail (bool): Merge in draws still in the tail file (default).
+                Writers pass False to read the columnar file alone.
+        """
+        self.path = path
+        # numpy is optional and slow to import, so it is only looked up here
+        self._numpy = optional_import("numpy")
+        pending = {}
+        if tail and os.path.exists(_tail_path(path)):
+            with _ArchiveLock(path, exclusive=False):
+                if os.path.exists(path):
+                    self._open(path)
+                else:  # nothing compacted yet
+                    self._mmap, self.letters, self._index = None, [], {}
+                pending, pads, _ = _read_tail(path)
+        else:
+            self._open(path)
+        for key, draws in pending.items():
+            self._merge(key, draws, pads[key])
+
+    def _open(self, path):
+        with open(path, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, header_len = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a draw archive")
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported draw archive version {version}")
+        header = json.loads(self._mmap[_PREFIX.size:_PREFIX.size + header_len].decode("utf-8"))
+        self.letters = header["letters"]
+        self._index = {(entry["board"], entry["name"]): entry for entry in header["lotteries"]}
+
+    def _merge(self, key, pending, pad):
+        """Replace a lottery's entry by its stored draws overlaid with the tail's."""
+        entry = self._index.get(key)
+        draws = self._draws(key) if entry else {}
+        draws.update(pending)
+        for _, letter, _ in draws.values():
+            if letter and letter not in self.letters:
+                self.letters.append(letter)
+        codes = {letter: code for code, letter in enumerate(self.letters, start=1)}
+        width, columns = _build_columns(draws, codes)
+        self._index[key] = {"board": key[0], "name": key[1], "count": len(draws), "width": width,
+                            "pad": max(pad, entry.get("pad", 0) if entry else 0), "arrays": columns}
+
+    def _draws(self, key):
+        """Read a lottery into ``{draw: (ordinal, letter, numbers)}``."""
+        cols = self.columns(*key)
+        width = self.width(*key)
+        return {
+            int(cols["draw"][i]): (
+                int(cols["date"][i]),
+                self.letter(int(cols["letter"][i])),
+                tuple(self._row_numbers(cols["numbers"], width, i)),
+            )
+            for i in range(len(cols["draw"]))
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the memory mapping.
+
+        If column views are still alive the mapping is released when the last
+        one is garbage collected instead.
+        """
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def lotteries(self):
+        """Return ``(board, name)`` pairs stored in the archive."""
+        return sorted(self._index)
+
+    def count(self, board, lottery_name):
+        """Return the number of draws stored for a lottery (0 if absent)."""
+        entry = self._index.get((board, lottery_name))
+        return entry["count"] if entry else 0
+
+    def width(self, board, lottery_name):
+        """Return the number of number slots per draw for a lottery."""
+        return self._index[(board, lottery_name)]["width"]
+
+    def pad(self, board, lottery_name):
+        """Return the digits a lottery's numbers are zero-padded to (0 if not padded)."""
+        return self._index[(board, lottery_name)].get("pad", 0)
+
+    def _view(self, entry, column):
+        name, typecode, dtype, size = next(c for c in _COLUMNS if c[0] == column)
+        if "arrays" in entry:
+            values = entry["arrays"][column]
+            if self._numpy is not None:
+                view = self._numpy.frombuffer(values, dtype=typecode)
+                return view.reshape(entry["count"], entry["width"]) if column == "numbers" else view
+            return memoryview(values)
+        length = entry["count"] * (entry["width"] if column == "numbers" else 1)
+        offset = entry["offsets"][column]
+        if self._numpy is not None:
+            view = self._numpy.frombuffer(self._mmap, dtype=dtype, count=length, offset=offset)
+            return view.reshape(entry["count"], entry["width"]) if column == "numbers" else view
+        return memoryview(self._mmap)[offset:offset + length * size].cast(typecode)
+
+    def columns(self, board, lottery_name, draw_from=None, draw_to=None):
+        """Return column views for a lottery, optionally limited to a draw range.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name as stored.
+            draw_from (int, optional): Lowest draw number to include.
+            draw_to (int, optional): Highest draw number to include.
+
+        Returns:
+            dict: 'draw', 'date', 'letter' and 'numbers' views, ascending by
+                  draw number. 'numbers' is count x width with numpy, flat
+                  otherwise.
+
+        Raises:
+            KeyError: If the lottery is not in the archive.
+        """
+        entry = self._index[(board, lottery_name)]
+        cols = {name: self._view(entry, name) for name, *_ in _COLUMNS}
+        if draw_from is None and draw_to is None:
+            return cols
+        draws = cols["draw"]
+        start = 0 if draw_from is None else bisect_left(draws, draw_from)
+        stop = len(draws) if draw_to is None else bisect_right(draws, draw_to)
+        sliced = {name: view[start:stop] for name, view in cols.items()}
+        if self._numpy is None:
+            width = entry["width"]
+            sliced["numbers"] = cols["numbers"][start * width:stop * width]
+        return sliced
+
+    def _row_numbers(self, numbers, width, i):
+        row = numbers[i] if self._numpy is not None else numbers[i * width:(i + 1) * width]
+        return [int(n) for n in row if n != NO_NUMBER]
+
+    def letter(self, code):
+        """Map a letter code back to its text ('' for 0)."""
+        return self.letters[code - 1] if code else ""
+
+    def iter_records(self, board, lottery_name, draw_from=None, draw_to=None):
+        """Yield draws newest first in the export record shape.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name as stored.
+            draw_from (int, optional): Lowest draw number to yield.
+            draw_to (int, optional): Highest draw number to yield.
+
+        Yields:
+            dict: Records with board, lottery, draw, date, letter, and numbers.
+                  Numbers are zero-padded as the board shows them (see ``pad``).
+        """
+        if (board, lottery_name) not in self._index:
+            return
+        cols = self.columns(board, lottery_name, draw_from, draw_to)
+        width = self.width(board, lottery_name)
+        pad = self.pad(board, lottery_name)
+        for i in range(len(cols["draw"]) - 1, -1, -1):
+            ordinal = int(cols["date"][i])
+            yield {
+                "board": board,
+                "lottery": lottery_name,
+                "draw": int(cols["draw"][i]),
+                "date": date.fromordinal(ordinal).isoformat() if ordinal else "",
+                "letter": self.letter(int(cols["letter"][i])),
+                "numbers": [str(n).zfill(pad) for n in self._row_numbers(cols["numbers"], width, i)],
+            }
+
+
+def _load_lotteries(path):
+    """Read an archive and its tail into ``{(board, name): {draw: row}}`` and ``{(board, name): pad}``.
+
+    The caller holds the writer lock, so the tail is read here rather than
+    by ``DrawArchive``, which would wait for a shared lock.
+    """
+    lotteries, pads = {}, {}
+    if os.path.exists(path):
+        with DrawArchive(path, tail=False) as archive:
+            for key in archive.lotteries():
+                lotteries[key] = archive._draws(key)
+                pads[key] = archive.pad(*key)
+    tail, tail_pads, _ = _read_tail(path)
+    for key, draws in tail.items():
+        lotteries.setdefault(key, {}).update(draws)
+        pads[key] = max(pads.get(key, 0), tail_pads[key])
+    return lotteries, pads
+
+
+def _write_archive(path, lotteries, pads):
+    letters = sorted({row[1] for draws in lotteries.values() for row in draws.values() if row[1]})
+    letter_codes = {letter: code for code, letter in enumerate(letters, start=1)}
+
+    entries = []
+    sections = []
+    for (board, name), draws in sorted(lotteries.items()):
+        width, columns = _build_columns(draws, letter_codes)
+        entries.append({"board": board, "name": name, "count": len(draws), "width": width,
+                        "pad": pads.get((board, name), 0), "offsets": {}})
+        sections.append(columns)
+
+    # Offsets depend on the header size, which depends on the offsets' digits;
+    # size the header generously with placeholder offsets first.
+    for entry in entries:
+        entry["offsets"] = {name: 10 ** 12 for name, *_ in _COLUMNS}
+    header_len = len(json.dumps({"letters": letters, "lotteries": entries}).encode("utf-8"))
+
+    offset = _align(_PREFIX.size + header_len)
+    for entry, columns in zip(entries, sections):
+        for name, *_ in _COLUMNS:
+            entry["offsets"][name] = offset
+            offset = _align(offset + len(columns[name]) * columns[name].itemsize)
+    header = json.dumps({"letters": letters, "lotteries": entries}).encode("utf-8").ljust(header_len)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".draws-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(_PREFIX.pack(MAGIC, VERSION, 0, len(header)))
+            fp.write(header)
+            for entry, columns in zip(entries, sections):
+                for name, *_ in _COLUMNS:
+                    fp.write(b"\0" * (entry["offsets"][name] - fp.tell()))
+                    fp.write(_native(columns[name]).tobytes())
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _stored_row(archive, board, lottery_name, number):
+    """Return one draw of the columnar file as ``(ordinal, letter, numbers)``, or None."""
+    if archive is None or not archive.count(board, lottery_name):
+        return None
+    cols = archive.columns(board, lottery_name, draw_from=number, draw_to=number)
+    if not len(cols["draw"]):
+        return None
+    numbers = cols["numbers"][0] if archive._numpy is not None else cols["numbers"]
+    return (int(cols["date"][0]), archive.letter(int(cols["letter"][0])),
+            tuple(int(n) for n in numbers if n != NO_NUMBER))
+
+
+def _compact(path):
+    """Fold the tail into the columnar file; the caller holds the writer lock."""
+    lotteries, pads = _load_lotteries(path)
+    _write_archive(path, lotteries, pads)
+    # A crash before this truncate leaves rows in both files; readers merge them
+    # by draw number, so the archive reads the same.
+    with open(_tail_path(path), "wb") as fp:
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def archive_mtime(path):
+    """Return a stamp that changes whenever the archive or its tail is written.
+
+    Args:
+        path (str): Archive file path.
+
+    Returns:
+        tuple or None: Modification times of the archive and its tail, or
+                       None if neither exists.
+    """
+    stamps = tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None for p in (path, _tail_path(path)))
+    return None if stamps == (None, None) else stamps
+
+
+def compact(path):
+    """Fold draws appended since the last compaction into the columnar file.
+
+    ``append_draws`` compacts on its own once the tail holds ``COMPACT_ROWS``
+    draws; call this to do it earlier, e.g. before shipping the archive.
+
+    Args:
+        path (str): Archive file path.
+    """
+    with _ArchiveLock(path, exclusive=True):
+        if os.path.exists(_tail_path(path)):
+            _compact(path)
+
+
+def append_draws(path, board, lottery_name, draws):
+    """Add draws for one lottery to an archive, creating it if needed.
+
+    Draws already in the archive are replaced by the new values. New and
+    changed draws are appended to the tail file, so an append costs the batch,
+    not the archive; see ``compact``. Concurrent writers are serialised with a
+    lock file next to the archive.
+
+    Args:
+        path (str): Archive file path.
+        board (str): 'nlb' or 'dlb'.
+        lottery_name (str): Lottery name in the board's format.
+        draws (iterable): Scraped results or export records; each needs
+            'draw' (or 'draw_number'), 'date', 'letter', and 'numbers'.
+
+    Returns:
+        int: Number of draws not previously in the archive.
+    """
+    with _ArchiveLock(path, exclusive=True):
+        tail, _, tail_rows = _read_tail(path)
+        pending = tail.get((board, lottery_name), {})
+        archive = DrawArchive(path, tail=False) if os.path.exists(path) else None
+        try:
+            lines = []
+            added = 0
+            for draw in draws:
+                number = draw.get("draw", draw.get("draw_number"))
+                if not str(number).strip().isdigit():
+                    continue
+                number = int(number)
+                parsed = parse_draw_date(draw.get("date", ""))
+                numbers = [n for n in draw.get("numbers", []) if str(n).isdigit() and int(n) < NO_NUMBER]
+                row = (parsed.toordinal() if parsed else 0, draw.get("letter", ""), tuple(int(n) for n in numbers))
+                current = pending[number] if number in pending else _stored_row(archive, board, lottery_name, number)
+                if current == row:
+                    continue
+                if current is None:
+                    added += 1
+                pending[number] = row
+                lines.append(json.dumps({"board": board, "lottery": lottery_name, "draw": number, "date": row[0],
+                                         "letter": row[1], "numbers": row[2], "pad": _number_pad(numbers)}))
+        finally:
+            if archive is not None:
+                archive.close()
+        if lines:
+            with open(_tail_path(path), "ab") as fp:
+                if fp.tell() and not _ends_with_newline(_tail_path(path)):
+                    fp.write(b"\n")  # finish a line cut short by a crashed writer
+                fp.write("".join(line + "\n" for line in lines).encode("utf-8"))
+                fp.flush()
+                os.fsync(fp.fileno())
+            if tail_rows + len(lines) >= COMPACT_ROWS:
+                _compact(path)
+        return added
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as fp:
+        fp.seek(-1, os.SEEK_END)
+        return fp.read(1) == b"\n"
+
+
+def sync_lottery(path, board, lottery_name, batch_size=500):
+    """Append draws newer than the archive's latest one, straight from the board.
+
+    Draws are written in batches so an interrupted sync keeps what it fetched.
+
+    Args:
+        path (str): Archive file path.
+        board (str): 'nlb' or 'dlb'.
+        lottery_name (str): Lottery name in the board's format.
+        batch_size (int): Draws fetched per append.
+
+    Returns:
+        int: Number of draws added.
+    """
+    latest = None
+    if os.path.exists(path):
+        with DrawArchive(path) as archive:
+            if archive.count(board, lottery_name):
+                latest = int(archive.columns(board, lottery_name)["draw"][-1])
+
+    added = 0
+    batch = []
+    for record in iter_draws(board, lottery_name, draw_from=latest + 1 if latest else None):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            added += append_draws(path, board, lottery_name, batch)
+            batch = []
+    if batch:
+        added += append_draws(path, board, lottery_name, batch)
+    return added
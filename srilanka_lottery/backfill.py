@@ -0,0 +1,367 @@
+"""Resumable backfill of the full draw history of every lottery.
+
+Each lottery is crawled on its own worker thread, newest draw first, while
+per-host rate limits keep the total request rate on each board polite. Draws
+are written in batches to an NDJSON/CSV file or a draw archive, and after
+every batch a checkpoint records how far each lottery got and how long the
+output file was. Running the same command again continues from the
+checkpoint: the output is cut back to the checkpointed length, dropping a
+batch written after the last checkpoint, then DLB restarts at the page it
+stopped on and NLB at the draw below the lowest one written.
+
+Usage:
+    python -m srilanka_lottery.backfill history.ndjson
+    python -m srilanka_lottery.backfill --archive draws.lkda --workers 8 --rate 2
+    python -m srilanka_lottery.backfill history.csv --lottery dlb:Jayoda --lottery nlb:govisetha
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from . import scraper, transport
+from ._lazy import LazyModule
+from .export import guess_format, iter_nlb_draws, make_record, write_draws
+from .parsepool import parse_pool
+from .scraper import (
+    DLB_LOTTERY_IDS,
+    iter_dlb_results,
+    scrape_dlb_lottery_names,
+    scrape_nlb_active_lottery_names,
+)
+
+requests = LazyModule("requests")
+
+DEFAULT_RATE = 2.0  # requests per second per board
+PROGRESS_INTERVAL = 5.0
+
+
+def discover_lotteries():
+    """List every lottery on both boards as (board, name) pairs.
+
+    NLB names are returned in URL form (e.g. 'mega-power'). DLB names come
+    from the website where possible, limited to lotteries with a known ID.
+
+    Returns:
+        list: (board, name) tuples.
+    """
+    lotteries = []
+    nlb, session = scrape_nlb_active_lottery_names()
+    session.close()
+    for name in nlb.get("NLB_Active", []):
+        lotteries.append(("nlb", name.lower().replace(" ", "-")))
+    dlb = scrape_dlb_lottery_names()
+    names = [name for name in dlb.get("DLB", []) if name in DLB_LOTTERY_IDS] or sorted(DLB_LOTTERY_IDS)
+    lotteries.extend(("dlb", name) for name in names)
+    return lotteries
+
+
+class Checkpoint:
+    """Per-lottery crawl state kept in a JSON file, replaced atomically.
+
+    Each lottery's entry holds 'written', 'lowest' (lowest draw written),
+    'page' (DLB page to resume from), 'done', and the last 'error'.
+    ``output_offset`` is the length of the output file when it was saved.
+
+    Args:
+        path (str): Checkpoint file; created on the first save.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lotteries = {}
+        self.output_offset = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fp:
+                saved = json.load(fp)
+            self.lotteries = saved["lotteries"]
+            self.output_offset = saved.get("output_offset")
+
+    @staticmethod
+    def key(board, name):
+        return f"{board}:{name}"
+
+    def state(self, board, name):
+        """Return the (mutable) state dict of one lottery."""
+        return self.lotteries.setdefault(self.key(board, name), {
+            "board": board, "lottery": name, "written": 0, "lowest": None, "page": 0, "done": False,
+        })
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump({"lotteries": self.lotteries, "output_offset": self.output_offset}, fp, indent=1)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+
+
+class BackfillSink:
+    """Writes batches of draws and advances the checkpoint after each one.
+
+    Writes are serialised, so the output never interleaves partial batches
+    and the checkpoint never runs ahead of what is on disk. A batch written
+    after the last checkpoint save (a crash in between) is cut off the output
+    when the sink is created, since the resumed crawl writes it again. The
+    archive needs no such step: it replaces draws by number.
+
+    Args:
+        checkpoint (Checkpoint): Crawl state to update.
+        output (str, optional): NDJSON or CSV file to append to.
+        fmt (str, optional): 'ndjson' or 'csv'; guessed from ``output`` if omitted.
+        archive (str, optional): Draw archive to add draws to.
+    """
+
+    def __init__(self, checkpoint, output=None, fmt=None, archive=None):
+        self.checkpoint = checkpoint
+        self.output = output
+        self.fmt = fmt or (guess_format(output) if output else None)
+        self.archive = archive
+        self.written = 0
+        self._lock = threading.Lock()
+        if output and self.fmt not in ("ndjson", "csv"):
+            raise ValueError(f"Backfill writes NDJSON or CSV incrementally, not {self.fmt}; "
+                             "use --archive or convert the file afterwards")
+        if output:
+            size = os.path.getsize(output) if os.path.exists(output) else 0
+            if checkpoint.output_offset is None:
+                checkpoint.output_offset = size
+            elif size > checkpoint.output_offset:
+                with open(output, "r+b") as fp:
+                    fp.truncate(checkpoint.output_offset)
+
+    def write(self, board, name, records, **progress):
+        """Write one batch of a lottery's draws and record its progress.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            name (str): Lottery name.
+            records (list): Export records, newest first.
+            **progress: Checkpoint fields to update (e.g. page, done).
+        """
+        with self._lock:
+            if records:
+                if self.output:
+                    write_draws(records, self.output, self.fmt, append=True)
+                    self.checkpoint.output_offset = os.path.getsize(self.output)
+                if self.archive:
+                    from .archive import append_draws
+                    append_draws(self.archive, board, name, records)
+            state = self.checkpoint.state(board, name)
+            state["written"] += len(records)
+            if records:
+                lowest = records[-1]["draw"]
+                state["lowest"] = lowest if state["lowest"] is None else min(state["lowest"], lowest)
+            state.update(progress)
+            state.pop("error", None)
+            self.written += len(records)
+            self.checkpoint.save()
+
+    def fail(self, board, name, error):
+        """Record why a lottery stopped, keeping its progress for the next run."""
+        with self._lock:
+            self.checkpoint.state(board, name)["error"] = error
+            self.checkpoint.save()
+
+
+def crawl_dlb(name, state, sink, batch_size, stop, parse_pool=None):
+    """Crawl one DLB lottery from its checkpointed page, one batch per page or so.
+
+    New draws only push older rows to later pages, so resuming at the saved
+    page never skips a row; rows at or above the lowest written draw are
+    skipped instead.
+    """
+    lowest = state["lowest"]
+    batch = []
+    batch_page = state["page"]
+    session = requests.Session()
+    try:
+        for page, row in iter_dlb_results(session, DLB_LOTTERY_IDS[name], start_page=state["page"],
+                                          parse_pool=parse_pool):
+            if stop.is_set():
+                break
+            if page != batch_page and len(batch) >= batch_size:
+                sink.write("dlb", name, batch, page=page)
+                batch = []
+            batch_page = page
+            draw = int(row["draw"])
+            if lowest is not None and draw >= lowest:
+                continue
+            batch.append(make_record("dlb", name, draw, row["date"], row["letter"], row["numbers"]))
+        else:
+            sink.write("dlb", name, batch, page=batch_page, done=True)
+            return
+        sink.write("dlb", name, batch, page=batch_page)
+    finally:
+        session.close()
+
+
+def crawl_nlb(name, state, sink, batch_size, stop, parse_pool=None):
+    """Crawl one NLB lottery downwards from below its lowest written draw."""
+    draw_to = state["lowest"] - 1 if state["lowest"] is not None else None
+    batch = []
+    for record in iter_nlb_draws(name, draw_to=draw_to, parse_pool=parse_pool):
+        if stop.is_set():
+            break
+        batch.append(record)
+        if len(batch) >= batch_size:
+            sink.write("nlb", name, batch)
+            batch = []
+    else:
+        sink.write("nlb", name, batch, done=True)
+        return
+    sink.write("nlb", name, batch)
+
+
+def _crawl(board, name, state, sink, batch_size, stop, parse_pool):
+    crawl = crawl_nlb if board == "nlb" else crawl_dlb
+    try:
+        crawl(name, state, sink, batch_size, stop, parse_pool)
+    except requests.RequestException as e:
+        sink.fail(board, name, f"Request failed: {e}")
+    except Exception as e:
+        sink.fail(board, name, f"Unexpected error: {e}")
+
+
+def _progress(sink, total, started, stop, stream):
+    while not stop.wait(PROGRESS_INTERVAL):
+        _print_progress(sink, total, started, stream)
+
+
+def _print_progress(sink, total, started, stream):
+    elapsed = time.monotonic() - started
+    done = sum(1 for state in sink.checkpoint.lotteries.values() if state["done"])
+    rate = sink.written / elapsed if elapsed else 0.0
+    print(f"[{elapsed:7.1f}s] {done}/{total} lotteries done, {sink.written} draws, "
+          f"{rate:.1f} draws/s", file=stream, flush=True)
+
+
+def run_backfill(output=None, fmt=None, archive=None, checkpoint_path=None, lotteries=None,
+                 workers=4, rate=DEFAULT_RATE, batch_size=50, progress=sys.stderr, stop=None,
+                 parse_workers=None):
+    """Backfill the draw history of many lotteries, resuming from a checkpoint.
+
+    Args:
+        output (str, optional): NDJSON or CSV file to append draws to.
+        fmt (str, optional): 'ndjson' or 'csv'; guessed from ``output`` if omitted.
+        archive (str, optional): Draw archive to add draws to.
+        checkpoint_path (str, optional): Defaults to ``<output or archive>.checkpoint.json``.
+        lotteries (list, optional): (board, name) pairs; every lottery on
+            both boards if omitted.
+        workers (int): Lotteries crawled at the same time.
+        rate (float or None): Requests per second allowed to each board.
+        batch_size (int): Draws per write and checkpoint.
+        progress (file or None): Stream for progress lines.
+        stop (threading.Event, optional): Set to stop after the current batches.
+        parse_workers (int, optional): Parse pages in this many worker
+            processes, shared by all lotteries, so parsing does not hold the
+            GIL while other lotteries download.
+
+    Returns:
+        dict: Summary with written, elapsed, draws_per_second, and the lists
+              done and pending; 'errors' maps lotteries that failed to why.
+    """
+    if not output and not archive:
+        raise ValueError("Backfill needs an output file or an archive")
+    checkpoint = Checkpoint(checkpoint_path or f"{output or archive}.checkpoint.json")
+    sink = BackfillSink(checkpoint, output, fmt, archive)
+    stop = stop or threading.Event()
+
+    hosts = {urlsplit(scraper.NLB_BASE_URL).netloc, urlsplit(scraper.DLB_BASE_URL).netloc}
+    for host in hosts:
+        transport.set_rate_limit(host, rate)
+    started = time.monotonic()
+    try:
+        lotteries = lotteries or discover_lotteries()
+        pending = [(board, name) for board, name in lotteries if not checkpoint.state(board, name)["done"]]
+        checkpoint.save()
+        reporter = None
+        if progress is not None:
+            reporter = threading.Thread(target=_progress, args=(sink, len(lotteries), started, stop, progress),
+                                        daemon=True)
+            reporter.start()
+        with contextlib.ExitStack() as stack:
+            parsers = stack.enter_context(parse_pool(parse_workers)) if parse_workers else None
+            pool = stack.enter_context(
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lottery-backfill"))
+            futures = [pool.submit(_crawl, board, name, checkpoint.state(board, name), sink, batch_size, stop,
+                                   parsers)
+                       for board, name in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                stop.set()
+                raise
+    finally:
+        for host in hosts:
+            transport.set_rate_limit(host, None)
+
+    stop.set()  # ends the progress reporter
+    if progress is not None:
+        _print_progress(sink, len(lotteries), started, progress)
+    elapsed = time.monotonic() - started
+    states = [checkpoint.state(board, name) for board, name in lotteries]
+    summary = {
+        "written": sink.written,
+        "elapsed": round(elapsed, 3),
+        "draws_per_second": round(sink.written / elapsed, 3) if elapsed else 0.0,
+        "done": [Checkpoint.key(s["board"], s["lottery"]) for s in states if s["done"]],
+        "pending": [Checkpoint.key(s["board"], s["lottery"]) for s in states if not s["done"]],
+    }
+    errors = {Checkpoint.key(s["board"], s["lottery"]): s["error"] for s in states if s.get("error")}
+    if errors:
+        summary["errors"] = errors
+    return summary
+
+
+def _lottery_arg(text):
+    board, sep, name = text.partition(":")
+    if not sep or board not in ("nlb", "dlb") or not name:
+        raise argparse.ArgumentTypeError("expected board:name, e.g. dlb:Jayoda or nlb:govisetha")
+    return board, name
+
+
+def main(argv=None):
+    """Command line entry point for ``python -m srilanka_lottery.backfill``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m srilanka_lottery.backfill",
+        description="Backfill the full draw history of every NLB and DLB lottery. "
+                    "Re-run the same command to resume.",
+    )
+    parser.add_argument("output", nargs="?", help="NDJSON or CSV file to append draws to")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Output format (default: from extension)")
+    parser.add_argument("--archive", help="Draw archive to add draws to")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--lottery", action="append", type=_lottery_arg, metavar="BOARD:NAME",
+                        help="Only these lotteries (repeatable); default: all")
+    parser.add_argument("--workers", type=int, default=4, help="Lotteries crawled in parallel")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requests per second per board")
+    parser.add_argument("--batch-size", type=int, default=50, help="Draws per write and checkpoint")
+    parser.add_argument("--parse-workers", type=int, help="Parse pages in this many worker processes")
+    parser.add_argument("--quiet", action="store_true", help="No progress lines")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_backfill(args.output, args.format, args.archive, args.checkpoint, args.lottery,
+                               args.workers, args.rate, args.batch_size,
+                               progress=None if args.quiet else sys.stderr,
+                               parse_workers=args.parse_workers)
+    except (ValueError, RuntimeError) as e:
+        summary = {"error": str(e)}
+    except KeyboardInterrupt:
+        summary = {"error": "Interrupted; re-run the same command to resume"}
+    print(json.dumps(summary))
+    return 1 if "error" in summary or summary.get("pending") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Disk-backed cache shared by every worker process on a host.
+
+Entries live in a SQLite database in WAL mode, so many processes can read
+while one writes, and every write is an atomic transaction. Each entry carries
+its own expiry time and the database is kept under a size bound by evicting
+expired entries first and least recently used ones after that.
+
+``get_or_compute`` adds single-flight: concurrent misses for the same key, in
+any process, wait on a lock while one caller fetches from upstream, then read
+the cached value. N workers therefore cost the boards about as much as one.
+A waiter gives up when the current deadline (see ``transport.deadline_scope``)
+runs out and computes the value itself, without storing it.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import transport
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-flight falls back to in-process locks
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+LOCK_SLOTS = 4096
+# Recording every read as an access would turn reads into writes; refresh the
+# LRU timestamp at most this often per entry instead.
+ACCESS_RESOLUTION = 60
+# How often a caller waiting on another's computation re-checks the key lock
+LOCK_POLL_INTERVAL = 0.02
+
+
+class SharedCache:
+    """JSON value cache stored in a SQLite file shared across processes.
+
+    Args:
+        path (str): SQLite database file. A ``.lock`` file is kept beside it.
+        max_bytes (int): Upper bound on the total size of stored values.
+
+    Example:
+        >>> cache = SharedCache("/tmp/lanka-lottery/cache.sqlite3")
+        >>> cache.get_or_compute("nlb:names", 3600, scrape_names)
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._thread_locks = [threading.Lock() for _ in range(LOCK_SLOTS)]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # POSIX record locks belong to the process and are all dropped when any
+        # descriptor of the file is closed, so one descriptor is kept open.
+        self._lock_file = open(path + ".lock", "a+b") if fcntl is not None else None
+        with _Transaction(self._connection()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " expires REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None if missing or expired."""
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        if now - row[2] > ACCESS_RESOLUTION:
+            try:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                pass  # LRU bookkeeping only; never fail a read over it
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        """Store a JSON-serialisable value for ``ttl`` seconds."""
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with _Transaction(self._connection()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, expires, size, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, now, now + ttl, len(data), now),
+            )
+            self._evict(conn, now)
+
+    def delete(self, key):
+        """Remove ``key`` from the cache."""
+        with _Transaction(self._connection()) as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, conn, now):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        """Return entry count, stored bytes, and the size bound."""
+        count, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def get_or_compute(self, key, ttl, compute, cache_if=None, fresh_if=None):
+        """Return the cached value for ``key``, computing it at most once per host.
+
+        Args:
+            key (str): Cache key.
+            ttl (float): Seconds to keep a computed value.
+            compute (callable): Called with no arguments on a miss.
+            cache_if (callable, optional): Predicate on the computed value;
+                values it rejects (e.g. error dicts) are returned but not stored.
+            fresh_if (callable, optional): Predicate on a stored value; values
+                it rejects are treated as missing and recomputed (once, under
+                the key's lock) before their TTL is up.
+
+        Returns:
+            The cached or freshly computed value. If the current deadline runs
+            out while another caller computes the key, ``compute()`` is called
+            without the lock and its value is not stored.
+        """
+        def lookup():
+            value = self.get(key)
+            return value if value is not None and (fresh_if is None or fresh_if(value)) else None
+
+        value = lookup()
+        if value is not None:
+            return value
+
+        slot = int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:4], "big") % LOCK_SLOTS
+        if not self._lock_slot(slot):
+            value = lookup()
+            return value if value is not None else compute()
+        try:
+            value = lookup()
+            if value is not None:
+                return value
+            value = compute()
+            if cache_if is None or cache_if(value):
+                self.set(key, value, ttl)
+            return value
+        finally:
+            _FileRangeLock(self._lock_file, slot).release()
+            self._thread_locks[slot].release()
+
+    def _lock_slot(self, slot):
+        """Take a key slot's thread and file locks; False if the deadline ran out first."""
+        thread_lock = self._thread_locks[slot]
+        file_lock = _FileRangeLock(self._lock_file, slot)
+        deadline = transport.current_deadline()
+        if deadline is None:
+            thread_lock.acquire()
+            file_lock.acquire()
+            return True
+        while True:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                return False
+            if thread_lock.acquire(timeout=min(LOCK_POLL_INTERVAL, remaining)):
+                if file_lock.acquire(blocking=False):
+                    return True
+                thread_lock.release()
+                time.sleep(min(LOCK_POLL_INTERVAL, deadline.remaining()))
+
+
+class _Transaction:
+    """Run a block inside ``BEGIN IMMEDIATE`` ... ``COMMIT`` on a connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class _FileRangeLock:
+    """Exclusive lock on one byte of a shared lock file (one byte per key slot)."""
+
+    def __init__(self, fp, slot):
+        self.fp = fp
+        self.slot = slot
+
+    def acquire(self, blocking=True):
+        """Take the lock; without ``blocking``, return False if another process holds it."""
+        if self.fp is not None:
+            try:
+                fcntl.lockf(self.fp, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, 1, self.slot)
+            except OSError:
+                if blocking:
+                    raise
+                return False
+        return True
+
+    def release(self):
+        if self.fp is not None:
+            fcntl.lockf(self.fp, fcntl.LOCK_UN, 1, self.slot)
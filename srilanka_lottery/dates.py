@@ -0,0 +1,42 @@
+"""Parsing of the draw dates shown by NLB and DLB.
+
+The boards print dates in several formats ('2025-05-01', '2025-May-01
+Thursday', 'Saturday November 22, 2025'). Delta watermarks, the page locator
+and the draw archive all compare draws by date, so they share one parser.
+"""
+
+import re
+from datetime import date
+
+_MONTHS = {name: index for index, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+
+def parse_draw_date(text):
+    """Parse the date formats shown by NLB and DLB.
+
+    Handles '2025-05-01', '2025-May-01 Thursday' and 'Saturday November 22, 2025'.
+
+    Args:
+        text (str): Date text from a scraped result.
+
+    Returns:
+        datetime.date or None: The parsed date, or None if unrecognised.
+    """
+    text = text or ""
+    try:
+        match = re.search(r"(\d{4})-(\d{1,2})-(\d{1,2})", text)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        match = re.search(r"(\d{4})-([A-Za-z]{3})[a-z]*-(\d{1,2})", text)
+        if match and match.group(2).lower() in _MONTHS:
+            return date(int(match.group(1)), _MONTHS[match.group(2).lower()], int(match.group(3)))
+        match = re.search(r"([A-Za-z]{3})[a-z]*\.?\s+(\d{1,2}),?\s+(\d{4})", text)
+        if match and match.group(1).lower() in _MONTHS:
+            return date(int(match.group(3)), _MONTHS[match.group(1).lower()], int(match.group(2)))
+        match = re.search(r"(\d{1,2})\s+([A-Za-z]{3})[a-z]*\.?,?\s+(\d{4})", text)
+        if match and match.group(2).lower() in _MONTHS:
+            return date(int(match.group(3)), _MONTHS[match.group(2).lower()], int(match.group(1)))
+    except ValueError:
+        pass
+    return None
@@ -0,0 +1,157 @@
+"""Inverted index from winning numbers and letters to draws.
+
+Questions like "when did 27 and 41 last come up together in Govisetha?" or
+"which draws had letter K?" would otherwise scan a lottery's whole history.
+``DrawIndex`` keeps, per lottery, one bitmap per number and per letter, with
+bit ``n`` set when draw ``n`` contains it. Bitmaps are Python ints, so an AND
+or OR query is a handful of big-integer operations over a few hundred bytes
+each and takes microseconds even for thousands of draws. Draw numbers are
+nearly contiguous, so a dense bitmap costs about one bit per draw per key.
+
+The index is updated incrementally: ``add`` skips draws it already holds, and
+``update_from_archive`` only reads draws newer than the ones indexed.
+
+Example:
+    >>> index = DrawIndex()
+    >>> index.update_from_archive("draws.lkda")
+    >>> index.search("nlb", "govisetha", numbers=[27, 41], limit=1)
+"""
+
+import threading
+
+from .archive import DrawArchive
+
+
+def _letter_key(letter):
+    return str(letter).strip().upper()
+
+
+class _LotteryIndex:
+    """Bitmaps and stored rows of one lottery."""
+
+    def __init__(self):
+        self.numbers = {}   # number -> bitmap of draws
+        self.letters = {}   # upper-case letter -> bitmap of draws
+        self.draws = 0      # bitmap of every indexed draw
+        self.rows = {}      # draw -> (date, letter, numbers as shown)
+
+    def add(self, draw, date, letter, numbers):
+        if draw in self.rows:
+            return False
+        bit = 1 << draw
+        self.draws |= bit
+        self.rows[draw] = (date, letter, tuple(numbers))
+        for number in {int(n) for n in numbers if str(n).strip().isdigit()}:
+            self.numbers[number] = self.numbers.get(number, 0) | bit
+        if letter:
+            key = _letter_key(letter)
+            self.letters[key] = self.letters.get(key, 0) | bit
+        return True
+
+
+class DrawIndex:
+    """Number and letter index over the draws of many lotteries.
+
+    Safe to share between threads: updates take a lock, and searches read
+    bitmaps that are replaced, never mutated, by updates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lotteries = {}
+
+    def add(self, board, lottery_name, draws):
+        """Index draws of one lottery; draws already indexed are skipped.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name in the board's format.
+            draws (iterable): Scraped results or export records with 'draw'
+                (or 'draw_number'), 'date', 'letter' and 'numbers'.
+
+        Returns:
+            int: Number of draws added.
+        """
+        added = 0
+        with self._lock:
+            lottery = self._lotteries.setdefault((board, lottery_name), _LotteryIndex())
+            for draw in draws:
+                number = str(draw.get("draw", draw.get("draw_number", ""))).strip()
+                if number.isdigit():
+                    added += lottery.add(int(number), draw.get("date", ""), draw.get("letter", ""),
+                                         [str(n) for n in draw.get("numbers", [])])
+        return added
+
+    def latest_draw(self, board, lottery_name):
+        """Return the highest indexed draw number of a lottery, or None."""
+        lottery = self._lotteries.get((board, lottery_name))
+        return lottery.draws.bit_length() - 1 if lottery and lottery.draws else None
+
+    def update_from_archive(self, path):
+        """Index draws from a draw archive that are newer than the indexed ones.
+
+        Args:
+            path (str): Draw archive file (see ``archive.DrawArchive``).
+
+        Returns:
+            int: Number of draws added.
+        """
+        added = 0
+        with DrawArchive(path) as archive:
+            for board, name in archive.lotteries():
+                latest = self.latest_draw(board, name)
+                records = archive.iter_records(board, name, draw_from=None if latest is None else latest + 1)
+                added += self.add(board, name, records)
+        return added
+
+    def search(self, board, lottery_name, numbers=(), letters=(), match="all", limit=10):
+        """Find draws containing the given numbers and letters, newest first.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name in the board's format.
+            numbers (iterable): Winning numbers to look for.
+            letters (iterable): Winning letters to look for (case-insensitive).
+            match (str): 'all' for draws containing every term, 'any' for
+                         draws containing at least one.
+            limit (int): Maximum number of draws to return.
+
+        Returns:
+            dict: 'matches' (total matching draws), 'draws' (up to ``limit``
+                  rows with draw, date, letter and numbers), 'indexed_draws',
+                  and 'first_draw'/'latest_draw' of the indexed range.
+
+        Raises:
+            ValueError: If there are no terms or ``match`` is not 'all' or 'any'.
+        """
+        if match not in ("all", "any"):
+            raise ValueError("match must be 'all' or 'any'")
+        numbers = [int(n) for n in numbers]
+        letters = [_letter_key(letter) for letter in letters]
+        if not numbers and not letters:
+            raise ValueError("Give at least one number or letter to search for")
+
+        lottery = self._lotteries.get((board, lottery_name)) or _LotteryIndex()
+        bitmaps = ([lottery.numbers.get(n, 0) for n in numbers]
+                   + [lottery.letters.get(letter, 0) for letter in letters])
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            if match == "all":
+                result &= bitmap
+            else:
+                result |= bitmap
+
+        draws = []
+        remaining = result
+        while remaining and len(draws) < limit:
+            draw = remaining.bit_length() - 1
+            remaining ^= 1 << draw
+            date, letter, row = lottery.rows[draw]
+            draws.append({"draw": str(draw), "date": date, "letter": letter, "numbers": list(row)})
+        return {
+            "matches": result.bit_count(),
+            "draws": draws,
+            "indexed_draws": len(lottery.rows),
+            "first_draw": str((lottery.draws & -lottery.draws).bit_length() - 1) if lottery.draws else None,
+            "latest_draw": str(lottery.draws.bit_length() - 1) if lottery.draws else None,
+        }
@@ -0,0 +1,415 @@
+"""Bulk export of lottery draw history.
+
+Draws are streamed from the board websites and written one row at a time, so
+memory stays flat no matter how many draws are exported.
+
+Usage:
+    python -m srilanka_lottery.export dlb "Ada Kotipathi" ada_kotipathi.ndjson
+    python -m srilanka_lottery.export nlb govisetha govisetha.csv --from 4000 --resume
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from . import scraper, transport
+from ._lazy import LazyModule
+from .parsepool import ordered_map, parse_pool as make_parse_pool
+from .scraper import (
+    DLB_LOTTERY_IDS,
+    find_dlb_page,
+    get_nlb_session,
+    iter_dlb_results,
+    parse_nlb_result_page,
+    parse_nlb_results_page,
+)
+
+requests = LazyModule("requests")
+
+FORMATS = ("ndjson", "csv", "parquet", "arrow")
+CSV_FIELDS = ["board", "lottery", "draw", "date", "letter", "numbers"]
+
+# NLB has no history pagination, so older draws are fetched one by one. Gaps
+# in draw numbering are skipped until this many misses come in a row.
+NLB_MAX_CONSECUTIVE_MISSES = 10
+
+
+def make_record(board, lottery_name, draw, date, letter, numbers):
+    """Build the flat record written by every export format.
+
+    Args:
+        board (str): 'nlb' or 'dlb'.
+        lottery_name (str): Lottery name as passed to the scraper.
+        draw (int or str): Draw number.
+        date (str): Draw date as shown by the board.
+        letter (str): Winning letter or sign, may be empty.
+        numbers (list): Winning numbers as strings.
+
+    Returns:
+        dict: Record with board, lottery, draw (int), date, letter, and numbers.
+    """
+    return {
+        "board": board,
+        "lottery": lottery_name,
+        "draw": int(draw),
+        "date": date,
+        "letter": letter,
+        "numbers": list(numbers),
+    }
+
+
+def iter_nlb_draws(lottery_name, draw_from=None, draw_to=None, parse_pool=None):
+    """Yield NLB draws newest first.
+
+    The results page gives the most recent draws; older ones are fetched by
+    draw number over a single shared session.
+
+    Args:
+        lottery_name (str): NLB lottery name (e.g., 'govisetha').
+        draw_from (int, optional): Lowest draw number to yield.
+        draw_to (int, optional): Highest draw number to yield.
+        parse_pool (Executor, optional): Parse draw pages on this executor
+            (see ``parsepool.parse_pool``) while later ones download.
+
+    Yields:
+        dict: Export records (see ``make_record``).
+
+    Raises:
+        requests.RequestException: If the board cannot be reached.
+    """
+    name = lottery_name.lower().replace(' ', '-')
+    lower = draw_from or 1
+    session = get_nlb_session()
+    try:
+        response = transport.request(session, "GET", f"{scraper.NLB_BASE_URL}/results/{name}", timeout=10)
+        response.raise_for_status()
+        rows = parse_nlb_results_page(response.text)
+        if not rows:
+            return
+
+        next_draw = None
+        for row in rows:
+            draw = int(row["draw"])
+            next_draw = draw - 1
+            if draw_to is not None and draw > draw_to:
+                continue
+            if draw < lower:
+                return
+            yield make_record("nlb", name, draw, row["date"], row["letter"], row["numbers"])
+
+        if draw_to is not None:
+            next_draw = min(next_draw, draw_to)
+
+        def pages():
+            for draw in range(next_draw, lower - 1, -1):
+                url = f"{scraper.NLB_BASE_URL}/results/{name}/{draw}"
+                page = transport.request(session, "GET", url, timeout=10)
+                if page.status_code == 404:
+                    yield draw, ""  # parses as a miss
+                    continue
+                page.raise_for_status()
+                yield draw, page.text
+
+        misses = 0
+        parsed = ordered_map(parse_nlb_result_page, pages(), parse_pool)
+        try:
+            for draw, result in parsed:
+                if "error" in result or not result.get("draw_number"):
+                    misses += 1
+                    if misses >= NLB_MAX_CONSECUTIVE_MISSES:
+                        return
+                else:
+                    misses = 0
+                    yield make_record("nlb", name, draw, result["date"], result["letter"], result["numbers"])
+        finally:
+            parsed.close()
+    finally:
+        session.close()
+
+
+def iter_dlb_draws(lottery_name, draw_from=None, draw_to=None, parse_pool=None):
+    """Yield DLB draws newest first, straight from the result pagination.
+
+    Args:
+        lottery_name (str): Exact DLB lottery name (e.g., 'Ada Kotipathi').
+        draw_from (int, optional): Lowest draw number to yield.
+        draw_to (int, optional): Highest draw number to yield.
+        parse_pool (Executor, optional): Parse result pages on this executor
+            (see ``parsepool.parse_pool``) while later pages download.
+
+    Yields:
+        dict: Export records (see ``make_record``).
+
+    Raises:
+        KeyError: If the lottery is not a known DLB lottery.
+        requests.RequestException: If a page request fails.
+    """
+    lottery_id = DLB_LOTTERY_IDS[lottery_name]
+    session = requests.Session()
+    try:
+        # Jump straight to the page holding draw_to (or the first older draw)
+        # rather than walking to it
+        start_page = 0
+        if draw_to is not None:
+            start_page = find_dlb_page(session, lottery_id, draw=draw_to, nearest=True)[0]
+        for _, row in iter_dlb_results(session, lottery_id, start_page=start_page, parse_pool=parse_pool):
+            draw = int(row["draw"])
+            if draw_to is not None and draw > draw_to:
+                continue
+            if draw_from is not None and draw < draw_from:
+                return
+            yield make_record("dlb", lottery_name, draw, row["date"], row["letter"], row["numbers"])
+    finally:
+        session.close()
+
+
+def iter_draws(board, lottery_name, draw_from=None, draw_to=None, parse_pool=None):
+    """Yield draws of one lottery newest first from the given board.
+
+    Args:
+        board (str): 'nlb' or 'dlb'.
+        lottery_name (str): Lottery name in the board's format.
+        draw_from (int, optional): Lowest draw number to yield.
+        draw_to (int, optional): Highest draw number to yield.
+        parse_pool (Executor, optional): Parse pages on this executor (see
+            ``parsepool.parse_pool``) while later pages download.
+
+    Yields:
+        dict: Export records (see ``make_record``).
+    """
+    if board == "nlb":
+        return iter_nlb_draws(lottery_name, draw_from, draw_to, parse_pool)
+    if board == "dlb":
+        return iter_dlb_draws(lottery_name, draw_from, draw_to, parse_pool)
+    raise ValueError(f"Unknown board {board!r}, expected 'nlb' or 'dlb'")
+
+
+def guess_format(path):
+    """Pick an export format from a file extension, defaulting to NDJSON."""
+    ext = os.path.splitext(path)[1].lower()
+    return {
+        ".csv": "csv",
+        ".parquet": "parquet",
+        ".arrow": "arrow",
+        ".feather": "arrow",
+    }.get(ext, "ndjson")
+
+
+def _write_ndjson(records, fp):
+    count = 0
+    for record in records:
+        fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        fp.flush()
+        count += 1
+    return count
+
+
+def _write_csv(records, fp, write_header):
+    writer = csv.DictWriter(fp, fieldnames=CSV_FIELDS)
+    if write_header:
+        writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(dict(record, numbers=" ".join(record["numbers"])))
+        fp.flush()
+        count += 1
+    return count
+
+
+def _write_columnar(records, path, fmt, batch_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"{fmt} export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("board", pa.string()),
+        ("lottery", pa.string()),
+        ("draw", pa.int64()),
+        ("date", pa.string()),
+        ("letter", pa.string()),
+        ("numbers", pa.list_(pa.string())),
+    ])
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    count = 0
+    batch = []
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+def write_draws(records, path, fmt=None, append=False, batch_size=500):
+    """Stream records to a file.
+
+    NDJSON and CSV rows are flushed as they arrive. Parquet and Arrow are
+    written in row groups of ``batch_size`` and need pyarrow.
+
+    Args:
+        records (iterable): Export records (see ``make_record``).
+        path (str): Output file path.
+        fmt (str, optional): One of ``FORMATS``; guessed from ``path`` if omitted.
+        append (bool): Append to an existing NDJSON/CSV file.
+        batch_size (int): Rows per columnar row group.
+
+    Returns:
+        int: Number of records written.
+    """
+    fmt = fmt or guess_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if fmt in ("parquet", "arrow"):
+        if append:
+            raise ValueError(f"{fmt} files cannot be appended to; export the remaining draw range to a new file")
+        return _write_columnar(records, path, fmt, batch_size)
+
+    has_content = append and os.path.exists(path) and os.path.getsize(path) > 0
+    with open(path, "a" if append else "w", encoding="utf-8", newline="") as fp:
+        if fmt == "csv":
+            return _write_csv(records, fp, write_header=not has_content)
+        return _write_ndjson(records, fp)
+
+
+def find_resume_point(path, fmt=None):
+    """Find the lowest draw already written to an NDJSON or CSV export.
+
+    Exports run newest first, so an interrupted file ends at its lowest draw.
+    A partially written last line is cut off so appending continues cleanly.
+
+    Args:
+        path (str): Existing export file.
+        fmt (str, optional): 'ndjson' or 'csv'; guessed from ``path`` if omitted.
+
+    Returns:
+        int or None: Lowest draw number in the file, or None if it has no rows.
+    """
+    fmt = fmt or guess_format(path)
+    if fmt not in ("ndjson", "csv"):
+        raise ValueError(f"Resume is only supported for NDJSON and CSV, not {fmt}")
+    if not os.path.exists(path):
+        return None
+
+    lowest = None
+    complete_size = 0
+    with open(path, "rb") as fp:
+        for index, line in enumerate(fp):
+            if not line.endswith(b"\n"):
+                break
+            complete_size += len(line)
+            text = line.decode("utf-8").strip()
+            if not text or (fmt == "csv" and index == 0):
+                continue
+            if fmt == "csv":
+                draw = int(next(csv.reader([text]))[CSV_FIELDS.index("draw")])
+            else:
+                draw = json.loads(text)["draw"]
+            lowest = draw if lowest is None else min(lowest, draw)
+
+    if complete_size < os.path.getsize(path):
+        with open(path, "r+b") as fp:
+            fp.truncate(complete_size)
+    return lowest
+
+
+def export_lottery(board, lottery_name, path, fmt=None, draw_from=None, draw_to=None, resume=False,
+                   archive=None, parse_workers=None):
+    """Export the draw history of one lottery to a file.
+
+    Args:
+        board (str): 'nlb' or 'dlb'.
+        lottery_name (str): Lottery name in the board's format.
+        path (str): Output file path.
+        fmt (str, optional): One of ``FORMATS``; guessed from ``path`` if omitted.
+        draw_from (int, optional): Lowest draw number to export.
+        draw_to (int, optional): Highest draw number to export.
+        resume (bool): Continue an interrupted NDJSON/CSV export below the
+            lowest draw already in ``path``.
+        archive (str, optional): Read draws from a local draw archive (see
+            ``srilanka_lottery.archive``) instead of the board website.
+        parse_workers (int, optional): Parse pages in this many worker
+            processes while later pages download.
+
+    Returns:
+        dict: Summary with path, format, and written count, plus 'error' if
+              the export stopped early. Re-run with ``resume=True`` to continue.
+    """
+    fmt = fmt or guess_format(path)
+    if archive is None and board == "dlb" and lottery_name not in DLB_LOTTERY_IDS:
+        return {"error": f"Lottery {lottery_name} not found in DLB lottery list."}
+
+    summary = {"path": path, "format": fmt, "written": 0}
+    if resume:
+        lowest = find_resume_point(path, fmt)
+        if lowest is not None:
+            draw_to = lowest - 1 if draw_to is None else min(draw_to, lowest - 1)
+            summary["resumed_below"] = lowest
+
+    def counted(records):
+        for record in records:
+            yield record
+            summary["written"] += 1
+            summary["last_draw"] = record["draw"]
+
+    try:
+        if archive is not None:
+            from .archive import DrawArchive
+            with DrawArchive(archive) as store:
+                records = store.iter_records(board, lottery_name, draw_from, draw_to)
+                write_draws(counted(records), path, fmt, append=resume)
+        elif parse_workers:
+            with make_parse_pool(parse_workers) as pool:
+                records = iter_draws(board, lottery_name, draw_from, draw_to, pool)
+                write_draws(counted(records), path, fmt, append=resume)
+        else:
+            records = iter_draws(board, lottery_name, draw_from, draw_to)
+            write_draws(counted(records), path, fmt, append=resume)
+    except requests.RequestException as e:
+        summary["error"] = f"Export stopped after {summary['written']} draws: {e}"
+    return summary
+
+
+def main(argv=None):
+    """Command line entry point for ``python -m srilanka_lottery.export``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m srilanka_lottery.export",
+        description="Export the draw history of an NLB or DLB lottery.",
+    )
+    parser.add_argument("board", choices=["nlb", "dlb"])
+    parser.add_argument("lottery", help="Lottery name, e.g. 'govisetha' or 'Ada Kotipathi'")
+    parser.add_argument("output", help="Output file (.ndjson, .csv, .parquet, .arrow)")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from extension)")
+    parser.add_argument("--from", dest="draw_from", type=int, help="Lowest draw number to export")
+    parser.add_argument("--to", dest="draw_to", type=int, help="Highest draw number to export")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted NDJSON/CSV export")
+    parser.add_argument("--archive", help="Read from a local draw archive instead of the website")
+    parser.add_argument("--parse-workers", type=int, help="Parse pages in this many worker processes")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = export_lottery(args.board, args.lottery, args.output, args.format,
+                                 args.draw_from, args.draw_to, args.resume, args.archive,
+                                 args.parse_workers)
+    except (ValueError, RuntimeError) as e:
+        summary = {"error": str(e)}
+    print(json.dumps(summary))
+    return 1 if "error" in summary else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
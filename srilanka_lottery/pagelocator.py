@@ -0,0 +1,138 @@
+"""Find the page of a newest-first result listing that holds a given draw.
+
+DLB lists a lottery's history through ``/result/pagination_re``, a fixed
+number of draws per page, newest first. Walking it from page 0 to an old draw
+costs one request per page. ``PageLocator`` instead probes pages by
+interpolation on draw number (or date): from the draws on a probed page it
+estimates how many pages away the target is, jumps there, and narrows to a
+binary search if the estimate keeps missing. The draw range of every probed
+page is remembered, so later lookups start from a close estimate and usually
+fetch just the target page.
+
+New draws shift every page by a row, so remembered ranges are only used as
+estimates; the page a lookup returns is always one fetched during the lookup.
+"""
+
+import math
+import threading
+
+from .dates import parse_draw_date
+
+MAX_PROBES = 40
+
+
+def _draw_key(row):
+    draw = str(row.get("draw", "")).strip()
+    return int(draw) if draw.isdigit() else None
+
+
+def _date_key(row):
+    day = parse_draw_date(row.get("date", ""))
+    return day.toordinal() if day else None
+
+
+class PageLocator:
+    """Locates draws in one lottery's paginated history, learning page ranges as it goes.
+
+    Safe to share between threads; concurrent lookups may probe the same
+    pages but never corrupt what has been learned.
+
+    Example:
+        >>> locator = PageLocator()
+        >>> page, rows = locator.locate(fetch_rows, draw=1050)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}  # page -> {"draw": (newest, oldest), "date": (newest, oldest), "rows": n}
+        self.page_size = None
+
+    def _observe(self, page, rows):
+        ranges = {"rows": len(rows)}
+        for kind, key in (("draw", _draw_key), ("date", _date_key)):
+            keys = [k for k in map(key, rows) if k is not None]
+            if keys:
+                ranges[kind] = (keys[0], keys[-1])
+        with self._lock:
+            self._pages[page] = ranges
+            self.page_size = max(len(rows), self.page_size or 0)
+
+    def _pages_away(self, newest, oldest, count, distance):
+        """Pages to move to cover ``distance`` key units, at this page's density."""
+        rows_per_unit = (count - 1) / (newest - oldest) if newest > oldest and count > 1 else 1.0
+        return max(1, math.ceil(distance * rows_per_unit / (self.page_size or count or 1)))
+
+    def _estimate(self, kind, target):
+        """First page to probe: from the remembered page nearest to the target, else page 0."""
+        with self._lock:
+            known = [(page, ranges[kind], ranges["rows"]) for page, ranges in self._pages.items() if kind in ranges]
+        if not known:
+            return 0
+        page, (newest, oldest), count = min(
+            known, key=lambda item: 0 if item[1][1] <= target <= item[1][0]
+            else min(abs(target - item[1][0]), abs(target - item[1][1])))
+        if target > newest:
+            return max(0, page - self._pages_away(newest, oldest, count, target - newest))
+        if target < oldest:
+            return page + self._pages_away(newest, oldest, count, oldest - target)
+        return page
+
+    def locate(self, fetch_page, draw=None, date=None, nearest=False):
+        """Find the page holding a draw number, or the draw on a date.
+
+        Args:
+            fetch_page (callable): ``fetch_page(page)`` returns that page's
+                rows (dicts with 'draw' and 'date'), newest first, and an
+                empty list past the last page.
+            draw (int, optional): Draw number to find.
+            date (datetime.date, optional): Draw date to find, if no ``draw``.
+            nearest (bool): If no page holds the target (it falls in a gap, or
+                outside the history), return the first page not known to be
+                wholly newer than it instead of None.
+
+        Returns:
+            tuple: ``(page, rows)`` of the page holding the target, or
+                   ``(None, None)`` if no page holds it; ``(page, None)`` with
+                   ``nearest``.
+
+        Raises:
+            ValueError: If neither ``draw`` nor ``date`` is given.
+        """
+        if draw is not None:
+            kind, key, target = "draw", _draw_key, int(draw)
+        elif date is not None:
+            kind, key, target = "date", _date_key, date.toordinal()
+        else:
+            raise ValueError("Give a draw number or a date to locate")
+
+        lo, hi = 0, None  # hi stays open until an empty page shows where history ends
+        probed = set()
+        guess = self._estimate(kind, target)
+        for _ in range(MAX_PROBES):
+            if hi is not None and lo > hi:
+                break
+            guess = max(lo, guess if hi is None else min(hi, guess))
+            if guess in probed:
+                guess = (lo + hi) // 2 if hi is not None else 2 * lo + 1
+            probed.add(guess)
+
+            rows = fetch_page(guess)
+            if not rows:
+                hi = guess - 1
+                guess = (lo + hi) // 2
+                continue
+            self._observe(guess, rows)
+            keys = [k for k in map(key, rows) if k is not None]
+            if not keys:
+                break
+            newest, oldest = keys[0], keys[-1]
+            if oldest <= target <= newest:
+                return guess, rows
+            if target > newest:
+                hi = guess - 1
+                guess -= self._pages_away(newest, oldest, len(rows), target - newest)
+            else:
+                lo = guess + 1
+                guess += self._pages_away(newest, oldest, len(rows), oldest - target)
+        # Every page before lo holds only draws newer than the target
+        return (lo if nearest else None), None
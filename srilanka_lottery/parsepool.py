@@ -0,0 +1,87 @@
+"""Parse downloaded pages on other cores while the network keeps fetching.
+
+BeautifulSoup parsing is CPU-bound, so in bulk crawls a single thread spends
+most of its time parsing while the connection sits idle. ``ordered_map`` keeps
+fetching in the calling thread and hands every page body to a process pool,
+with a bounded number of pages in flight so memory stays flat, and yields the
+parsed results in page order.
+
+Example:
+    >>> with parse_pool(4) as pool:
+    ...     for page, row in iter_dlb_results(session, 6, parse_pool=pool):
+    ...         ...
+"""
+
+import concurrent.futures
+import os
+from collections import deque
+
+
+def parse_pool(workers=None):
+    """Create an executor for page parsing.
+
+    Workers are started with ``spawn``, so forking a process that already runs
+    threads is never an issue. Set ``LOTTERY_PARSE_POOL=interpreter`` to use
+    an ``InterpreterPoolExecutor`` on Python 3.14+, which avoids pickling
+    between processes.
+
+    Args:
+        workers (int, optional): Number of workers; defaults to the CPU count.
+
+    Returns:
+        concurrent.futures.Executor: Use it as a context manager to shut it down.
+    """
+    import multiprocessing
+
+    workers = workers or os.cpu_count() or 2
+    interpreter_pool = getattr(concurrent.futures, "InterpreterPoolExecutor", None)
+    if os.environ.get("LOTTERY_PARSE_POOL") == "interpreter" and interpreter_pool is not None:
+        return interpreter_pool(max_workers=workers)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+
+
+def ordered_map(fn, items, executor=None, window=None):
+    """Apply ``fn`` to a stream of items on an executor, yielding in input order.
+
+    The next item is only pulled from ``items`` (typically a generator that
+    downloads a page) while fewer than ``window`` results are outstanding.
+    If pulling an item raises, the results already in flight are yielded
+    before the error propagates.
+
+    Args:
+        fn (callable): Picklable function of one argument, e.g. a page parser.
+        items (iterable): ``(key, argument)`` pairs.
+        executor (Executor, optional): Where to run ``fn``; None runs it
+            inline, one item at a time.
+        window (int, optional): Maximum results in flight; defaults to twice
+            the CPU count.
+
+    Yields:
+        tuple: ``(key, fn(argument))`` in the order of ``items``.
+    """
+    if executor is None:
+        for key, arg in items:
+            yield key, fn(arg)
+        return
+
+    window = window or 2 * (os.cpu_count() or 2)
+    pending = deque()
+    try:
+        try:
+            for key, arg in items:
+                pending.append((key, executor.submit(fn, arg)))
+                if len(pending) >= window:
+                    key, future = pending.popleft()
+                    yield key, future.result()
+        except Exception:
+            while pending:
+                key, future = pending.popleft()
+                yield key, future.result()
+            raise
+        while pending:
+            key, future = pending.popleft()
+            yield key, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
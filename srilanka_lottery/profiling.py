@@ -0,0 +1,353 @@
+"""Sampled profiling of live tool calls.
+
+A ``Profiler`` decides per call whether to profile it, from a sampling rate
+per tool (plus a default for every other tool). A sampled call gets:
+
+- a cProfile function profile, merged into the tool's totals;
+- stack samples taken every few milliseconds by a background thread and
+  folded into ``tool;caller;...;callee count`` lines, the input format of
+  flamegraph.pl, speedscope and inferno;
+- allocation stats from tracemalloc: net bytes retained and peak bytes.
+
+When every rate is 0 (the default) ``profiled`` costs one attribute check
+per call, and neither cProfile nor tracemalloc is loaded.
+
+Only one cProfile profiler can be active per process (Python 3.12+ makes
+this explicit), so if two sampled calls overlap the second one records only
+stack samples. For the same reason the function profile and the tracemalloc
+peak can include work done concurrently by other threads.
+
+Example:
+    >>> profiler = Profiler()
+    >>> profiler.configure(rate=0.05)                      # 5% of all calls
+    >>> profiler.configure(rate=1, tool="get_all_latest_results")
+    >>> @profiled(profiler)
+    ... def get_all_latest_results(): ...
+    >>> print(profiler.folded())
+"""
+
+import functools
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+
+
+def parse_rates(spec):
+    """Parse a ``LOTTERY_PROFILE`` value into ``(default_rate, {tool: rate})``.
+
+    Args:
+        spec (str): Comma-separated rates; a bare number is the default for
+                    every tool, ``tool=rate`` sets one tool, e.g.
+                    ``"0.01,get_all_latest_results=0.5"``.
+
+    Returns:
+        tuple: Default rate and a dict of per-tool rates.
+    """
+    default, rates = 0.0, {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        tool, _, rate = item.rpartition("=")
+        if tool:
+            rates[tool.strip()] = _check_rate(float(rate))
+        else:
+            default = _check_rate(float(rate))
+    return default, rates
+
+
+def _check_rate(rate):
+    if not 0 <= rate <= 1:
+        raise ValueError("Sampling rate must be between 0 and 1")
+    return rate
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}:{name}".replace(";", ":")
+
+
+class _ToolStats:
+    """Aggregated profile of one tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.sampled = 0
+        self.wall_total = 0.0
+        self.wall_max = 0.0
+        self.net_bytes_total = 0
+        self.peak_bytes_max = 0
+        self.traced = 0
+        self.stacks = Counter()
+        self.functions = None  # pstats.Stats, created on the first profiled call
+
+    def summary(self):
+        functions = []
+        if self.functions is not None:
+            rows = sorted(self.functions.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:TOP_FUNCTIONS]:
+                functions.append({"function": f"{filename}:{line}({name})", "calls": calls,
+                                  "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)})
+        return {
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "wall_ms": {
+                "mean": round(1000 * self.wall_total / self.sampled, 3) if self.sampled else 0.0,
+                "max": round(1000 * self.wall_max, 3),
+            },
+            "allocations": {
+                "calls": self.traced,
+                "net_bytes_mean": self.net_bytes_total // self.traced if self.traced else 0,
+                "peak_bytes_max": self.peak_bytes_max,
+            },
+            "stack_samples": sum(self.stacks.values()),
+            "functions": functions,
+        }
+
+
+class _SampledCall:
+    """Context manager that profiles one call on the current thread."""
+
+    def __init__(self, profiler, tool):
+        self.profiler = profiler
+        self.tool = tool
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.entry = None
+        self.cprofile = None
+        self.traced = False
+
+    def __enter__(self):
+        # Stack samples are cut at the frame that entered the call
+        self.entry = sys._getframe(1)
+        self.traced = self.profiler._start_tracing()
+        if self.traced:
+            import tracemalloc
+            self.trace_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self.cprofile = profile
+        except ValueError:  # another sampled call holds the profiler
+            pass
+        self.profiler._sampler_add(self)
+        self.started = time.perf_counter()
+        return self
+
+    def sample(self, frame):
+        stack = []
+        while frame is not None and frame is not self.entry:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if frame is not None:
+            stack.append(self.tool)
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.started
+        self.profiler._sampler_remove(self)
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        allocations = None
+        if self.traced:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = (current - self.trace_start, max(0, peak - self.trace_start))
+            self.profiler._stop_tracing()
+        self.profiler._record(self.tool, wall, self.cprofile, self.stacks, allocations)
+        return False
+
+
+class Profiler:
+    """Per-tool sampling profiler with aggregated, flame-graph-ready output.
+
+    Args:
+        rate (float): Default fraction of calls to profile, 0 to 1.
+        rates (dict, optional): Fractions for individual tools.
+        allocations (bool): Also trace allocations of sampled calls.
+        interval (float): Seconds between stack samples.
+    """
+
+    def __init__(self, rate=0.0, rates=None, allocations=True, interval=DEFAULT_INTERVAL):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._active = {}  # thread id -> _SampledCall
+        self._sampler = None
+        self._tracing = 0
+        self._owns_tracing = False
+        self.interval = interval
+        self.allocations = allocations
+        self.default_rate = 0.0
+        self.rates = {}
+        self.enabled = False
+        self.configure(rate=rate)
+        for tool, tool_rate in (rates or {}).items():
+            self.configure(rate=tool_rate, tool=tool)
+
+    def configure(self, rate=None, tool=None, allocations=None, interval=None):
+        """Change sampling settings; returns the new settings.
+
+        Args:
+            rate (float, optional): Fraction of calls to profile, 0 to 1.
+            tool (str, optional): Apply ``rate`` to this tool only; None sets
+                                  the default for all tools without their own rate.
+            allocations (bool, optional): Trace allocations of sampled calls.
+            interval (float, optional): Seconds between stack samples.
+        """
+        with self._lock:
+            if rate is not None:
+                rate = _check_rate(float(rate))
+                if tool is None:
+                    self.default_rate = rate
+                else:
+                    self.rates[tool] = rate
+            if allocations is not None:
+                self.allocations = bool(allocations)
+            if interval is not None:
+                if interval <= 0:
+                    raise ValueError("interval must be a positive number")
+                self.interval = float(interval)
+            self.enabled = self.default_rate > 0 or any(self.rates.values())
+            return self.settings()
+
+    def settings(self):
+        """Return the current sampling settings."""
+        return {"enabled": self.enabled, "default_rate": self.default_rate, "rates": dict(self.rates),
+                "allocations": self.allocations, "interval": self.interval}
+
+    def sample(self, tool):
+        """Return a context manager profiling this call of ``tool``, or None.
+
+        None means the call was not sampled: the rate draw failed, or the
+        thread is already inside a sampled call.
+        """
+        rate = self.rates.get(tool, self.default_rate)
+        sampled = rate > 0 and random.random() < rate and threading.get_ident() not in self._active
+        with self._lock:
+            self._stats.setdefault(tool, _ToolStats()).calls += 1
+        return _SampledCall(self, tool) if sampled else None
+
+    def _start_tracing(self):
+        if not self.allocations:
+            return False
+        import tracemalloc
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            elif self._tracing == 0:
+                self._owns_tracing = False  # someone else started it; leave it running
+            self._tracing += 1
+        return True
+
+    def _stop_tracing(self):
+        import tracemalloc
+        with self._lock:
+            self._tracing -= 1
+            if self._tracing == 0 and self._owns_tracing:
+                tracemalloc.stop()
+
+    def _sampler_add(self, call):
+        with self._lock:
+            self._active[call.thread_id] = call
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_stacks, name="lottery-profiler",
+                                                 daemon=True)
+                self._sampler.start()
+
+    def _sampler_remove(self, call):
+        with self._lock:
+            self._active.pop(call.thread_id, None)
+
+    def _sample_stacks(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                calls = list(self._active.values())
+                interval = self.interval
+            frames = sys._current_frames()
+            for call in calls:
+                frame = frames.get(call.thread_id)
+                if frame is not None:
+                    call.sample(frame)
+            del frames
+            time.sleep(interval)
+
+    def _record(self, tool, wall, cprofile, stacks, allocations):
+        functions = None
+        if cprofile is not None:
+            import pstats
+            functions = pstats.Stats(cprofile)
+        with self._lock:
+            stats = self._stats.setdefault(tool, _ToolStats())
+            stats.sampled += 1
+            stats.wall_total += wall
+            stats.wall_max = max(stats.wall_max, wall)
+            stats.stacks.update(stacks)
+            if allocations is not None:
+                stats.traced += 1
+                stats.net_bytes_total += allocations[0]
+                stats.peak_bytes_max = max(stats.peak_bytes_max, allocations[1])
+            if functions is not None:
+                if stats.functions is None:
+                    stats.functions = functions
+                else:
+                    stats.functions.add(functions)
+
+    def report(self):
+        """Return settings plus call counts, timings, allocations and top functions per tool."""
+        with self._lock:
+            tools = {tool: stats.summary() for tool, stats in sorted(self._stats.items())}
+            report = self.settings()
+        report["tools"] = tools
+        return report
+
+    def folded(self, tool=None):
+        """Return collected stack samples in folded format, one ``stack count`` per line.
+
+        Args:
+            tool (str, optional): Only this tool's stacks.
+        """
+        with self._lock:
+            lines = [f"{stack} {count}"
+                     for name, stats in sorted(self._stats.items()) if tool in (None, name)
+                     for stack, count in sorted(stats.stacks.items())]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self):
+        """Discard everything collected so far."""
+        with self._lock:
+            self._stats.clear()
+
+
+def profiled(profiler, name=None):
+    """Decorator profiling sampled calls of a function under ``name``.
+
+    Args:
+        profiler (Profiler): Profiler deciding which calls to sample.
+        name (str, optional): Tool name; defaults to the function name.
+    """
+    def decorate(fn):
+        tool = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            call = profiler.sample(tool)
+            if call is None:
+                return fn(*args, **kwargs)
+            with call:
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,325 @@
+"""Content-addressed store of raw upstream responses.
+
+With a store attached (``transport.set_raw_store`` or ``LOTTERY_RAW_STORE``),
+every successful response body is kept zlib-compressed under its SHA-256, and
+an index maps each request to its latest body together with the status,
+validators (ETag, Last-Modified) and fetch time. Requests are keyed by method,
+URL and form payload, so DLB's POSTs to one URL are told apart. Identical
+bodies are stored once. Every distinct body a request has returned stays
+indexed as a version: pages like DLB's page 0 or the NLB latest page shift
+with each new draw, and ``reparse`` reads all of their versions.
+
+Stored validators make later GETs conditional; a 304 is answered from the
+store. In replay mode ``transport.request`` answers from the store only and
+never touches the network, and ``reparse`` runs the current parsers over
+every stored page. Rebuilding history after a markup or parser change then
+costs CPU time instead of a new crawl.
+
+Usage:
+    LOTTERY_RAW_STORE=raw/ python -m srilanka_lottery.export nlb govisetha govisetha.ndjson
+    python -m srilanka_lottery.rawstore stats raw/
+    python -m srilanka_lottery.rawstore reparse raw/ history.ndjson
+    python -m srilanka_lottery.rawstore reparse raw/ --archive draws.lkda
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from urllib.parse import unquote, urlsplit
+
+
+class RawStore:
+    """Compressed, deduplicated store of upstream response bodies.
+
+    Args:
+        root (str): Directory holding ``index.sqlite3`` and ``objects/``.
+
+    Example:
+        >>> store = RawStore("/var/lib/lanka-lottery/raw")
+        >>> transport.set_raw_store(store)   # record every response
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " form TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " validated_at REAL NOT NULL)"
+        )
+        # One row per distinct body each request has returned
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS versions ("
+            " key TEXT NOT NULL,"
+            " method TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " form TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (key, digest))"
+        )
+        # Stores written before versions were kept have only the latest bodies
+        self._connection().execute(
+            "INSERT OR IGNORE INTO versions (key, method, url, form, digest, size, status, content_type, fetched_at)"
+            " SELECT key, method, url, form, digest, size, status, content_type, fetched_at FROM responses"
+        )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def request_key(method, url, data=None):
+        """Return the index key of a request: method, URL and sorted form fields."""
+        form = json.dumps(sorted((str(k), str(v)) for k, v in (data or {}).items()))
+        return hashlib.sha256(f"{method.upper()}\n{url}\n{form}".encode("utf-8")).hexdigest()
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def put(self, method, url, data, status, headers, body):
+        """Store a response body, point the request's index entry at it and add it as a version.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            data (dict or None): Form payload of a POST.
+            status (int): Response status.
+            headers (Mapping): Response headers.
+            body (bytes): Response body.
+
+        Returns:
+            str: SHA-256 digest of the body.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(zlib.compress(body, 6))
+            os.replace(tmp, path)
+
+        now = time.time()
+        key = self.request_key(method, url, data)
+        form = json.dumps({str(k): str(v) for k, v in (data or {}).items()}, sort_keys=True)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, method, url, form, digest, size, status,"
+                " content_type, etag, last_modified, fetched_at, validated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, form, digest, len(body), status,
+                 headers.get("Content-Type"), headers.get("ETag"), headers.get("Last-Modified"), now, now),
+            )
+            conn.execute(
+                "INSERT INTO versions (key, method, url, form, digest, size, status, content_type, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key, digest) DO UPDATE SET fetched_at = excluded.fetched_at",
+                (key, method.upper(), url, form, digest, len(body), status, headers.get("Content-Type"), now),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return digest
+
+    def lookup(self, method, url, data=None):
+        """Return the index entry for a request as a dict, or None."""
+        row = self._connection().execute(
+            "SELECT * FROM responses WHERE key = ?", (self.request_key(method, url, data),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def touch(self, method, url, data=None):
+        """Record that the upstream confirmed a stored body is still current."""
+        self._connection().execute(
+            "UPDATE responses SET validated_at = ? WHERE key = ?",
+            (time.time(), self.request_key(method, url, data)))
+
+    def read(self, digest):
+        """Return the decompressed body stored under ``digest``."""
+        with open(self._object_path(digest), "rb") as fp:
+            return zlib.decompress(fp.read())
+
+    def entries(self):
+        """Yield every stored version of every request as a dict, oldest fetch first.
+
+        Each has key, method, url, form, digest, size, status, content_type
+        and fetched_at.
+        """
+        for row in self._connection().execute("SELECT * FROM versions ORDER BY fetched_at"):
+            yield dict(row)
+
+    def stats(self):
+        """Return response, version and object counts with raw and compressed sizes."""
+        conn = self._connection()
+        responses = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        versions, raw = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM versions").fetchone()
+        objects = stored = 0
+        for directory, _, files in os.walk(self.objects):
+            for name in files:
+                objects += 1
+                stored += os.path.getsize(os.path.join(directory, name))
+        return {"responses": responses, "versions": versions, "objects": objects, "raw_bytes": raw,
+                "stored_bytes": stored}
+
+
+def _page_kind(entry):
+    """Classify a stored request by endpoint path."""
+    parts = [unquote(part) for part in urlsplit(entry["url"]).path.strip("/").split("/")]
+    if parts[0] == "results" and len(parts) == 2:
+        return "nlb_latest", parts[1]
+    if parts[0] == "results" and len(parts) == 3:
+        return "nlb_result", parts[1]
+    if parts == ["home", "popup"]:
+        return "dlb_result", None
+    if parts == ["result", "pagination_re"]:
+        return "dlb_page", None
+    return None, None
+
+
+def iter_parsed(store):
+    """Run the current parsers over every stored version of every results page, offline.
+
+    Args:
+        store (RawStore): Store to read.
+
+    Yields:
+        tuple: ``(entry, records)`` for every parseable page, where records
+               is a list of export records (see ``export.make_record``).
+    """
+    from .export import make_record
+    from .scraper import (
+        DLB_LOTTERY_IDS,
+        parse_dlb_result_page,
+        parse_dlb_results_page,
+        parse_nlb_result_page,
+        parse_nlb_results_page,
+    )
+
+    dlb_names = {str(lottery_id): name for name, lottery_id in DLB_LOTTERY_IDS.items()}
+    for entry in store.entries():
+        kind, lottery = _page_kind(entry)
+        if kind is None or entry["status"] != 200:
+            continue
+        html = store.read(entry["digest"]).decode("utf-8", errors="replace")
+        form = json.loads(entry["form"])
+        records = []
+        if kind == "nlb_latest":
+            records = [make_record("nlb", lottery, row["draw"], row["date"], row["letter"], row["numbers"])
+                       for row in parse_nlb_results_page(html) if row["draw"].isdigit()]
+        elif kind == "nlb_result":
+            result = parse_nlb_result_page(html)
+            if result.get("draw_number", "").isdigit():
+                records = [make_record("nlb", lottery, result["draw_number"], result["date"],
+                                       result["letter"], result["numbers"])]
+        elif kind == "dlb_page" and form.get("lotteryID") in dlb_names:
+            lottery = dlb_names[form["lotteryID"]]
+            records = [make_record("dlb", lottery, row["draw"], row["date"], row["letter"], row["numbers"])
+                       for row in parse_dlb_results_page(html)]
+        elif kind == "dlb_result" and form.get("lottery") in dlb_names:
+            lottery = dlb_names[form["lottery"]]
+            result = parse_dlb_result_page(html)
+            match = re.search(r"(\d+)\s*$", result["draw_info"])
+            draw = form.get("lotteryNo") or (match.group(1) if match else "")
+            if draw.isdigit() and result["numbers"]:
+                records = [make_record("dlb", lottery, draw, result["date_info"],
+                                       result["letter"], result["numbers"])]
+        yield entry, records
+
+
+def reparse(store):
+    """Rebuild draw records from every stored page without network access.
+
+    Every stored version of a page is read, so draws that have since moved
+    off page 0 are still found. A draw seen on several pages keeps the values
+    from the latest fetch.
+
+    Args:
+        store (RawStore): Store to read.
+
+    Returns:
+        list: Export records sorted by board and lottery, newest draw first.
+    """
+    draws = {}
+    for _, records in iter_parsed(store):
+        for record in records:
+            draws[(record["board"], record["lottery"], record["draw"])] = record
+    return sorted(draws.values(), key=lambda r: (r["board"], r["lottery"], -r["draw"]))
+
+
+def main(argv=None):
+    """Command line entry point for ``python -m srilanka_lottery.rawstore``."""
+    parser = argparse.ArgumentParser(
+        prog="python -m srilanka_lottery.rawstore",
+        description="Inspect a raw response store or re-parse it offline.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="Show store size")
+    stats.add_argument("store")
+    rebuild = commands.add_parser("reparse", help="Re-run the parsers over every stored page")
+    rebuild.add_argument("store")
+    rebuild.add_argument("output", nargs="?", help="Export file (.ndjson, .csv, .parquet, .arrow)")
+    rebuild.add_argument("--format", help="Output format (default: from extension)")
+    rebuild.add_argument("--archive", help="Also add the draws to this draw archive")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.store):
+        print(json.dumps({"error": f"No raw store at {args.store}"}))
+        return 1
+    store = RawStore(args.store)
+    if args.command == "stats":
+        print(json.dumps(store.stats()))
+        return 0
+
+    records = reparse(store)
+    summary = {"draws": len(records)}
+    try:
+        if args.output:
+            from .export import write_draws
+            summary["written"] = write_draws(records, args.output, args.format)
+        if args.archive:
+            from .archive import append_draws
+            lotteries = {}
+            for record in records:
+                lotteries.setdefault((record["board"], record["lottery"]), []).append(record)
+            summary["archived"] = sum(append_draws(args.archive, board, name, draws)
+                                      for (board, name), draws in lotteries.items())
+    except (ValueError, RuntimeError) as e:
+        summary["error"] = str(e)
+    print(json.dumps(summary))
+    return 1 if "error" in summary else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""In-process cache of finished tool responses, invalidated by draw data version.
+
+The hottest tool calls (latest Govisetha, Mega Power, Ada Kotipathi) return
+the same answer for minutes at a time, yet each call rebuilds the result dict
+and serializes it again. ``ResponseCache`` keeps the finished response, ready
+to send, under the tool name and its normalized arguments.
+
+Entries are tied to the data they were built from. Each lottery has a
+*scope* (e.g. ``"nlb:govisetha"``) with a version number, and ``bump`` is
+called when a new draw of that lottery is seen. That drops every entry built
+from the lottery, plus entries of scope ``"*"`` (answers covering every
+lottery), and nothing else. An entry built while its scope was being bumped is
+not stored, so a slow call cannot put back a stale answer. Entries also expire
+after their TTL, since upstream changes are only seen when something reads
+them.
+
+Example:
+    >>> cache = ResponseCache(max_entries=1024)
+    >>> token = cache.token("nlb:govisetha")
+    >>> cache.put(key, response, "nlb:govisetha", token, ttl=120, cost=0.004)
+    >>> cache.get(key)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+ALL = "*"
+
+
+class ResponseCache:
+    """LRU cache of ready-to-send responses with per-lottery versions.
+
+    Safe to share between threads.
+
+    Args:
+        max_entries (int): Number of responses to keep; 0 disables the cache.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, scope, expires, cost, size)
+        self._by_scope = {}            # scope -> set of keys
+        self._versions = {}            # scope -> version
+        self._epoch = 0                # bumped with every scope, for ALL
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0, "expired": 0,
+                       "stale_builds": 0, "saved_call_seconds": 0.0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def token(self, scope):
+        """Version of a scope, to pass to ``put`` for a response about to be built.
+
+        Args:
+            scope (str or None): Lottery scope, ``ALL``, or None for responses
+                that no draw can change (published results, lottery lists).
+        """
+        if scope is None:
+            return 0
+        with self._lock:
+            return self._epoch if scope == ALL else self._versions.get(scope, 0)
+
+    def get(self, key):
+        """Return the cached response for a key, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[2] <= now:
+                self._drop(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["saved_call_seconds"] += entry[3]
+            return entry[0]
+
+    def put(self, key, value, scope, token, ttl, cost=0.0, size=0):
+        """Store a response unless its scope changed while it was being built.
+
+        Args:
+            key (hashable): Tool name and normalized arguments.
+            value (object): The finished response.
+            scope (str or None): Scope the response was built from (see ``token``).
+            token (int): ``token(scope)`` taken before building the response.
+            ttl (float): Seconds the response stays valid.
+            cost (float): Seconds the call that built it took, upstream
+                fetches and waits included; added to ``saved_call_seconds``
+                on every hit.
+            size (int): Serialized size in bytes, for the stats.
+
+        Returns:
+            bool: True if the response was stored.
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            current = 0 if scope is None else self._epoch if scope == ALL else self._versions.get(scope, 0)
+            if current != token:
+                self._stats["stale_builds"] += 1
+                return False
+            self._drop(key)
+            self._entries[key] = (value, scope, time.monotonic() + ttl, cost, size)
+            self._by_scope.setdefault(scope, set()).add(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def bump(self, scope):
+        """Record that a scope's data changed and drop the responses built from it.
+
+        Args:
+            scope (str): Lottery scope, e.g. ``"dlb:Ada Kotipathi"``.
+
+        Returns:
+            int: Number of responses dropped.
+        """
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._epoch += 1
+            keys = self._by_scope.get(scope, set()) | self._by_scope.get(ALL, set())
+            for key in keys:
+                self._drop(key)
+            self._stats["invalidated"] += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """Drop every response and reset the stats; versions are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._by_scope.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+            self._stats["saved_call_seconds"] = 0.0
+
+    def stats(self):
+        """Return hit, miss and invalidation counts, size, and time saved.
+
+        Returns:
+            dict: Counters, plus 'entries', 'bytes', 'hit_rate' and
+                  'saved_call_seconds' (how long the calls that built the
+                  responses served from the cache took, upstream fetches included).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = sum(entry[4] for entry in self._entries.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["saved_call_seconds"] = round(stats["saved_call_seconds"], 6)
+        stats["max_entries"] = self.max_entries
+        return stats
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_scope.get(entry[1])
+            keys.discard(key)
+            if not keys:
+                del self._by_scope[entry[1]]
@@ -1,6 +1,127 @@
-import requests
-from bs4 import BeautifulSoup
+import contextvars
+import datetime
+import functools
+import itertools
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from . import transport
+from ._lazy import LazyModule
+from .dates import parse_draw_date
+from .parsepool import ordered_map
+from .streamparse import iter_dlb_rows, iter_nlb_rows, take_rows
+
+# Imported on first use to keep package import cheap (see _lazy.py)
+requests = LazyModule("requests")
+bs4 = LazyModule("bs4")
+
+# Board endpoints. Override them to point the scrapers at a mirror or at a
+# local fake upstream (see testing/load_test.py).
+NLB_BASE_URL = os.environ.get("LOTTERY_NLB_BASE_URL", "https://www.nlb.lk").rstrip("/")
+DLB_BASE_URL = os.environ.get("LOTTERY_DLB_BASE_URL", "https://www.dlb.lk").rstrip("/")
+
+DLB_LOTTERY_IDS = {
+    "Ada Kotipathi": 11,
+    "Jayoda": 6,
+    "Lagna Wasana": 2,
+    "Sasiri": 13,
+    "Shanida": 5,
+    "Super Ball": 3,
+    "Supiri Dhana Sampatha": 17,
+    "Jaya Sampatha": 8,
+    "Kapruka": 12
+}
+
+# Lookups that found nothing are remembered so that agents retrying them are
+# answered locally. TTLs in seconds by kind of miss: a draw that is not out yet
+# may appear any minute, a misspelled lottery name stays wrong.
+NEGATIVE_TTLS = {
+    "not_published": 60,
+    "no_draw": 60 * 60,
+    "unknown_lottery": 6 * 60 * 60,
+}
+
+
+class NegativeCache:
+    """In-process memory of misses, each with its own expiry.
+
+    Args:
+        max_entries (int): Oldest entries are dropped beyond this many.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the remembered error dict with 'retry_after' updated, or None."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            result, expires = item
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                del self._entries[key]
+                return None
+        return dict(result, retry_after=max(1, round(remaining)))
+
+    def set(self, key, result, ttl):
+        """Remember an error dict for ``ttl`` seconds."""
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+negative_cache = NegativeCache()
+
+# (board, lottery name) -> newest draw number seen on the board's latest
+# results, so a missing draw number can be told apart as not out yet or
+# never held
+newest_draws = {}
+
+
+def _note_newest_draw(lottery_key, rows):
+    draws = [int(row["draw"]) for row in rows if str(row.get("draw", "")).isdigit()]
+    if draws and max(draws) > newest_draws.get(lottery_key, -1):
+        newest_draws[lottery_key] = max(draws)
+
+
+def _miss_kind(draw_segment, lottery_key):
+    """Classify a draw/date lookup that found nothing.
+
+    A draw number above the lottery's newest known draw (or with none known
+    yet) is not published yet; one at or below it is a draw the board never
+    held, like a date in the past.
+    """
+    if draw_segment.isdigit():
+        newest = newest_draws.get(lottery_key)
+        return "no_draw" if newest is not None and int(draw_segment) <= newest else "not_published"
+    try:
+        day = datetime.date.fromisoformat(draw_segment)
+    except ValueError:
+        return "no_draw"
+    return "not_published" if day >= datetime.date.today() else "no_draw"
+
+
+def _remember_miss(key, kind, error):
+    ttl = NEGATIVE_TTLS[kind]
+    result = {"error": error, "retry_after": ttl}
+    negative_cache.set(key, result, ttl)
+    return result
+
 
 def extract_cookie_from_script(html_content):
     """Extract cookie name and value from JavaScript setCookie function.
@@ -17,106 +138,178 @@ def extract_cookie_from_script(html_content):
         return match.group(1), match.group(2)
     return None, None
 
+@transport.with_deadline
 def get_nlb_session():
     """Get session with required cookies for NLB scraping.
 
+    Args:
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
     Returns:
         requests.Session: Configured session with cookies.
     """
-    url = "https://www.nlb.lk/lotteries"
+    url = f"{NLB_BASE_URL}/lotteries"
     session = requests.Session()
     try:
-        initial_response = session.get(url, timeout=10)
+        initial_response = transport.request(session, "GET", url, timeout=10)
         initial_response.raise_for_status()
         cookie_name, cookie_value = extract_cookie_from_script(initial_response.text)
         if cookie_name and cookie_value:
-            session.cookies.set(cookie_name, cookie_value, domain="www.nlb.lk", path="/")
+            session.cookies.set(cookie_name, cookie_value, domain=urlsplit(NLB_BASE_URL).hostname, path="/")
         return session
     except Exception as e:
         print("Failed to set up session:", e)
         return session
 
-def scrape_nlb_result(lottery_name, draw_or_date):
+def parse_nlb_result_page(html):
+    """Parse a single-draw NLB result page.
+
+    Args:
+        html (str): HTML of https://www.nlb.lk/results/<lottery>/<draw or date>.
+
+    Returns:
+        dict: Draw number, date, letter, and numbers, or 'error' if the page
+              has no result block.
+    """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+
+    draw_block = soup.find('div', class_='lresult')
+    if not draw_block:
+        return {"error": "Result block not found"}
+
+    draw_number = draw_block.find('p', string=re.compile(r"Draw No"))
+    draw_date = draw_block.find('p', string=re.compile(r"Date:"))
+
+    draw_no = draw_number.get_text(strip=True).replace("Draw No.:", "").strip() if draw_number else ""
+    date = draw_date.get_text(strip=True).replace("Date:", "").strip() if draw_date else ""
+
+    number_tags = draw_block.select('ol.B li')
+    numbers = [li.text.strip() for li in number_tags if 'More' not in li.get('class', [])]
+    letter = ""
+    if number_tags:
+        for li in number_tags:
+            if 'Letter' in li.get('class', []):
+                letter = li.text.strip()
+                numbers.remove(letter)
+                break
+
+    return {
+        "draw_number": draw_no,
+        "date": date,
+        "letter": letter,
+        "numbers": numbers
+    }
+
+@transport.with_deadline
+def scrape_nlb_result(lottery_name, draw_or_date, session=None):
     """Fetch results from NLB using either draw number or date.
 
     Args:
         lottery_name (str): Name of the NLB lottery (e.g., 'mega-power').
         draw_or_date (int or str): Draw number (int) or date (str, YYYY-MM-DD).
+        session (requests.Session, optional): Session to reuse. It is left open
+            for the caller; a fresh session is created and closed otherwise.
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
 
     Returns:
         dict: Lottery result with draw number, date, letter, and numbers.
+              Misses (draw not published, no draw on that date, no such
+              result page) return 'error' and 'retry_after' seconds, and are
+              answered from ``negative_cache`` until then, as are lotteries
+              the latest-results page found unknown.
     """
-    session = get_nlb_session()
     draw_segment = str(draw_or_date).lower()
-    url = f"https://www.nlb.lk/results/{lottery_name.lower()}/{draw_segment}"
+    lottery_key = ("nlb", lottery_name.lower())
+    known_miss = negative_cache.get(lottery_key) or negative_cache.get(lottery_key + (draw_segment,))
+    if known_miss is not None:
+        return known_miss
+
+    owns_session = session is None
+    if owns_session:
+        session = get_nlb_session()
+    url = f"{NLB_BASE_URL}/results/{lottery_name.lower()}/{draw_segment}"
     try:
-        response = session.get(url, timeout=10)
+        response = transport.request(session, "GET", url, timeout=10)
+        if response.status_code == 404:
+            # Only the lottery's own page can tell an unknown lottery from a missing draw
+            return _remember_miss(lottery_key + (draw_segment,), _miss_kind(draw_segment, lottery_key),
+                                  f"No {lottery_name} result for {draw_or_date} on NLB")
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        draw_block = soup.find('div', class_='lresult')
-        if not draw_block:
-            return {"error": "Result block not found"}
-
-        draw_text = draw_block.find('h1')
-        draw_number = draw_block.find('p', string=re.compile(r"Draw No"))
-        draw_date = draw_block.find('p', string=re.compile(r"Date:"))
-
-        draw_info = draw_text.get_text(strip=True) if draw_text else "Draw info not found"
-        draw_no = draw_number.get_text(strip=True).replace("Draw No.:", "").strip() if draw_number else ""
-        date = draw_date.get_text(strip=True).replace("Date:", "").strip() if draw_date else ""
-
-        number_tags = draw_block.select('ol.B li')
-        numbers = [li.text.strip() for li in number_tags if 'More' not in li.get('class', [])]
-        letter = ""
-        if number_tags:
-            for li in number_tags:
-                if 'Letter' in li.get('class', []):
-                    letter = li.text.strip()
-                    numbers.remove(letter)
-                    break
-
-        return {
-            "draw_number": draw_no,
-            "date": date,
-            "letter": letter,
-            "numbers": numbers
-        }
+        result = parse_nlb_result_page(response.text)
+        if "error" in result:
+            return _remember_miss(lottery_key + (draw_segment,), _miss_kind(draw_segment, lottery_key),
+                                  result["error"])
+        return result
     except requests.RequestException as e:
         return {"error": f"Request failed: {e}"}
     except Exception as e:
         return {"error": f"Unexpected error: {e}"}
     finally:
-        session.close()
+        if owns_session:
+            session.close()
+
+def parse_dlb_result_page(html):
+    """Parse the DLB ``/home/popup`` result fragment for a single draw.
+
+    Args:
+        html (str): HTML fragment returned by the popup endpoint.
+
+    Returns:
+        dict: Draw info, date info, letter, numbers, and prize image URL.
+    """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+
+    draw_info_tag = soup.find('h2', class_='lot_m_re_heading')
+    draw_info = draw_info_tag.text.strip() if draw_info_tag else "Draw info not found"
+
+    date_info_tag = soup.find('h3', class_='lot_m_re_date')
+    date_info = date_info_tag.text.strip() if date_info_tag else "Date not found"
+
+    letter_tag = soup.find('h6', class_='eng_letter')
+    letter = letter_tag.text.strip() if letter_tag else ""
 
+    numbers = [tag.text.strip() for tag in soup.find_all('h6', class_='number_shanida number_circle')]
+
+    prize_img_tag = soup.select_one('#resultPo img')
+    prize_img_url = prize_img_tag['src'] if prize_img_tag else ""
+
+    return {
+        "draw_info": draw_info,
+        "date_info": date_info,
+        "letter": letter,
+        "numbers": numbers,
+        "prize_image": prize_img_url
+    }
+
+@transport.with_deadline
 def scrape_dlb_result(lottery_name, draw_or_date):
     """Fetch results from DLB using either draw number or date.
 
     Args:
         lottery_name (str): Name of the DLB lottery (e.g., 'Ada Kotipathi').
         draw_or_date (int or str): Draw number (int) or date (str, YYYY-MM-DD).
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
 
     Returns:
         dict: Lottery result with draw info, date, letter, numbers, and prize image URL.
+              An empty result (draw not published, no draw on that date)
+              returns 'error' and 'retry_after' seconds, and is answered from
+              ``negative_cache`` until then.
     """
-    dlb_lottery_ids = {
-        "Ada Kotipathi": 11,
-        "Jayoda": 6,
-        "Lagna Wasana": 2,
-        "Sasiri": 13,
-        "Shanida": 5,
-        "Super Ball": 3,
-        "Supiri Dhana Sampatha": 17,
-        "Jaya Sampatha": 8,
-        "Kapruka": 12
-    }
-
-    lottery_id = dlb_lottery_ids.get(lottery_name)
+    lottery_id = DLB_LOTTERY_IDS.get(lottery_name)
     if not lottery_id:
         return {"error": f"Lottery {lottery_name} not found in DLB lottery list."}
 
     draw_segment = str(draw_or_date).lower()
-    url = "https://www.dlb.lk/home/popup"
+    miss_key = ("dlb", lottery_name, draw_segment)
+    known_miss = negative_cache.get(miss_key)
+    if known_miss is not None:
+        return known_miss
+
+    url = f"{DLB_BASE_URL}/home/popup"
     payload = {
         "lottery": lottery_id,
         "lotteryNo": draw_segment if draw_segment.isdigit() else "",
@@ -128,60 +321,46 @@ def scrape_dlb_result(lottery_name, draw_or_date):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0",
         "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
         "X-Requested-With": "XMLHttpRequest",
-        "Referer": "https://www.dlb.lk/home/en"
+        "Referer": f"{DLB_BASE_URL}/home/en"
     }
 
     try:
-        response = requests.post(url, data=payload, headers=headers, timeout=10)
+        response = transport.request(None, "POST", url, data=payload, headers=headers, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        draw_info_tag = soup.find('h2', class_='lot_m_re_heading')
-        draw_info = draw_info_tag.text.strip() if draw_info_tag else "Draw info not found"
-
-        date_info_tag = soup.find('h3', class_='lot_m_re_date')
-        date_info = date_info_tag.text.strip() if date_info_tag else "Date not found"
-
-        letter_tag = soup.find('h6', class_='eng_letter')
-        letter = letter_tag.text.strip() if letter_tag else ""
-
-        numbers = [tag.text.strip() for tag in soup.find_all('h6', class_='number_shanida number_circle')]
-
-        prize_img_tag = soup.select_one('#resultPo img')
-        prize_img_url = prize_img_tag['src'] if prize_img_tag else ""
-
-        return {
-            "draw_info": draw_info,
-            "date_info": date_info,
-            "letter": letter,
-            "numbers": numbers,
-            "prize_image": prize_img_url
-        }
+        result = parse_dlb_result_page(response.text)
+        if not result["numbers"]:
+            return _remember_miss(miss_key, _miss_kind(draw_segment, miss_key[:2]), "Result not found")
+        return result
     except requests.RequestException as e:
         return {"error": f"Request failed: {e}"}
     except Exception as e:
         return {"error": f"Unexpected error: {e}"}
 
+@transport.with_deadline
 def scrape_dlb_lottery_names():
     """Scrape available lottery names from DLB website.
 
+    Args:
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
     Returns:
         dict: Dictionary with list of DLB lottery names or error message.
     """
-    url = "https://www.dlb.lk/lottery/en"
+    url = f"{DLB_BASE_URL}/lottery/en"
     session = requests.Session()
     try:
-        initial_response = session.get(url, timeout=10)
+        initial_response = transport.request(session, "GET", url, timeout=10)
         initial_response.raise_for_status()
         cookie_name, cookie_value = extract_cookie_from_script(initial_response.text)
         if cookie_name and cookie_value:
-            session.cookies.set(cookie_name, cookie_value, domain="www.dlb.lk", path="/")
-            response = session.get(url, timeout=10)
+            session.cookies.set(cookie_name, cookie_value, domain=urlsplit(DLB_BASE_URL).hostname, path="/")
+            response = transport.request(session, "GET", url, timeout=10)
             response.raise_for_status()
         else:
             response = initial_response
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         lottery_elements = soup.find_all('h2', class_='inner_heading_lot')
         lottery_names = [element.text.strip() for element in lottery_elements]
         return {"DLB": sorted(set(lottery_names))} if lottery_names else {"error": "No DLB lottery names found"}
@@ -190,26 +369,31 @@ def scrape_dlb_lottery_names():
     finally:
         session.close()
 
+@transport.with_deadline
 def scrape_nlb_active_lottery_names():
     """Scrape active lottery names from NLB website.
 
+    Args:
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
     Returns:
         tuple: Dictionary with list of active NLB lottery names or error message, and session.
     """
-    url = "https://www.nlb.lk/lotteries"
+    url = f"{NLB_BASE_URL}/lotteries"
     session = requests.Session()
     try:
-        initial_response = session.get(url, timeout=10)
+        initial_response = transport.request(session, "GET", url, timeout=10)
         initial_response.raise_for_status()
         cookie_name, cookie_value = extract_cookie_from_script(initial_response.text)
         if cookie_name and cookie_value:
-            session.cookies.set(cookie_name, cookie_value, domain="www.nlb.lk", path="/")
-            response = session.get(url, timeout=10)
+            session.cookies.set(cookie_name, cookie_value, domain=urlsplit(NLB_BASE_URL).hostname, path="/")
+            response = transport.request(session, "GET", url, timeout=10)
             response.raise_for_status()
         else:
             response = initial_response
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = bs4.BeautifulSoup(response.text, 'html.parser')
         active_section = soup.find('h1', string='Active Lotteries')
         if not active_section:
             return {"error": "Active Lotteries section not found"}, session
@@ -230,138 +414,597 @@ def scrape_nlb_active_lottery_names():
     except requests.RequestException as e:
         return {"error": f"Failed to scrape NLB: {str(e)}"}, session
 
-def scrape_nlb_latest_results(session, lottery_name, limit=5):
-    """Scrape the latest results for a given NLB lottery.
+def parse_nlb_results_page(html, until=None):
+    """Parse the draw rows of an NLB results page.
+
+    Args:
+        html (str): HTML of https://www.nlb.lk/results/<lottery>.
+        until (callable, optional): Stop after the first row for which
+            ``until(row)`` is true; that row is the last one returned.
+
+    Returns:
+        list: Result dicts with draw, date, letter, and numbers, newest first.
+    """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    results = []
+    for row in soup.select('table tbody tr'):
+        columns = row.find_all('td')
+        if len(columns) >= 2 and columns[0].find('b') is not None:
+            draw_block = columns[0]
+            draw_number = draw_block.find('b').text.strip()
+            draw_date = draw_block.get_text(separator=' ', strip=True).replace(draw_number, '').strip()
+
+            number_list = columns[1].select('ol.B li')
+            numbers = []
+            letter = ""
+            for li in number_list:
+                li_text = li.text.strip()
+                if "Letter" in li.get("class", []):
+                    letter = li_text
+                elif li_text.isdigit():
+                    numbers.append(li_text)
+
+            results.append({
+                "draw": draw_number,
+                "date": draw_date,
+                "letter": letter,
+                "numbers": numbers
+            })
+            if until is not None and until(results[-1]):
+                break
+    return results
+
+def fetch_nlb_latest_results(session, lottery_name, limit=5, until=None):
+    """Fetch and parse the latest results page of an NLB lottery.
+
+    Unlike ``scrape_nlb_latest_results`` this leaves the session open, so one
+    session can serve many lotteries. The page is parsed as it downloads, and
+    the connection is closed as soon as ``limit`` rows (or the ``until`` row)
+    have arrived.
 
     Args:
         session (requests.Session): Session with configured cookies.
+        lottery_name (str): NLB lottery name in URL form (e.g., 'mega-power').
+        limit (int or None): Maximum number of results to return; None for all.
+        until (callable, optional): Stop parsing after the first row for
+            which ``until(row)`` is true (see ``parse_nlb_results_page``).
+
+    Returns:
+        list: Result dicts with draw, date, letter, and numbers, newest first.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    url = f"{NLB_BASE_URL}/results/{lottery_name.lower()}"
+    response = transport.request(session, "GET", url, timeout=10, stream=True)
+    if not response.ok:
+        response.close()
+        response.raise_for_status()
+    rows = take_rows(iter_nlb_rows(transport.iter_text(response)), limit, until)
+    _note_newest_draw(("nlb", lottery_name.lower()), rows[:1])
+    return rows
+
+
+class Watermark:
+    """Predicate that is true for result rows a client already has.
+
+    A row is old when its draw number is at most ``since_draw``, or its date
+    is on or before ``since_date``. Module level so it can be pickled to a
+    parse pool.
+    """
+
+    def __init__(self, since_draw=None, since_date=None):
+        self.since_draw = since_draw
+        self.since_date = datetime.date.fromisoformat(since_date) if isinstance(since_date, str) else since_date
+
+    def __call__(self, row):
+        if self.since_draw is not None and row["draw"].isdigit() and int(row["draw"]) <= self.since_draw:
+            return True
+        if self.since_date is not None:
+            day = parse_draw_date(row["date"])
+            return day is not None and day <= self.since_date
+        return False
+
+
+def _delta(key, rows, seen, limit):
+    """Build a delta response from rows read newest first up to the watermark.
+
+    'watermark' is the newest draw on the board, whether new or not, so a
+    client can pass it back as ``since_draw`` next time.
+    """
+    new = list(itertools.takewhile(lambda row: not seen(row), rows))
+    result = {key: new[:limit], "changed": bool(new)}
+    if rows:
+        result["watermark"] = rows[0]["draw"]
+        result["watermark_date"] = rows[0]["date"]
+    if len(new) > limit or (new and len(new) == len(rows)):
+        # Cut by the limit, or the watermark was never reached
+        result["has_more"] = True
+    return result
+
+@transport.with_deadline
+def scrape_nlb_latest_results(session, lottery_name, limit=5, since_draw=None, since_date=None):
+    """Scrape the latest results for a given NLB lottery.
+
+    Args:
+        session (requests.Session or None): Session with configured cookies;
+            it is closed afterwards. None creates one, unless the lottery is
+            already known not to exist.
         lottery_name (str): Name of the NLB lottery.
         limit (int): Maximum number of results to return.
+        since_draw (int, optional): Only return draws newer than this one;
+            parsing stops at the first draw the client already has.
+        since_date (str, optional): Only return draws after this date (YYYY-MM-DD).
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
 
     Returns:
-        dict: Dictionary with list of results or error message.
+        dict: Dictionary with list of results or error message. With
+              ``since_draw`` or ``since_date`` it also has 'changed', and
+              'watermark'/'watermark_date' (the newest draw on the board);
+              'has_more' is added if there are new draws beyond ``limit`` or
+              beyond the page. An unknown lottery returns 'error' and
+              'retry_after' seconds, and is answered from ``negative_cache``
+              until then.
     """
-    url = f"https://www.nlb.lk/results/{lottery_name.lower()}"
+    lottery_key = ("nlb", lottery_name.lower())
+    known_miss = negative_cache.get(lottery_key)
+    if known_miss is not None:
+        if session is not None:
+            session.close()
+        return known_miss
+
+    if session is None:
+        session = get_nlb_session()
     try:
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        table_rows = soup.select('table tbody tr')
-        results = []
-
-        for row in table_rows[:limit]:
-            columns = row.find_all('td')
-            if len(columns) >= 2:
-                draw_block = columns[0]
-                draw_number = draw_block.find('b').text.strip()
-                draw_date = draw_block.get_text(separator=' ', strip=True).replace(draw_number, '').strip()
-
-                number_list = columns[1].select('ol.B li')
-                numbers = []
-                letter = ""
-                for li in number_list:
-                    li_text = li.text.strip()
-                    if "Letter" in li.get("class", []):
-                        letter = li_text
-                    elif li_text.isdigit():
-                        numbers.append(li_text)
-
-                results.append({
-                    "draw": draw_number,
-                    "date": draw_date,
-                    "letter": letter,
-                    "numbers": numbers
-                })
-
-        return {"NLB_Results": results}
+        if since_draw is None and since_date is None:
+            return {"NLB_Results": fetch_nlb_latest_results(session, lottery_name, limit)}
+        seen = Watermark(since_draw, since_date)
+        return _delta("NLB_Results", fetch_nlb_latest_results(session, lottery_name, None, seen), seen, limit)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return _remember_miss(lottery_key, "unknown_lottery", f"Lottery {lottery_name} not found on NLB")
+        return {"error": f"Failed to fetch NLB results: {str(e)}"}
     except requests.RequestException as e:
         return {"error": f"Failed to fetch NLB results: {str(e)}"}
     finally:
         session.close()
 
 
-def scrape_dlb_latest_results(lottery_name, limit=5):
-   
-    dlb_lottery_ids = {
-        "Ada Kotipathi": 11,
-        "Jayoda": 6,
-        "Lagna Wasana": 2,
-        "Sasiri": 13,
-        "Shanida": 5,
-        "Super Ball": 3,
-        "Supiri Dhana Sampatha": 17,
-        "Jaya Sampatha": 8,
-        "Kapruka": 12
+def parse_dlb_results_page(html, until=None):
+    """Parse the draw rows of one DLB ``/result/pagination_re`` page.
+
+    Args:
+        html (str): HTML fragment returned by the pagination endpoint.
+        until (callable, optional): Stop after the first row for which
+            ``until(row)`` is true; that row is the last one returned.
+
+    Returns:
+        list: Result dicts with draw, date, letter, and numbers, newest first.
+    """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    results = []
+    for row in soup.select("tr"):
+        columns = row.find_all("td")
+        if len(columns) >= 2:
+            draw_text = columns[0].get_text(strip=True)
+            match = re.match(r"(\d+)\s+\|\s+(.*)", draw_text)
+            if not match:
+                continue
+            draw_number, draw_date = match.groups()
+
+            items = columns[2].select("li") if len(columns) > 2 else []
+            numbers = [li.text.strip() for li in items if li.text.strip()]
+            letter = next((li.text.strip() for li in items if "res_eng_letter" in li.get("class", [])), "")
+            # Filter out non-numeric values
+            numbers = [n for n in numbers if n.isdigit()]
+
+            results.append({
+                "draw": draw_number,
+                "date": draw_date,
+                "letter": letter,
+                "numbers": numbers
+            })
+            if until is not None and until(results[-1]):
+                break
+    return results
+
+def _request_dlb_results_page(session, lottery_id, page, stream=False):
+    url = f"{DLB_BASE_URL}/result/pagination_re"
+    payload = {
+        "pageId": page,
+        "resultID": 14761,  # Verify if dynamic resultID is needed
+        "lotteryID": lottery_id,
+        "lastsegment": "en"
+    }
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": f"{DLB_BASE_URL}/result/en"
     }
+    response = transport.request(session, "POST", url, data=payload, headers=headers, timeout=10, stream=stream)
+    if not response.ok:
+        response.close()
+        response.raise_for_status()
+    return response
+
+def fetch_dlb_results_page(session, lottery_id, page):
+    """Fetch the raw HTML of one DLB results page.
+
+    Args:
+        session (requests.Session): Session used for the POST.
+        lottery_id (int): DLB lottery ID (see ``DLB_LOTTERY_IDS``).
+        page (int): Zero-based page index, newest draws on page 0.
+
+    Returns:
+        str: HTML fragment with the page's result rows.
 
-    lottery_id = dlb_lottery_ids.get(lottery_name)
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    return _request_dlb_results_page(session, lottery_id, page).text
+
+def stream_dlb_results_page(session, lottery_id, page):
+    """Yield the draw rows of one DLB results page as it downloads.
+
+    Closing the generator before the end closes the connection, so the rest
+    of the page is not read.
+
+    Args:
+        session (requests.Session): Session used for the POST.
+        lottery_id (int): DLB lottery ID (see ``DLB_LOTTERY_IDS``).
+        page (int): Zero-based page index, newest draws on page 0.
+
+    Yields:
+        dict: Result dicts with draw, date, letter, and numbers, newest first.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    response = _request_dlb_results_page(session, lottery_id, page, stream=True)
+    yield from iter_dlb_rows(transport.iter_text(response))
+
+def iter_dlb_results(session, lottery_id, start_page=0, max_pages=1000, parse_pool=None, window=None,
+                     until=None):
+    """Walk the DLB result pagination and yield draws as pages arrive.
+
+    Only a bounded number of pages is held in memory at a time, so the caller
+    decides how many draws to keep. Pagination stops early once the current
+    deadline runs out. Without a ``parse_pool`` each page is parsed as it
+    downloads, and a caller that stops iterating closes the connection
+    instead of reading the rest of the page.
+
+    Args:
+        session (requests.Session): Session used for the page requests.
+        lottery_id (int): DLB lottery ID (see ``DLB_LOTTERY_IDS``).
+        start_page (int): First page to fetch.
+        max_pages (int): Upper bound on the page index.
+        parse_pool (Executor, optional): Parse pages on this executor (see
+            ``parsepool.parse_pool``) while later pages download. Pages are
+            then fetched up to ``window`` ahead, so a few past the last one
+            may be requested.
+        window (int, optional): Pages in flight with a ``parse_pool``.
+        until (callable, optional): Stop after the first row for which
+            ``until(row)`` is true; that row is the last one yielded, and
+            the rest of its page is not parsed.
+
+    Yields:
+        tuple: ``(page, result)`` for every draw row, newest first.
+
+    Raises:
+        requests.RequestException: If a page request fails.
+    """
+    if parse_pool is None:
+        for page in range(start_page, max_pages):
+            if page > start_page and transport.deadline_expired():
+                return
+            empty = True
+            rows = stream_dlb_results_page(session, lottery_id, page)
+            try:
+                for row in rows:
+                    empty = False
+                    yield page, row
+                    if until is not None and until(row):
+                        return
+            finally:
+                rows.close()
+            if empty:
+                return
+        return
+
+    def pages():
+        for page in range(start_page, max_pages):
+            if page > start_page and transport.deadline_expired():
+                return
+            yield page, fetch_dlb_results_page(session, lottery_id, page)
+
+    parse = functools.partial(parse_dlb_results_page, until=until) if until is not None else parse_dlb_results_page
+    parsed = ordered_map(parse, pages(), parse_pool, window)
+    try:
+        for page, rows in parsed:
+            if not rows:
+                break
+            for row in rows:
+                yield page, row
+            if until is not None and until(rows[-1]):
+                break
+    finally:
+        parsed.close()
+
+
+# lottery_id -> PageLocator with the page ranges learned so far (see pagelocator.py)
+dlb_page_locators = {}
+_locators_lock = threading.Lock()
+
+
+def find_dlb_page(session, lottery_id, draw=None, date=None, nearest=False):
+    """Find the DLB results page holding a draw number, or the draw on a date.
+
+    Pages are probed by interpolation and binary search instead of walked
+    from page 0, so a lookup deep in the history takes a few requests.
+
+    Args:
+        session (requests.Session): Session used for the page requests.
+        lottery_id (int): DLB lottery ID (see ``DLB_LOTTERY_IDS``).
+        draw (int, optional): Draw number to find.
+        date (datetime.date, optional): Draw date to find, if no ``draw``.
+        nearest (bool): If the history has no such draw, return the first
+            page that may hold older draws (see ``PageLocator.locate``).
+
+    Returns:
+        tuple: ``(page, rows)`` of the page holding the draw, or
+               ``(None, None)`` if the history has no such draw;
+               ``(page, None)`` with ``nearest``.
+
+    Raises:
+        requests.RequestException: If a page request fails.
+    """
+    from .pagelocator import PageLocator
+
+    with _locators_lock:
+        locator = dlb_page_locators.setdefault(lottery_id, PageLocator())
+    return locator.locate(
+        lambda page: parse_dlb_results_page(fetch_dlb_results_page(session, lottery_id, page)),
+        draw=draw, date=date, nearest=nearest)
+
+
+def iter_dlb_pages_since(lottery_name, since_draw):
+    """Yield the DLB results pages holding the draws after ``since_draw``, oldest page first.
+
+    The walk starts at the page holding ``since_draw + 1`` (see
+    ``find_dlb_page``) and moves toward page 0, so a caller can act on the
+    oldest missing draws first. It stops once the current deadline runs out.
+
+    Args:
+        lottery_name (str): Exact name of the DLB lottery (e.g., 'Ada Kotipathi').
+        since_draw (int): Newest draw the caller already has.
+
+    Yields:
+        list: Each page's result dicts, newest first. Pages may also hold
+              draws up to ``since_draw``.
+
+    Raises:
+        KeyError: If the lottery is not a known DLB lottery.
+        requests.RequestException: If a page request fails.
+    """
+    lottery_id = DLB_LOTTERY_IDS[lottery_name]
+    session = requests.Session()
+    try:
+        start, rows = find_dlb_page(session, lottery_id, draw=since_draw + 1, nearest=True)
+        if start is None:
+            return
+        if rows is not None:
+            yield rows
+            start -= 1
+        for page in range(start, -1, -1):
+            if transport.deadline_expired():
+                return
+            yield parse_dlb_results_page(fetch_dlb_results_page(session, lottery_id, page))
+    finally:
+        session.close()
+
+
+@transport.with_deadline
+def locate_dlb_result(lottery_name, draw_or_date):
+    """Fetch a DLB result from the result pagination, by draw number or date.
+
+    Unlike ``scrape_dlb_result`` this reads the results listing, so it has no
+    prize image, but its page lookups are cached: repeated lookups in the same
+    part of the history usually cost one request.
+
+    Args:
+        lottery_name (str): Name of the DLB lottery (e.g., 'Ada Kotipathi').
+        draw_or_date (int or str): Draw number (int) or date (str, YYYY-MM-DD).
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
+    Returns:
+        dict: Draw, date, letter, numbers and the results page it was found
+              on, or 'error'.
+    """
+    lottery_id = DLB_LOTTERY_IDS.get(lottery_name)
     if not lottery_id:
         return {"error": f"Lottery {lottery_name} not found in DLB lottery list."}
 
-    url = "https://www.dlb.lk/result/pagination_re"
-    session = requests.Session()
-    results = []
-    page = 0
-    max_pages = 1000  # Large enough for ~1500 results
+    segment = str(draw_or_date).strip()
+    if segment.isdigit():
+        draw, day = int(segment), None
+    else:
+        draw, day = None, parse_draw_date(segment)
+        if day is None:
+            return {"error": "Give a draw number or a date in YYYY-MM-DD format"}
 
+    session = requests.Session()
     try:
-        while len(results) < limit and page < max_pages:
-            previous_length = len(results)
-            payload = {
-                "pageId": page,
-                "resultID": 14761,  # Verify if dynamic resultID is needed
-                "lotteryID": lottery_id,
-                "lastsegment": "en"
-            }
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0",
-                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-                "X-Requested-With": "XMLHttpRequest",
-                "Referer": "https://www.dlb.lk/result/en"
-            }
-
-            response = session.post(url, data=payload, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            rows = soup.select("tr")
+        page, rows = find_dlb_page(session, lottery_id, draw=draw, date=day)
+    except requests.RequestException as e:
+        return {"error": f"Failed to fetch DLB results: {str(e)}"}
+    finally:
+        session.close()
+    for row in rows or ():
+        if (row["draw"] == segment if draw is not None else parse_draw_date(row["date"]) == day):
+            return {**row, "page": page}
+    return {"error": "Result not found"}
 
-            if not rows:
-                #logging.info(f"No results found on page {page} for {lottery_name}")
+
+def _dlb_delta(session, lottery_id, limit, seen):
+    """Read DLB pages up to the client's watermark and build the delta response."""
+    rows = []
+    try:
+        for _, row in iter_dlb_results(session, lottery_id, until=seen):
+            rows.append(row)
+            if len(rows) > limit:
                 break
+    except requests.RequestException as e:
+        if not (rows and transport.deadline_expired()):
+            return {"error": f"Failed to fetch DLB results: {str(e)}"}
+    result = _delta("DLB_Results", rows, seen, limit)
+    if result.get("has_more") and len(rows) <= limit and transport.deadline_expired():
+        result["truncated"] = True
+    return result
 
-            for row in rows:
+
+@transport.with_deadline
+def scrape_dlb_latest_results(lottery_name, limit=5, since_draw=None, since_date=None):
+    """Scrape the latest results for a given DLB lottery.
+
+    Args:
+        lottery_name (str): Exact name of the DLB lottery (e.g., 'Ada Kotipathi').
+        limit (int): Maximum number of results to return.
+        since_draw (int, optional): Only return draws newer than this one;
+            pagination stops at the first draw the client already has.
+        since_date (str, optional): Only return draws after this date (YYYY-MM-DD).
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
+    Returns:
+        dict: Dictionary with list of results or error message. If the
+              deadline runs out after some pages were read, the results so far
+              are returned with 'truncated': True. With ``since_draw`` or
+              ``since_date`` it also has 'changed', 'watermark' and
+              'watermark_date' (see ``scrape_nlb_latest_results``).
+    """
+    lottery_id = DLB_LOTTERY_IDS.get(lottery_name)
+    if not lottery_id:
+        return {"error": f"Lottery {lottery_name} not found in DLB lottery list."}
+
+    session = requests.Session()
+    results = []
+
+    try:
+        if since_draw is not None or since_date is not None:
+            result = _dlb_delta(session, lottery_id, limit, Watermark(since_draw, since_date))
+            _note_newest_draw(("dlb", lottery_name), [{"draw": result.get("watermark", "")}])
+            return result
+
+        if limit > 0:
+            for _, row in iter_dlb_results(session, lottery_id):
+                results.append(row)
                 if len(results) >= limit:
                     break
-                columns = row.find_all("td")
-                if len(columns) >= 2:
-                    draw_text = columns[0].get_text(strip=True)
-                    match = re.match(r"(\d+)\s+\|\s+(.*)", draw_text)
-                    if not match:
-                        continue
-                    draw_number, draw_date = match.groups()
-
-                    numbers = [li.text.strip() for li in columns[2].select("li") if li.text.strip()]
-                    letter = next((li.text.strip() for li in columns[2].select("li.res_eng_letter")), "")
-                    # Filter out non-numeric values
-                    numbers = [n for n in numbers if n.isdigit()]
-
-                    results.append({
-                        "draw": draw_number,
-                        "date": draw_date,
-                        "letter": letter,
-                        "numbers": numbers
-                    })
-
-            if len(results) == previous_length:
-                #logging.info(f"No new results added on page {page} for {lottery_name}")
-                break
-
-            page += 1
+        _note_newest_draw(("dlb", lottery_name), results[:1])
 
-        #logging.info(f"Fetched {len(results)} results for {lottery_name}")
+        if len(results) < limit and transport.deadline_expired():
+            return {"DLB_Results": results, "truncated": True}
         return {"DLB_Results": results}
     except requests.RequestException as e:
-        #logging.error(f"Failed to fetch DLB results for {lottery_name}: {e}")
+        if results and transport.deadline_expired():
+            return {"DLB_Results": results, "truncated": True}
         return {"error": f"Failed to fetch DLB results: {str(e)}"}
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+def _widen_pool(session, size):
+    # Room for one kept-alive connection per worker thread
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _latest_row(board, lottery_name, fetch):
+    """Newest draw of one lottery as a table row; failures become an error row."""
+    try:
+        rows = fetch()
+    except requests.RequestException as e:
+        return {"board": board, "lottery": lottery_name, "error": f"Request failed: {e}"}
+    except Exception as e:
+        return {"board": board, "lottery": lottery_name, "error": f"Unexpected error: {e}"}
+    if not rows:
+        return {"board": board, "lottery": lottery_name, "error": "No results found"}
+    return {"board": board, "lottery": lottery_name, **rows[0]}
+
+def _first_dlb_row(session, lottery_id):
+    return [row for _, row in itertools.islice(iter_dlb_results(session, lottery_id), 1)]
+
+@transport.with_deadline
+def scrape_all_latest_results(max_workers=8):
+    """Fetch the newest draw of every active NLB and DLB lottery concurrently.
+
+    Both name lists are read first, then one request per lottery runs on a
+    thread pool. NLB requests share the cookie session from the name lookup
+    and DLB requests share one session, so connections are reused.
+
+    Args:
+        max_workers (int): Upper bound on concurrent upstream requests.
+        deadline (Deadline or float, optional): Time budget for the whole call,
+            shared by every request it makes. Inherited from the caller if omitted.
+
+    Returns:
+        dict: 'results', one row per lottery sorted by board and name, with
+              board, lottery, draw, date, letter, and numbers, or board,
+              lottery, and error if that lottery failed; 'failed', the number
+              of failed rows and name lists; 'board_errors' if a board's
+              lottery list could not be read. Or 'error' key if neither list
+              could be read.
+    """
+    def submit(fn, *args):
+        # Each task runs in a copy of this context so it keeps the deadline
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+
+    dlb_session = _widen_pool(requests.Session(), max_workers)
+    nlb_session = None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lottery-latest") as pool:
+            nlb_future = submit(scrape_nlb_active_lottery_names)
+            dlb_future = submit(scrape_dlb_lottery_names)
+            nlb_names, nlb_session = nlb_future.result()
+            dlb_names = dlb_future.result()
+
+            board_errors = {}
+            results = []
+            futures = []
+            if "error" in nlb_names:
+                board_errors["nlb"] = nlb_names["error"]
+            else:
+                _widen_pool(nlb_session, max_workers)
+                for name in nlb_names["NLB_Active"]:
+                    slug = name.lower().replace(" ", "-")
+                    futures.append(submit(_latest_row, "nlb", name,
+                                          functools.partial(fetch_nlb_latest_results, nlb_session, slug, 1)))
+            if "error" in dlb_names:
+                board_errors["dlb"] = dlb_names["error"]
+            else:
+                for name in dlb_names["DLB"]:
+                    lottery_id = DLB_LOTTERY_IDS.get(name)
+                    if lottery_id is None:
+                        results.append({"board": "dlb", "lottery": name,
+                                        "error": f"Lottery {name} not found in DLB lottery list."})
+                    else:
+                        futures.append(submit(_latest_row, "dlb", name,
+                                              functools.partial(_first_dlb_row, dlb_session, lottery_id)))
+
+            if len(board_errors) == 2:
+                return {"error": f"Failed to list lotteries: NLB: {board_errors['nlb']}; DLB: {board_errors['dlb']}"}
+            results.extend(future.result() for future in futures)
+            results.sort(key=lambda row: (row["board"], row["lottery"]))
+    finally:
+        dlb_session.close()
+        if nlb_session is not None:
+            nlb_session.close()
+
+    summary = {"results": results, "failed": sum(1 for row in results if "error" in row) + len(board_errors)}
+    if board_errors:
+        summary["board_errors"] = board_errors
+    return summary
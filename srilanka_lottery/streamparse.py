@@ -0,0 +1,247 @@
+"""Incremental parsing of NLB and DLB result tables.
+
+``parse_nlb_results_page`` and ``parse_dlb_results_page`` need the whole page
+before the first row comes out, but a caller asking for the latest 3 draws
+only needs the top of it. The parsers here are fed the body a chunk at a time
+(see ``transport.iter_text``) and yield each draw row as soon as its ``</tr>``
+arrives. Once the caller has the rows it needs, closing the generator closes
+the response, and the rest of the page is never downloaded.
+
+Rows come out exactly as the BeautifulSoup parsers build them. The parsers
+are built on ``html.parser``, so nothing extra is imported.
+
+Example:
+    >>> response = transport.request(session, "GET", url, stream=True)
+    >>> take_rows(iter_nlb_rows(transport.iter_text(response)), limit=3)
+"""
+
+import re
+from html.parser import HTMLParser
+
+_VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                        "source", "track", "wbr"})
+
+
+class _Cell:
+    """Text, first ``<b>`` and list items of one ``<td>``."""
+
+    __slots__ = ("strings", "bold", "items")
+
+    def __init__(self):
+        self.strings = []  # text nodes, in order
+        self.bold = None   # text of the first <b>, once it has started
+        self.items = []    # [classes, enclosing lists as (tag, classes), text pieces] per <li>
+
+
+class _TableRowParser(HTMLParser):
+    """Collects the cells of every ``<tr>``; completed rows wait in ``rows``.
+
+    Args:
+        tbody_only (bool): Only keep rows inside ``table tbody``.
+    """
+
+    def __init__(self, tbody_only=False):
+        super().__init__(convert_charrefs=True)
+        self.tbody_only = tbody_only
+        self.rows = []
+        self._tables = 0
+        self._tbodies = 0
+        self._row = None
+        self._cell = None
+        self._lists = []      # open <ol>/<ul> as (tag, classes)
+        self._items = []      # open <li> of the current cell
+        self._in_bold = False
+        self._text = []       # pieces of the text node being read; a chunk may end mid-node
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in _VOID_TAGS:
+            return
+        if tag == "table":
+            self._tables += 1
+        elif tag == "tbody":
+            self._tbodies += 1
+        elif tag == "tr":
+            self._end_row()
+            if not self.tbody_only or (self._tables and self._tbodies):
+                self._row = []
+        elif tag in ("td", "th"):
+            self._end_cell()
+            if tag == "td" and self._row is not None:
+                self._cell = _Cell()
+                self._row.append(self._cell)
+        elif tag in ("ol", "ul"):
+            self._lists.append((tag, _classes(attrs)))
+        elif tag == "li" and self._cell is not None:
+            item = [_classes(attrs), tuple(self._lists), []]
+            self._cell.items.append(item)
+            self._items.append(item)
+        elif tag == "b" and self._cell is not None and self._cell.bold is None:
+            self._cell.bold = []
+            self._in_bold = True
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == "table":
+            self._end_row()
+            self._tables = max(0, self._tables - 1)
+        elif tag == "tbody":
+            self._end_row()
+            self._tbodies = max(0, self._tbodies - 1)
+        elif tag == "tr":
+            self._end_row()
+        elif tag in ("td", "th"):
+            self._end_cell()
+        elif tag in ("ol", "ul"):
+            if self._lists:
+                self._lists.pop()
+        elif tag == "li":
+            if self._items:
+                self._items.pop()
+        elif tag == "b":
+            self._in_bold = False
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def close(self):
+        super().close()
+        self._end_row()
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text = []
+        self._cell.strings.append(data)
+        if self._in_bold:
+            self._cell.bold.append(data)
+        for item in self._items:
+            item[2].append(data)
+
+    def _end_cell(self):
+        self._flush_text()
+        self._cell = None
+        self._items = []
+        self._in_bold = False
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+
+def _classes(attrs):
+    return tuple((dict(attrs).get("class") or "").split())
+
+
+def _nlb_row(cells):
+    """Result dict of an NLB results table row, as in ``parse_nlb_results_page``."""
+    if len(cells) < 2 or cells[0].bold is None:
+        return None
+    draw_number = "".join(cells[0].bold).strip()
+    text = " ".join(s.strip() for s in cells[0].strings if s.strip())
+    numbers = []
+    letter = ""
+    for classes, lists, pieces in cells[1].items:
+        if not any(tag == "ol" and "B" in list_classes for tag, list_classes in lists):
+            continue
+        li_text = "".join(pieces).strip()
+        if "Letter" in classes:
+            letter = li_text
+        elif li_text.isdigit():
+            numbers.append(li_text)
+    return {"draw": draw_number, "date": text.replace(draw_number, "").strip(), "letter": letter,
+            "numbers": numbers}
+
+
+def _dlb_row(cells):
+    """Result dict of a DLB pagination row, as in ``parse_dlb_results_page``."""
+    if len(cells) < 2:
+        return None
+    match = re.match(r"(\d+)\s+\|\s+(.*)", "".join(s.strip() for s in cells[0].strings))
+    if not match:
+        return None
+    draw_number, draw_date = match.groups()
+    items = cells[2].items if len(cells) > 2 else []
+    texts = ["".join(pieces).strip() for _, _, pieces in items]
+    letter = next((text for (classes, _, _), text in zip(items, texts) if "res_eng_letter" in classes), "")
+    return {"draw": draw_number, "date": draw_date, "letter": letter,
+            "numbers": [text for text in texts if text.isdigit()]}
+
+
+def _iter_rows(chunks, build_row, tbody_only):
+    parser = _TableRowParser(tbody_only)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            rows, parser.rows = parser.rows, []
+            for cells in rows:
+                row = build_row(cells)
+                if row is not None:
+                    yield row
+        parser.close()
+        for cells in parser.rows:
+            row = build_row(cells)
+            if row is not None:
+                yield row
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def iter_nlb_rows(chunks):
+    """Yield the draw rows of an NLB results page as its HTML arrives.
+
+    Args:
+        chunks (iterable): Pieces of the page's HTML, e.g. ``transport.iter_text(response)``.
+            Closed when the generator is closed.
+
+    Yields:
+        dict: Result dicts with draw, date, letter, and numbers, newest first.
+    """
+    return _iter_rows(chunks, _nlb_row, tbody_only=True)
+
+
+def iter_dlb_rows(chunks):
+    """Yield the draw rows of a DLB ``/result/pagination_re`` page as its HTML arrives.
+
+    Args:
+        chunks (iterable): Pieces of the page's HTML. Closed when the
+            generator is closed.
+
+    Yields:
+        dict: Result dicts with draw, date, letter, and numbers, newest first.
+    """
+    return _iter_rows(chunks, _dlb_row, tbody_only=False)
+
+
+def take_rows(rows, limit=None, until=None):
+    """Collect rows from a row stream, then close it.
+
+    Args:
+        rows (generator): ``iter_nlb_rows`` or ``iter_dlb_rows``.
+        limit (int or None): Stop after this many rows; None for no limit.
+        until (callable, optional): Stop after the first row for which
+            ``until(row)`` is true; that row is the last one returned.
+
+    Returns:
+        list: The rows, newest first.
+    """
+    taken = []
+    try:
+        if limit is not None and limit <= 0:
+            return taken
+        for row in rows:
+            taken.append(row)
+            if (limit is not None and len(taken) >= limit) or (until is not None and until(row)):
+                break
+        return taken
+    finally:
+        rows.close()
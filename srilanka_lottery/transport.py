@@ -0,0 +1,534 @@
+"""HTTP request policy shared by every scraper call.
+
+All requests to nlb.lk and dlb.lk go through ``request()``, which adds:
+
+- retries with capped exponential backoff and full jitter for connection
+  errors, timeouts and retryable statuses (429/5xx). Every call we make is a
+  GET or one of DLB's read-only form POSTs, so retrying is always safe;
+- optional hedging: once a request has been outstanding longer than the
+  host's recent latency percentile, an identical request is sent and the
+  first answer wins;
+- per-host latency samples and counters (see ``get_metrics()``);
+- deadlines: inside ``deadline_scope()``, per-request timeouts shrink to the
+  remaining budget and no retry is started that could not finish in time.
+- optional per-host rate limits (``set_rate_limit()``) shared by all threads;
+- streamed bodies (``iter_text()``) for callers that stop reading early,
+  with counts of the bytes read and of responses closed before their end;
+- an optional raw response store (``set_raw_store()``, see ``rawstore.py``)
+  that records successful bodies, revalidates them with conditional GETs,
+  and in replay mode answers from disk without any network I/O. Streamed
+  bodies are recorded only once ``iter_text()`` has read them to the end.
+
+Configuration comes from ``DEFAULT_POLICY``, which reads these environment
+variables at import time: ``LOTTERY_HTTP_RETRIES``, ``LOTTERY_HTTP_BACKOFF``,
+``LOTTERY_HTTP_HEDGE`` (1 to enable) and ``LOTTERY_HTTP_HEDGE_PERCENTILE``.
+``LOTTERY_RAW_STORE`` names a raw store directory to record into, and
+``LOTTERY_RAW_REPLAY=1`` serves from it instead of the network.
+"""
+
+import codecs
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from ._lazy import LazyModule
+
+requests = LazyModule("requests")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+LATENCY_WINDOW = 200
+STREAM_CHUNK_SIZE = 8192
+
+
+class RequestPolicy:
+    """Retry and hedging settings for upstream requests.
+
+    Args:
+        retries (int): Extra attempts after the first one.
+        backoff (float): Base delay in seconds; attempt n waits up to
+            ``backoff * 2**n`` (full jitter), capped at ``max_backoff``.
+        max_backoff (float): Upper bound for a single backoff delay.
+        hedge (bool): Send a duplicate request for slow responses.
+        hedge_percentile (float): Latency percentile after which to hedge.
+        hedge_min_samples (int): Latency samples needed before hedging starts.
+        hedge_min_delay (float): Never hedge earlier than this many seconds.
+    """
+
+    def __init__(self, retries=2, backoff=0.5, max_backoff=8.0, hedge=False,
+                 hedge_percentile=95, hedge_min_samples=20, hedge_min_delay=0.5):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+
+    @classmethod
+    def from_env(cls):
+        """Build a policy from the LOTTERY_HTTP_* environment variables."""
+        return cls(
+            retries=int(os.environ.get("LOTTERY_HTTP_RETRIES", 2)),
+            backoff=float(os.environ.get("LOTTERY_HTTP_BACKOFF", 0.5)),
+            hedge=os.environ.get("LOTTERY_HTTP_HEDGE") == "1",
+            hedge_percentile=float(os.environ.get("LOTTERY_HTTP_HEDGE_PERCENTILE", 95)),
+        )
+
+    def backoff_delay(self, attempt):
+        """Return a jittered delay before retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+DEFAULT_POLICY = RequestPolicy.from_env()
+
+
+class Deadline:
+    """A point in time by which a whole operation must finish.
+
+    Args:
+        seconds (float): Time budget from now.
+    """
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def clamp(self, timeout):
+        """Shrink a per-request timeout to fit the remaining budget."""
+        remaining = self.remaining()
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) if part is not None else remaining for part in timeout)
+        return min(timeout, remaining)
+
+
+_current_deadline = contextvars.ContextVar("lottery_deadline", default=None)
+
+
+def current_deadline():
+    """Return the Deadline in effect for this context, or None."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Run a block under a deadline that every ``request()`` inside honours.
+
+    Nested scopes never extend an outer deadline; the earlier one wins.
+
+    Args:
+        deadline (Deadline, float or None): Deadline or budget in seconds.
+            None keeps whatever deadline is already in effect.
+
+    Yields:
+        Deadline or None: The deadline in effect inside the block.
+    """
+    if deadline is None:
+        yield current_deadline()
+        return
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    outer = current_deadline()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def with_deadline(func):
+    """Let a function take a ``deadline`` keyword (Deadline or seconds).
+
+    The function body runs inside ``deadline_scope(deadline)``, so all of its
+    upstream requests share the budget. Without the keyword it inherits the
+    caller's deadline, if any.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, deadline=None, **kwargs):
+        with deadline_scope(deadline):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def deadline_expired():
+    """Return True if a deadline is in effect and has run out."""
+    deadline = current_deadline()
+    return deadline is not None and deadline.expired
+
+_lock = threading.Lock()
+_latencies = {}
+_counters = {
+    "requests": 0,
+    "attempts": 0,
+    "retries": 0,
+    "failures": 0,
+    "hedges_sent": 0,
+    "hedges_won": 0,
+    "bytes_streamed": 0,
+    "streams_stopped_early": 0,
+}
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="lottery-hedge")
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def _record_latency(host, seconds):
+    with _lock:
+        _latencies.setdefault(host, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def _percentile(samples, percentile):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def hedge_delay(host, policy):
+    """Return seconds to wait before hedging a request to ``host``, or None."""
+    with _lock:
+        samples = list(_latencies.get(host, ()))
+    if len(samples) < policy.hedge_min_samples:
+        return None
+    return max(policy.hedge_min_delay, _percentile(samples, policy.hedge_percentile))
+
+
+def get_metrics():
+    """Return request counters and per-host latency percentiles (seconds).
+
+    Returns:
+        dict: Counters (requests, attempts, retries, failures, hedges_sent,
+              hedges_won, hedge_win_rate, bytes_streamed,
+              streams_stopped_early) and 'latency' per host.
+    """
+    with _lock:
+        counters = dict(_counters)
+        latencies = {host: list(samples) for host, samples in _latencies.items()}
+    counters["hedge_win_rate"] = (
+        counters["hedges_won"] / counters["hedges_sent"] if counters["hedges_sent"] else 0.0
+    )
+    counters["latency"] = {
+        host: {
+            "samples": len(samples),
+            "p50": _percentile(samples, 50),
+            "p95": _percentile(samples, 95),
+            "p99": _percentile(samples, 99),
+        }
+        for host, samples in latencies.items() if samples
+    }
+    return counters
+
+
+def reset_metrics():
+    """Clear counters and latency samples."""
+    with _lock:
+        _latencies.clear()
+        for name in _counters:
+            _counters[name] = 0
+
+
+class _TokenBucket:
+    """Allow ``rate`` requests per second on average, in bursts of ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+_rate_limits = {}
+
+
+def set_rate_limit(host, per_second, burst=1):
+    """Limit requests to a host, across all threads of this process.
+
+    Args:
+        host (str): Host and port as in the URL (e.g. 'www.dlb.lk').
+        per_second (float or None): Average request rate; None removes the limit.
+        burst (int): Requests allowed back to back after an idle period.
+    """
+    with _lock:
+        if per_second is None:
+            _rate_limits.pop(host, None)
+        else:
+            _rate_limits[host] = _TokenBucket(per_second, burst)
+
+
+def _throttle(host, deadline):
+    bucket = _rate_limits.get(host)
+    if bucket is None:
+        return
+    wait_for = bucket.reserve()
+    if deadline is not None and wait_for >= deadline.remaining():
+        _count("failures")
+        raise requests.Timeout(f"Deadline exceeded waiting for the {host} rate limit")
+    if wait_for:
+        time.sleep(wait_for)
+
+
+_raw_store = None
+_raw_replay = False
+_raw_store_loaded = False
+
+
+def set_raw_store(store, replay=False):
+    """Attach a raw response store to every upstream request.
+
+    Args:
+        store (rawstore.RawStore or None): Store to record into; None detaches.
+        replay (bool): Answer only from the store. A request with no stored
+            response fails with ``requests.ConnectionError``.
+    """
+    global _raw_store, _raw_replay, _raw_store_loaded
+    _raw_store, _raw_replay, _raw_store_loaded = store, replay, True
+
+
+def raw_store():
+    """Return the attached raw store, opening LOTTERY_RAW_STORE on first use."""
+    global _raw_store_loaded
+    if not _raw_store_loaded:
+        with _lock:
+            if not _raw_store_loaded:
+                path = os.environ.get("LOTTERY_RAW_STORE")
+                if path:
+                    from .rawstore import RawStore
+                    set_raw_store(RawStore(path), os.environ.get("LOTTERY_RAW_REPLAY") == "1")
+                _raw_store_loaded = True
+    return _raw_store
+
+
+def _stored_response(store, entry, url):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = "OK"
+    response.url = url
+    response._content = store.read(entry["digest"])
+    response.headers = requests.structures.CaseInsensitiveDict({
+        name: value for name, value in (
+            ("Content-Type", entry["content_type"]),
+            ("ETag", entry["etag"]),
+            ("Last-Modified", entry["last_modified"]),
+        ) if value
+    })
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content_consumed = True  # so iter_content() serves the stored body
+    return response
+
+
+def _conditional_headers(entry, kwargs):
+    validators = {}
+    if entry["etag"]:
+        validators["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        validators["If-Modified-Since"] = entry["last_modified"]
+    if not validators:
+        return kwargs
+    return dict(kwargs, headers=dict(kwargs.get("headers") or {}, **validators))
+
+
+def _record(store, entry, method, url, kwargs, response):
+    data = kwargs.get("data")
+    if response.status_code == 304 and entry is not None:
+        response.close()
+        store.touch(method, url, data)
+        return _stored_response(store, entry, url)
+    if response.status_code == 200:
+        put = functools.partial(store.put, method, url, data, response.status_code, response.headers)
+        if kwargs.get("stream"):
+            response._raw_store_put = put  # reading .content here would download the whole body
+        else:
+            put(response.content)
+    return response
+
+
+def iter_text(response, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the body of a ``stream=True`` response as decoded text chunks.
+
+    The response is closed when the body ends or the generator is closed, so
+    a caller that stops early drops the connection instead of reading the
+    rest of the body. With a raw store attached, the body is recorded if
+    every byte of it arrived, even when the caller stopped early; a body cut
+    short is not.
+
+    Args:
+        response (requests.Response): Response requested with ``stream=True``.
+        chunk_size (int): Bytes to read at a time.
+
+    Yields:
+        str: Pieces of the body, decoded with the response's charset
+             (UTF-8 if it has none).
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    put = getattr(response, "_raw_store_put", None)
+    body = [] if put is not None else None
+    finished = False
+    try:
+        for chunk in response.iter_content(chunk_size):
+            _count("bytes_streamed", len(chunk))
+            if body is not None:
+                body.append(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+        finished = True
+    finally:
+        if not finished:
+            _count("streams_stopped_early")
+        if body is not None and (finished or _body_received(response)):
+            put(b"".join(body))
+        response.close()
+
+
+def _body_received(response):
+    """Whether a streamed, unencoded body has been read to its Content-Length."""
+    return (not response.headers.get("Content-Encoding")
+            and getattr(response.raw, "length_remaining", None) == 0)
+
+
+def _send(session, method, url, kwargs):
+    started = time.monotonic()
+    if session is None:
+        response = requests.request(method, url, **kwargs)
+    else:
+        response = session.request(method, url, **kwargs)
+    _record_latency(urlsplit(url).netloc, time.monotonic() - started)
+    return response
+
+
+def _discard(future):
+    # Close the losing response so its connection returns to the pool
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _send_hedged(session, method, url, kwargs, delay):
+    primary = _hedge_pool.submit(_send, session, method, url, kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    _count("hedges_sent")
+    hedge = _hedge_pool.submit(_send, session, method, url, kwargs)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _count("hedges_won")
+                for other in (done | pending) - {future}:
+                    other.add_done_callback(_discard)
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def request(session, method, url, policy=None, **kwargs):
+    """Send an HTTP request with retries and optional hedging.
+
+    Args:
+        session (requests.Session or None): Session to send on; None uses a
+            one-off connection like ``requests.request``.
+        method (str): 'GET' or 'POST'. Only idempotent or read-only requests
+            may go through here, since they can be sent more than once.
+        url (str): Request URL.
+        policy (RequestPolicy, optional): Defaults to ``DEFAULT_POLICY``.
+        **kwargs: Passed to ``requests`` (data, headers, timeout, ...).
+
+    Returns:
+        requests.Response: The final response. Non-retryable error statuses
+        are returned as-is for the caller's ``raise_for_status()``.
+
+    Raises:
+        requests.RequestException: If every attempt failed.
+        requests.Timeout: If the current deadline ran out.
+        requests.ConnectionError: In raw store replay mode, if nothing is
+            stored for the request.
+    """
+    policy = policy or DEFAULT_POLICY
+    store = raw_store()
+    entry = store.lookup(method, url, kwargs.get("data")) if store is not None else None
+    if _raw_replay and store is not None:
+        if entry is None:
+            raise requests.ConnectionError(f"No stored response for {method} {url} (raw store replay)")
+        return _stored_response(store, entry, url)
+    if entry is not None and method.upper() == "GET":
+        kwargs = _conditional_headers(entry, kwargs)
+
+    deadline = current_deadline()
+    host = urlsplit(url).netloc
+    _count("requests")
+    attempt = 0
+    while True:
+        if deadline is not None and deadline.expired:
+            _count("failures")
+            raise requests.Timeout(f"Deadline exceeded before requesting {url}")
+        _throttle(host, deadline)
+        if deadline is not None:
+            kwargs = dict(kwargs, timeout=deadline.clamp(kwargs.get("timeout")))
+        _count("attempts")
+        delay = hedge_delay(host, policy) if policy.hedge else None
+        try:
+            if delay is None:
+                response = _send(session, method, url, kwargs)
+            else:
+                response = _send_hedged(session, method, url, kwargs, delay)
+        except (requests.ConnectionError, requests.Timeout):
+            pause = policy.backoff_delay(attempt)
+            if attempt >= policy.retries or (deadline is not None and pause >= deadline.remaining()):
+                _count("failures")
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                if store is not None:
+                    return _record(store, entry, method, url, kwargs, response)
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                pause = min(policy.max_backoff, int(retry_after))
+            else:
+                pause = policy.backoff_delay(attempt)
+            if attempt >= policy.retries or (deadline is not None and pause >= deadline.remaining()):
+                _count("failures")
+                return response
+            response.close()
+        _count("retries")
+        time.sleep(pause)
+        attempt += 1
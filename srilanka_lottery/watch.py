@@ -0,0 +1,96 @@
+"""Background polling of a lottery's latest draw.
+
+One ``DrawWatcher`` per lottery polls the board and reports only when a new
+draw number shows up, so any number of interested clients cost a single
+upstream poller.
+"""
+
+import asyncio
+import random
+
+
+def latest_draw_number(result):
+    """Return the newest draw number in a latest-results dict, or None.
+
+    Args:
+        result (dict): Output of ``scrape_nlb_latest_results`` or
+            ``scrape_dlb_latest_results``.
+
+    Returns:
+        str or None: Draw number of the first result row.
+    """
+    rows = result.get("NLB_Results") or result.get("DLB_Results") or []
+    return rows[0].get("draw") if rows else None
+
+
+def _is_newer(draw, previous):
+    if str(draw).isdigit() and str(previous).isdigit():
+        return int(draw) > int(previous)
+    return draw != previous
+
+
+class DrawWatcher:
+    """Poll a lottery's latest result and call back when its draw number changes.
+
+    Args:
+        fetch_latest (callable): Blocking function returning a latest-results
+            dict; it runs in a worker thread.
+        on_new_draw (callable): Coroutine function called with the result dict
+            whenever a draw number newer than the last seen one appears.
+        interval (float): Seconds between polls.
+        jitter (float): Fraction of ``interval`` to randomise each sleep by, so
+            watchers started together do not poll in lockstep.
+    """
+
+    def __init__(self, fetch_latest, on_new_draw, interval=120, jitter=0.1):
+        self.fetch_latest = fetch_latest
+        self.on_new_draw = on_new_draw
+        self.interval = interval
+        self.jitter = jitter
+        self.latest = None
+        self.draw = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start polling on the running event loop."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop polling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll(self):
+        """Fetch once and notify if a new draw appeared.
+
+        Returns:
+            bool: True if ``on_new_draw`` was called.
+        """
+        result = await asyncio.to_thread(self.fetch_latest)
+        draw = latest_draw_number(result)
+        if draw is None:
+            return False  # upstream error or empty page; keep the last good value
+        previous = self.draw
+        self.latest = result
+        self.draw = draw
+        if previous is not None and _is_newer(draw, previous):
+            await self.on_new_draw(result)
+            return True
+        return False
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass  # a failed poll is retried on the next tick
+            spread = self.interval * self.jitter
+            await asyncio.sleep(self.interval + random.uniform(-spread, spread))
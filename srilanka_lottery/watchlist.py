@@ -0,0 +1,297 @@
+"""Watchlists of ticket numbers, checked incrementally as draws come in.
+
+Tickets are stored per lottery in SQLite together with an inverted index
+from each of their numbers (and their letter) to the ticket. Each lottery has
+a watermark, the newest draw evaluated so far. ``ingest`` evaluates only
+draws past the watermark, and for each one asks the index for the tickets
+sharing at least one number or the letter. The cost of a new draw therefore
+depends on how many tickets it touches, not on tickets times draws, and a
+draw is never evaluated twice. Matches are stored as hit events that
+``hits`` reads back. The watermark only moves through draws that were
+evaluated: when the input skips draws after it (e.g. only the newest draw was
+read), ``ingest`` stops at the gap until a read covering it is passed with
+``complete=True``.
+
+A ticket is only checked against draws newer than the lottery's latest draw
+when it was added, so adding a ticket never re-scans history.
+
+Example:
+    >>> watchlist = Watchlist("/var/lib/lanka-lottery/watchlist.sqlite3")
+    >>> watchlist.add("family", "nlb", "govisetha", [13, 25, 29, 51], letter="T", after_draw=4263)
+    >>> watchlist.ingest("nlb", "govisetha", scrape_nlb_latest_results(None, "govisetha", 5)["NLB_Results"])
+    >>> watchlist.hits("family", since_draw=4263)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _numbers(values):
+    """Distinct numeric entries of a result or ticket as ints."""
+    return sorted({int(str(n).strip()) for n in values if str(n).strip().isdigit()})
+
+
+class Watchlist:
+    """Ticket watchlists with incremental, indexed matching of new draws.
+
+    Args:
+        path (str): SQLite database file, shared safely by several processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(
+            "CREATE TABLE IF NOT EXISTS tickets ("
+            " id INTEGER PRIMARY KEY,"
+            " watchlist TEXT NOT NULL,"
+            " board TEXT NOT NULL,"
+            " lottery TEXT NOT NULL,"
+            " numbers TEXT NOT NULL,"
+            " letter TEXT NOT NULL,"
+            " min_matches INTEGER NOT NULL,"
+            " after_draw INTEGER NOT NULL,"
+            " created REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS tickets_by_watchlist ON tickets (watchlist);"
+            "CREATE INDEX IF NOT EXISTS tickets_by_letter ON tickets (board, lottery, letter);"
+            "CREATE TABLE IF NOT EXISTS ticket_numbers ("
+            " board TEXT NOT NULL,"
+            " lottery TEXT NOT NULL,"
+            " number INTEGER NOT NULL,"
+            " ticket INTEGER NOT NULL,"
+            " PRIMARY KEY (board, lottery, number, ticket)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " board TEXT NOT NULL,"
+            " lottery TEXT NOT NULL,"
+            " draw INTEGER NOT NULL,"
+            " PRIMARY KEY (board, lottery));"
+            "CREATE TABLE IF NOT EXISTS hits ("
+            " ticket INTEGER NOT NULL,"
+            " watchlist TEXT NOT NULL,"
+            " board TEXT NOT NULL,"
+            " lottery TEXT NOT NULL,"
+            " draw INTEGER NOT NULL,"
+            " date TEXT NOT NULL,"
+            " letter TEXT NOT NULL,"
+            " numbers TEXT NOT NULL,"
+            " matched TEXT NOT NULL,"
+            " letter_match INTEGER NOT NULL,"
+            " PRIMARY KEY (ticket, draw));"
+            "CREATE INDEX IF NOT EXISTS hits_by_watchlist ON hits (watchlist, draw);"
+        )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add(self, watchlist, board, lottery_name, numbers, letter="", min_matches=1, after_draw=None):
+        """Register a ticket; it is checked against draws after ``after_draw``.
+
+        Args:
+            watchlist (str): Name of the watchlist (e.g. a user or family).
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name in the board's format.
+            numbers (list): Ticket numbers.
+            letter (str, optional): Ticket letter.
+            min_matches (int): Numbers that must be drawn for a hit; a
+                               matching letter is always a hit.
+            after_draw (int, optional): Newest draw the ticket is not checked
+                against; defaults to the lottery's watermark.
+
+        Returns:
+            dict: The stored ticket.
+
+        Raises:
+            ValueError: If the ticket has no numbers or ``min_matches`` is out of range.
+        """
+        numbers = _numbers(numbers)
+        if not numbers:
+            raise ValueError("A ticket needs at least one number")
+        if not 1 <= min_matches <= len(numbers):
+            raise ValueError("min_matches must be between 1 and the number of ticket numbers")
+        letter = (letter or "").strip().upper()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if after_draw is None:
+                after_draw = self.watermark(board, lottery_name) or 0
+            cursor = conn.execute(
+                "INSERT INTO tickets (watchlist, board, lottery, numbers, letter, min_matches, after_draw, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (watchlist, board, lottery_name, json.dumps(numbers), letter, min_matches, int(after_draw),
+                 time.time()))
+            ticket = cursor.lastrowid
+            conn.executemany("INSERT INTO ticket_numbers (board, lottery, number, ticket) VALUES (?, ?, ?, ?)",
+                             [(board, lottery_name, number, ticket) for number in numbers])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {"ticket": ticket, "board": board, "lottery": lottery_name, "numbers": numbers,
+                "letter": letter, "min_matches": min_matches, "after_draw": int(after_draw)}
+
+    def remove(self, watchlist, ticket):
+        """Delete a ticket and its hits; returns False if the watchlist has no such ticket."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT board, lottery FROM tickets WHERE id = ? AND watchlist = ?",
+                               (ticket, watchlist)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM ticket_numbers WHERE board = ? AND lottery = ? AND ticket = ?",
+                             (row["board"], row["lottery"], ticket))
+                conn.execute("DELETE FROM tickets WHERE id = ?", (ticket,))
+                conn.execute("DELETE FROM hits WHERE ticket = ?", (ticket,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def tickets(self, watchlist):
+        """Return the tickets of a watchlist, oldest first."""
+        rows = self._connection().execute(
+            "SELECT * FROM tickets WHERE watchlist = ? ORDER BY id", (watchlist,)).fetchall()
+        return [{"ticket": row["id"], "board": row["board"], "lottery": row["lottery"],
+                 "numbers": json.loads(row["numbers"]), "letter": row["letter"],
+                 "min_matches": row["min_matches"], "after_draw": row["after_draw"]} for row in rows]
+
+    def lotteries(self, watchlist=None):
+        """Return the ``(board, lottery)`` pairs with tickets, for one watchlist or all."""
+        query = "SELECT DISTINCT board, lottery FROM tickets"
+        rows = self._connection().execute(
+            query + (" WHERE watchlist = ?" if watchlist is not None else "") + " ORDER BY board, lottery",
+            (watchlist,) if watchlist is not None else ())
+        return [(row["board"], row["lottery"]) for row in rows]
+
+    def watermark(self, board, lottery_name):
+        """Return the newest draw evaluated for a lottery, or None."""
+        row = self._connection().execute("SELECT draw FROM watermarks WHERE board = ? AND lottery = ?",
+                                         (board, lottery_name)).fetchone()
+        return row["draw"] if row else None
+
+    def ingest(self, board, lottery_name, draws, complete=False):
+        """Evaluate draws newer than the watermark and store the resulting hits.
+
+        Only the run of consecutive draw numbers right after the watermark is
+        evaluated, so draws missing from ``draws`` are not skipped over.
+
+        Args:
+            board (str): 'nlb' or 'dlb'.
+            lottery_name (str): Lottery name in the board's format.
+            draws (iterable): Scraped results or export records with 'draw'
+                (or 'draw_number'), 'date', 'letter' and 'numbers'; any order.
+            complete (bool): ``draws`` holds every draw the board has after the
+                watermark (e.g. a ``since_draw`` delta), so a gap in the
+                numbering is a draw that was never held, and all are evaluated.
+
+        Returns:
+            list: New hit events, in draw order (see ``hits``).
+        """
+        rows = {}
+        for draw in draws:
+            number = str(draw.get("draw", draw.get("draw_number", ""))).strip()
+            if number.isdigit():
+                rows[int(number)] = draw
+
+        watermark = self.watermark(board, lottery_name)
+        if not rows or (watermark is not None and max(rows) <= watermark):
+            return []  # nothing new; skip the write transaction
+
+        conn = self._connection()
+        events = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            watermark = self.watermark(board, lottery_name)
+            newest = watermark
+            for number in sorted(rows):
+                if watermark is not None and number <= watermark:
+                    continue
+                if watermark is not None and number > newest + 1 and not complete:
+                    break  # draws in between were not read
+                events.extend(self._evaluate(conn, board, lottery_name, number, rows[number]))
+                newest = number
+            if newest != watermark:
+                conn.execute("INSERT OR REPLACE INTO watermarks (board, lottery, draw) VALUES (?, ?, ?)",
+                             (board, lottery_name, newest))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return events
+
+    def _evaluate(self, conn, board, lottery_name, number, draw):
+        drawn = _numbers(draw.get("numbers", []))
+        letter = str(draw.get("letter", "")).strip().upper()
+        matched = {}
+        if drawn:
+            placeholders = ",".join("?" * len(drawn))
+            for row in conn.execute(
+                    f"SELECT ticket, number FROM ticket_numbers WHERE board = ? AND lottery = ?"
+                    f" AND number IN ({placeholders})", (board, lottery_name, *drawn)):
+                matched.setdefault(row["ticket"], []).append(row["number"])
+        letter_tickets = set()
+        if letter:
+            letter_tickets = {row["ticket"] for row in conn.execute(
+                "SELECT id AS ticket FROM tickets WHERE board = ? AND lottery = ? AND letter = ?",
+                (board, lottery_name, letter))}
+        candidates = set(matched) | letter_tickets
+        if not candidates:
+            return []
+
+        placeholders = ",".join("?" * len(candidates))
+        events = []
+        for ticket in conn.execute(
+                f"SELECT id, watchlist, min_matches, after_draw FROM tickets WHERE id IN ({placeholders})"
+                f" ORDER BY id", tuple(candidates)):
+            numbers = sorted(matched.get(ticket["id"], []))
+            letter_match = ticket["id"] in letter_tickets
+            if number <= ticket["after_draw"] or (len(numbers) < ticket["min_matches"] and not letter_match):
+                continue
+            event = {"ticket": ticket["id"], "watchlist": ticket["watchlist"], "board": board,
+                     "lottery": lottery_name, "draw": number, "date": draw.get("date", ""),
+                     "letter": draw.get("letter", ""), "numbers": [str(n) for n in draw.get("numbers", [])],
+                     "matched": numbers, "letter_match": letter_match}
+            conn.execute(
+                "INSERT OR REPLACE INTO hits (ticket, watchlist, board, lottery, draw, date, letter, numbers,"
+                " matched, letter_match) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event["ticket"], event["watchlist"], board, lottery_name, number, event["date"],
+                 event["letter"], json.dumps(event["numbers"]), json.dumps(numbers), int(letter_match)))
+            events.append(event)
+        return events
+
+    def hits(self, watchlist, since_draw=None, board=None, lottery_name=None):
+        """Return a watchlist's hits, oldest draw first.
+
+        Args:
+            watchlist (str): Name of the watchlist.
+            since_draw (int, optional): Only hits on draws after this one.
+            board (str, optional): Only hits on this board.
+            lottery_name (str, optional): Only hits on this lottery.
+
+        Returns:
+            list: Events with ticket, board, lottery, draw, date, letter,
+                  numbers (as drawn), matched (ticket numbers drawn) and
+                  letter_match.
+        """
+        query = "SELECT * FROM hits WHERE watchlist = ?"
+        params = [watchlist]
+        for column, value in (("draw >", since_draw), ("board =", board), ("lottery =", lottery_name)):
+            if value is not None:
+                query += f" AND {column} ?"
+                params.append(value)
+        rows = self._connection().execute(query + " ORDER BY draw, ticket", params)
+        return [{"ticket": row["ticket"], "watchlist": row["watchlist"], "board": row["board"],
+                 "lottery": row["lottery"], "draw": row["draw"], "date": row["date"], "letter": row["letter"],
+                 "numbers": json.loads(row["numbers"]), "matched": json.loads(row["matched"]),
+                 "letter_match": bool(row["letter_match"])} for row in rows]
@@ -0,0 +1,39 @@
+"""
+Shared fixtures for the tests.
+
+``upstream`` points the scrapers at the fake upstream from
+testing/load_test.py. Override or parametrise ``upstream_pages`` to change
+the pages it serves.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import FakeUpstream
+from srilanka_lottery import scraper
+
+
+@pytest.fixture
+def upstream_pages():
+    """FakeUpstream arguments, or an unstarted FakeUpstream (subclass) instance"""
+    return {}
+
+
+@pytest.fixture
+def upstream(upstream_pages, monkeypatch):
+    """Serve the fake nlb.lk and dlb.lk for the test; yields the FakeUpstream"""
+    if isinstance(upstream_pages, FakeUpstream):
+        fake = upstream_pages
+    else:
+        fake = FakeUpstream(**{"latency": 0, **upstream_pages})
+    url = fake.start()
+    monkeypatch.setattr(scraper, "NLB_BASE_URL", url)
+    monkeypatch.setattr(scraper, "DLB_BASE_URL", url)
+    monkeypatch.setattr(scraper, "dlb_page_locators", {})
+    yield fake
+    fake.stop()
@@ -0,0 +1,68 @@
+"""
+Startup-time report for the lottery MCP server.
+
+Runs a fresh interpreter with ``python -X importtime`` and summarises where
+import time goes, so cold-start regressions are easy to spot.
+
+Usage:
+    python testing/import_time_report.py                  # server + package
+    python testing/import_time_report.py srilanka_lottery --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(module):
+    """Import a module in a fresh interpreter and collect -X importtime data.
+
+    Args:
+        module (str): Module to import (e.g., 'lottery_result_server').
+
+    Returns:
+        dict: 'total_ms' for the module itself and 'modules', a dict of every
+              imported module name to its (self_ms, cumulative_ms).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return {"total_ms": modules[module][1], "modules": modules}
+
+
+def print_report(module, top):
+    """Print the total and the slowest top-level imports of a module."""
+    data = measure_imports(module)
+    print(f"\n{module}: {data['total_ms']:.1f} ms")
+    print("-" * 60)
+    heaviest = sorted(
+        ((name, cumulative) for name, (_, cumulative) in data["modules"].items() if "." not in name),
+        key=lambda item: item[1], reverse=True,
+    )
+    for name, cumulative in heaviest[:top]:
+        print(f"  {cumulative:9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of the lottery server")
+    parser.add_argument("modules", nargs="*", default=["srilanka_lottery", "lottery_result_server"])
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+    for module in args.modules:
+        print_report(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
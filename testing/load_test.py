@@ -0,0 +1,517 @@
+"""
+Concurrent-client load test for the lottery MCP server.
+
+Starts a fake NLB/DLB upstream with configurable latency and error rate,
+points the scrapers at it, and drives a mixed workload of every tool from many
+simulated MCP clients. The report (JSON) gives throughput, latency percentiles
+and error rates overall and per tool, plus the server's upstream HTTP metrics.
+
+Two ways to run the server:
+
+- ``inproc`` (default): clients talk to ``lottery_result_server.mcp`` over the
+  in-memory transport. Clients and server share one event loop, so this shows
+  per-call cost rather than concurrency.
+- ``http``: the server runs in a subprocess on the streamable HTTP transport,
+  which is how it is deployed; use this to measure capacity.
+
+Usage:
+    python testing/load_test.py --clients 20 --duration 30
+    python testing/load_test.py --transport http --clients 50 --latency 0.2 --output run.json
+    python testing/load_test.py --transport http --compare baseline.json --max-regression 20
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LATEST_DRAW = 2000
+LATEST_DATE = datetime.date(2025, 11, 23)
+NLB_NAMES = ["Govisetha", "Mahajana Sampatha", "Mega Power", "Dhana Nidhanaya"]
+DLB_NAMES = ["Ada Kotipathi", "Jayoda", "Lagna Wasana", "Shanida"]
+NLB_SLUGS = {name.lower().replace(" ", "-") for name in NLB_NAMES}
+
+
+def draw_date(draw):
+    """Date of a fake draw; one draw per day, ending at LATEST_DATE."""
+    return (LATEST_DATE - datetime.timedelta(days=LATEST_DRAW - draw)).isoformat()
+
+
+def draw_numbers(draw):
+    """Deterministic letter and numbers of a fake draw."""
+    rng = random.Random(draw)
+    return rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), [f"{rng.randint(1, 80):02d}" for _ in range(4)]
+
+
+def draw_for(segment):
+    """Draw number for a URL/form segment that is a draw number or a date."""
+    if segment.isdigit():
+        return int(segment)
+    day = datetime.date.fromisoformat(segment)
+    return LATEST_DRAW - (LATEST_DATE - day).days
+
+
+class FakeUpstream:
+    """Local stand-in for www.nlb.lk and www.dlb.lk.
+
+    Serves the pages the scrapers read, with draws numbered up to
+    LATEST_DRAW. Both boards share one server; the scrapers only look at paths.
+    Like the real boards, unknown NLB lotteries are a 404 and draws outside
+    the history give an empty result.
+
+    Args:
+        latency (float): Mean seconds to wait before answering.
+        jitter (float): Fraction of ``latency`` to randomise each wait by.
+        error_rate (float): Fraction of requests answered with a 503.
+        draws (int): Number of draws in the history.
+        page_size (int): Rows per results page.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.2, error_rate=0.0, draws=200, page_size=10):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.draws = draws
+        self.page_size = page_size
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        """Start serving in a background thread and return the base URL."""
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream._handle(self, {})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                upstream._handle(self, {key: values[0] for key, values in form.items()})
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handle(self, handler, form):
+        with self._lock:
+            self.hits += 1
+        if self.latency:
+            spread = self.latency * self.jitter
+            time.sleep(max(0.0, random.uniform(self.latency - spread, self.latency + spread)))
+        if random.random() < self.error_rate:
+            status, body = 503, "busy"
+        else:
+            status, body = self._route(handler.path, form)
+        data = body.encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        try:
+            handler.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # streaming readers hang up once they have the rows they need
+
+    def _route(self, path, form):
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        try:
+            if parts == ["lotteries"]:
+                return 200, self.nlb_names_page()
+            if parts[0] == "results" and parts[1] not in NLB_SLUGS:
+                return 404, "not found"
+            if parts[0] == "results" and len(parts) == 2:
+                return 200, self.nlb_latest_page()
+            if parts[0] == "results" and len(parts) == 3:
+                return 200, self.nlb_result_page(parts[1], draw_for(parts[2]))
+            if parts == ["lottery", "en"]:
+                return 200, self.dlb_names_page()
+            if parts == ["home", "popup"]:
+                return 200, self.dlb_result_page(draw_for(form.get("lotteryNo") or form.get("datepicker1")))
+            if parts == ["result", "pagination_re"]:
+                return 200, self.dlb_page(int(form.get("pageId", 0)))
+        except ValueError:
+            return 400, "bad request"
+        return 404, "not found"
+
+    def _page_draws(self, page):
+        first = LATEST_DRAW - page * self.page_size
+        last = max(LATEST_DRAW - self.draws, first - self.page_size)
+        return range(first, last, -1)
+
+    def nlb_names_page(self):
+        items = "".join(f"<li><div><h3>{name}</h3></div></li>" for name in NLB_NAMES)
+        return f'<h1>Active Lotteries</h1><ul class="col4 gap20 list">{items}</ul>'
+
+    def nlb_latest_page(self):
+        rows = []
+        for draw in self._page_draws(0):
+            letter, numbers = draw_numbers(draw)
+            balls = "".join(f"<li>{n}</li>" for n in numbers)
+            rows.append(
+                f"<tr><td><b>{draw}</b> {draw_date(draw)}</td>"
+                f'<td><ol class="B"><li class="Letter">{letter}</li>{balls}</ol></td></tr>'
+            )
+        return f"<table><tbody>{''.join(rows)}</tbody></table>"
+
+    def nlb_result_page(self, name, draw):
+        if not LATEST_DRAW - self.draws < draw <= LATEST_DRAW:
+            return "<div>No result</div>"
+        letter, numbers = draw_numbers(draw)
+        balls = "".join(f"<li>{n}</li>" for n in numbers)
+        return (
+            f'<div class="lresult"><h1>{name}</h1><p>Draw No.: {draw}</p><p>Date: {draw_date(draw)}</p>'
+            f'<ol class="B"><li class="Letter">{letter}</li>{balls}</ol></div>'
+        )
+
+    def dlb_names_page(self):
+        return "".join(f'<h2 class="inner_heading_lot">{name}</h2>' for name in DLB_NAMES)
+
+    def dlb_result_page(self, draw):
+        if not LATEST_DRAW - self.draws < draw <= LATEST_DRAW:
+            return ""
+        letter, numbers = draw_numbers(draw)
+        balls = "".join(f'<h6 class="number_shanida number_circle">{n}</h6>' for n in numbers)
+        return (
+            f'<h2 class="lot_m_re_heading">Draw {draw}</h2>'
+            f'<h3 class="lot_m_re_date">{draw_date(draw)}</h3>'
+            f'<h6 class="eng_letter">{letter}</h6>{balls}'
+            f'<div id="resultPo"><img src="/prizes/{draw}.jpg"></div>'
+        )
+
+    def dlb_page(self, page):
+        rows = []
+        for draw in self._page_draws(page):
+            letter, numbers = draw_numbers(draw)
+            balls = "".join(f"<li>{n}</li>" for n in numbers)
+            rows.append(
+                f"<tr><td>{draw} | {draw_date(draw)}</td><td></td>"
+                f'<td><ul><li class="res_eng_letter">{letter}</li>{balls}</ul></td></tr>'
+            )
+        return f"<table>{''.join(rows)}</table>"
+
+
+def _nlb_name(rng):
+    return rng.choice(NLB_NAMES).lower().replace(" ", "-")
+
+
+def _past_draw(rng, draws):
+    return rng.randint(LATEST_DRAW - draws + 1, LATEST_DRAW)
+
+
+def _board_lottery(rng):
+    if rng.random() < 0.5:
+        return "nlb", _nlb_name(rng)
+    return "dlb", rng.choice(DLB_NAMES)
+
+
+def _watchlist_name(rng):
+    return f"load-{rng.randint(1, 5)}"
+
+
+def _search_arguments(rng, draws):
+    board, name = _board_lottery(rng)
+    _, numbers = draw_numbers(_past_draw(rng, draws))
+    return {"board": board, "lottery_name": name, "numbers": [int(n) for n in numbers[:2]],
+            "match": rng.choice(["all", "any"]), "limit": 5}
+
+
+def _ticket_arguments(rng, draws):
+    board, name = _board_lottery(rng)
+    return {"watchlist": _watchlist_name(rng), "board": board, "lottery_name": name,
+            "numbers": sorted(rng.sample(range(1, 81), 4)), "letter": rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+            "min_matches": 2}
+
+
+# (tool, weight, arguments(rng, draws)). Weights roughly follow what an
+# assistant asks for: mostly latest results and single draws, then searches
+# and watchlists, which read the draw index.
+WORKLOAD = [
+    ("get_nlb_lottery_names", 1, lambda rng, draws: {}),
+    ("get_dlb_lottery_names", 1, lambda rng, draws: {}),
+    ("get_nlb_result_by_draw", 3,
+     lambda rng, draws: {"lottery_name": _nlb_name(rng), "draw_number": _past_draw(rng, draws)}),
+    ("get_nlb_result_by_date", 2,
+     lambda rng, draws: {"lottery_name": _nlb_name(rng), "date": draw_date(_past_draw(rng, draws))}),
+    ("get_dlb_result_by_draw", 3,
+     lambda rng, draws: {"lottery_name": rng.choice(DLB_NAMES), "draw_number": _past_draw(rng, draws)}),
+    ("get_dlb_result_by_date", 2,
+     lambda rng, draws: {"lottery_name": rng.choice(DLB_NAMES), "date": draw_date(_past_draw(rng, draws))}),
+    ("get_nlb_latest_results", 4,
+     lambda rng, draws: {"lottery_name": _nlb_name(rng), "limit": rng.choice([1, 5, 10])}),
+    ("get_dlb_latest_results", 4,
+     lambda rng, draws: {"lottery_name": rng.choice(DLB_NAMES), "limit": rng.choice([1, 5, 20])}),
+    ("get_all_latest_results", 1, lambda rng, draws: {}),
+    ("search_draws", 2, _search_arguments),
+    ("add_to_watchlist", 1, _ticket_arguments),
+    ("check_watchlist", 1, lambda rng, draws: {"watchlist": _watchlist_name(rng)}),
+]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, elapsed):
+    """Aggregate (tool, seconds, ok) samples into the report's stats section."""
+    def stats(rows):
+        latencies = [seconds * 1000 for _, seconds, _ in rows]
+        errors = sum(1 for _, _, ok in rows if not ok)
+        return {
+            "calls": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows) if rows else 0.0,
+            "p50_ms": percentile(latencies, 50) if rows else None,
+            "p95_ms": percentile(latencies, 95) if rows else None,
+            "p99_ms": percentile(latencies, 99) if rows else None,
+            "max_ms": max(latencies) if rows else None,
+        }
+
+    by_tool = {}
+    for row in samples:
+        by_tool.setdefault(row[0], []).append(row)
+    summary = stats(samples)
+    summary["duration_s"] = elapsed
+    summary["throughput_rps"] = len(samples) / elapsed if elapsed else 0.0
+    summary["tools"] = {tool: stats(rows) for tool, rows in sorted(by_tool.items())}
+    return summary
+
+
+def _is_error(result):
+    if result.is_error:
+        return True
+    data = result.structured_content or {}
+    data = data.get("result", data)
+    return isinstance(data, dict) and "error" in data
+
+
+async def run_client(target, rng, draws, samples, deadline, calls):
+    """One simulated MCP client issuing weighted random tool calls in a loop."""
+    from fastmcp import Client
+
+    tools = [entry[0] for entry in WORKLOAD]
+    weights = [entry[1] for entry in WORKLOAD]
+    arguments = {entry[0]: entry[2] for entry in WORKLOAD}
+    async with Client(target, timeout=120) as client:
+        made = 0
+        while (calls is None or made < calls) and (deadline is None or time.monotonic() < deadline):
+            tool = rng.choices(tools, weights)[0]
+            started = time.perf_counter()
+            try:
+                result = await client.call_tool(tool, arguments[tool](rng, draws), raise_on_error=False)
+                ok = not _is_error(result)
+            except Exception:
+                ok = False
+            samples.append((tool, time.perf_counter() - started, ok))
+            made += 1
+        contents = await client.read_resource("lottery://metrics/http")
+        return json.loads(contents[0].text)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_http_server(upstream_url, env=None, startup_timeout=30):
+    """Run lottery_result_server over streamable HTTP in a subprocess.
+
+    Returns:
+        tuple: (subprocess.Popen, MCP endpoint URL).
+    """
+    port = _free_port()
+    child_env = dict(os.environ, LOTTERY_NLB_BASE_URL=upstream_url, LOTTERY_DLB_BASE_URL=upstream_url)
+    child_env.update(env or {})
+    code = (
+        "import lottery_result_server as s; "
+        f"s.mcp.run(transport='http', host='127.0.0.1', port={port}, show_banner=False, log_level='warning')"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, env=child_env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    give_up = time.monotonic() + startup_timeout
+    while time.monotonic() < give_up:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/mcp"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Server did not start listening in time")
+
+
+async def run_load_test(clients=10, duration=10.0, calls_per_client=None, transport="inproc",
+                        latency=0.05, jitter=0.2, error_rate=0.0, draws=200, seed=None, server_env=None):
+    """Drive the server with concurrent clients and return the report dict.
+
+    Args:
+        clients (int): Number of concurrent MCP clients.
+        duration (float): Seconds to run; ignored if ``calls_per_client`` is set.
+        calls_per_client (int, optional): Stop each client after this many calls.
+        transport (str): 'inproc' or 'http'.
+        latency (float): Mean fake upstream latency in seconds.
+        jitter (float): Fraction of ``latency`` to randomise by.
+        error_rate (float): Fraction of upstream requests answered with a 503.
+        draws (int): Size of the fake draw history.
+        seed (int, optional): Seed for the workload mix, for repeatable runs.
+        server_env (dict, optional): Extra environment for the HTTP server
+            (e.g. LOTTERY_CACHE_PATH) to compare configurations. Tickets go to
+            a throwaway watchlist unless it sets LOTTERY_WATCHLIST_PATH.
+
+    Returns:
+        dict: 'config', overall stats, per-tool 'tools' stats, 'upstream_requests'
+              and 'server_http_metrics'.
+    """
+    upstream = FakeUpstream(latency=latency, jitter=jitter, error_rate=error_rate, draws=draws)
+    upstream_url = upstream.start()
+    scratch = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    watchlist_path = os.path.join(scratch.name, "watchlist.sqlite3")
+    proc = None
+    restore = None
+    try:
+        if transport == "http":
+            proc, target = start_http_server(upstream_url, {"LOTTERY_WATCHLIST_PATH": watchlist_path,
+                                                            **(server_env or {})})
+        elif transport == "inproc":
+            from srilanka_lottery import scraper
+            import lottery_result_server
+
+            restore = (scraper.NLB_BASE_URL, scraper.DLB_BASE_URL,
+                       lottery_result_server.WATCHLIST_PATH, lottery_result_server._watchlist)
+            scraper.NLB_BASE_URL = scraper.DLB_BASE_URL = upstream_url
+            lottery_result_server.WATCHLIST_PATH = watchlist_path
+            lottery_result_server._watchlist = None
+            target = lottery_result_server.mcp
+        else:
+            raise ValueError(f"Unknown transport {transport!r}")
+
+        master = random.Random(seed)
+        samples = []
+        deadline = None if calls_per_client is not None else time.monotonic() + duration
+        started = time.monotonic()
+        metrics = await asyncio.gather(*(
+            run_client(target, random.Random(master.random()), draws, samples, deadline, calls_per_client)
+            for _ in range(clients)
+        ))
+        elapsed = time.monotonic() - started
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if restore is not None:
+            (scraper.NLB_BASE_URL, scraper.DLB_BASE_URL,
+             lottery_result_server.WATCHLIST_PATH, lottery_result_server._watchlist) = restore
+        upstream.stop()
+        scratch.cleanup()
+
+    report = {
+        "config": {
+            "transport": transport,
+            "clients": clients,
+            "duration": duration if calls_per_client is None else None,
+            "calls_per_client": calls_per_client,
+            "upstream_latency_s": latency,
+            "upstream_jitter": jitter,
+            "upstream_error_rate": error_rate,
+            "server_env": server_env or {},
+        },
+    }
+    report.update(summarize(samples, elapsed))
+    report["upstream_requests"] = upstream.hits
+    report["server_http_metrics"] = metrics[-1] if metrics else {}
+    return report
+
+
+def compare_reports(baseline, current, max_regression):
+    """List regressions of ``current`` against ``baseline``.
+
+    Args:
+        baseline (dict): Earlier report.
+        current (dict): Report to check.
+        max_regression (float): Allowed worsening in percent.
+
+    Returns:
+        list: Human-readable regression messages; empty if within bounds.
+    """
+    problems = []
+    allowed = 1 + max_regression / 100
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if baseline.get(key) and current.get(key) and current[key] > baseline[key] * allowed:
+            problems.append(f"{key} {baseline[key]:.1f} -> {current[key]:.1f}")
+    if baseline.get("throughput_rps") and current["throughput_rps"] * allowed < baseline["throughput_rps"]:
+        problems.append(f"throughput_rps {baseline['throughput_rps']:.1f} -> {current['throughput_rps']:.1f}")
+    if current["error_rate"] > baseline.get("error_rate", 0) + max_regression / 100:
+        problems.append(f"error_rate {baseline.get('error_rate', 0):.3f} -> {current['error_rate']:.3f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the lottery MCP server against a fake upstream")
+    parser.add_argument("--transport", choices=["inproc", "http"], default="inproc")
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent MCP clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--calls", type=int, help="Calls per client (overrides --duration)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Upstream latency jitter fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream 503s")
+    parser.add_argument("--seed", type=int, help="Seed for a repeatable workload")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra server environment (http transport), repeatable")
+    parser.add_argument("--output", help="Write the JSON report here as well")
+    parser.add_argument("--compare", help="Baseline report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=20.0,
+                        help="Allowed worsening against --compare, in percent")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(
+        clients=args.clients, duration=args.duration, calls_per_client=args.calls,
+        transport=args.transport, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, seed=args.seed,
+        server_env=dict(item.split("=", 1) for item in args.env),
+    ))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            problems = compare_reports(json.load(f), report, args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Tests for the cross-board latest results fan-out (scrape_all_latest_results).
+
+Runs against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import DLB_NAMES, LATEST_DRAW, NLB_NAMES
+from srilanka_lottery import scraper, scrape_all_latest_results
+
+
+@pytest.fixture
+def upstream_pages():
+    return {"latency": 0.2, "jitter": 0}
+
+
+def test_fetches_every_lottery_concurrently(upstream):
+    """One row per lottery, fetched in parallel rather than one after another"""
+    started = time.monotonic()
+    result = scrape_all_latest_results()
+    elapsed = time.monotonic() - started
+
+    assert result["failed"] == 0
+    assert [(row["board"], row["lottery"]) for row in result["results"]] == (
+        [("dlb", name) for name in sorted(DLB_NAMES)] + [("nlb", name) for name in sorted(NLB_NAMES)]
+    )
+    assert all(row["draw"] == str(LATEST_DRAW) for row in result["results"])
+    # Names (one round trip) plus one parallel round of 8 lotteries, not 10 in a row
+    assert elapsed < 1.0
+
+
+def test_failed_lottery_reported_per_row(upstream, monkeypatch):
+    """A lottery that cannot be fetched gets an error row; the others succeed"""
+    monkeypatch.delitem(scraper.DLB_LOTTERY_IDS, "Jayoda")
+
+    result = scrape_all_latest_results()
+
+    rows = {row["lottery"]: row for row in result["results"]}
+    assert result["failed"] == 1
+    assert "error" in rows["Jayoda"]
+    assert rows["Shanida"]["draw"] == str(LATEST_DRAW)
@@ -0,0 +1,76 @@
+"""
+Tests for the memory-mapped draw archive (srilanka_lottery.archive).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery import archive as archive_module
+from srilanka_lottery.archive import DrawArchive, append_draws, compact
+
+
+ADA_KOTIPATHI = [
+    {"draw": "2608", "date": "2025-May-01 Thursday", "letter": "Y", "numbers": ["11", "22", "33", "44"]},
+    {"draw": "2607", "date": "2025-Apr-30 Wednesday", "letter": "K", "numbers": ["05", "16", "38"]},
+]
+
+
+def test_append_and_read_views(tmp_path):
+    """Draws come back ascending, range slices are views, appends merge"""
+    path = str(tmp_path / "draws.lkda")
+    assert append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI) == 2
+    assert append_draws(path, "nlb", "govisetha", [
+        {"draw_number": "4263", "date": "2025-11-22", "letter": "T", "numbers": ["13", "25", "29", "51"]},
+    ]) == 1
+    assert append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI[:1]) == 0
+
+    with DrawArchive(path) as archive:
+        assert archive.lotteries() == [("dlb", "Ada Kotipathi"), ("nlb", "govisetha")]
+        cols = archive.columns("dlb", "Ada Kotipathi")
+        assert list(cols["draw"]) == [2607, 2608]
+        assert [archive.letter(code) for code in cols["letter"]] == ["K", "Y"]
+        assert len(archive.columns("dlb", "Ada Kotipathi", draw_from=2608)["draw"]) == 1
+
+        records = list(archive.iter_records("dlb", "Ada Kotipathi"))
+        assert [r["draw"] for r in records] == [2608, 2607]
+        assert records[1]["numbers"] == ["05", "16", "38"]
+        assert records[1]["date"] == "2025-04-30"
+        del cols
+
+
+def test_reader_keeps_snapshot_across_append(tmp_path):
+    """An open reader keeps its data while a writer replaces the file"""
+    path = str(tmp_path / "draws.lkda")
+    append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI[1:])
+    with DrawArchive(path) as archive:
+        append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI[:1])
+        assert archive.count("dlb", "Ada Kotipathi") == 1
+    with DrawArchive(path) as archive:
+        assert archive.count("dlb", "Ada Kotipathi") == 2
+
+
+def test_appends_go_to_the_tail_until_compacted(tmp_path, monkeypatch):
+    """An append leaves the columnar file alone; compaction folds the tail in"""
+    path = str(tmp_path / "draws.lkda")
+    append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI[1:])
+    compact(path)
+    size = os.path.getsize(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    assert append_draws(path, "dlb", "Ada Kotipathi", ADA_KOTIPATHI) == 1
+    assert (os.path.getsize(path), os.stat(path).st_mtime_ns) == (size, mtime)
+    with open(path + ".tail", "ab") as fp:
+        fp.write(b'{"board": "dlb", "lott')  # cut short by a crashed writer
+    assert append_draws(path, "nlb", "govisetha", [{"draw": "7", "date": "", "letter": "", "numbers": ["03"]}]) == 1
+    with DrawArchive(path) as archive:
+        assert [r["draw"] for r in archive.iter_records("dlb", "Ada Kotipathi")] == [2608, 2607]
+        assert [r["numbers"] for r in archive.iter_records("nlb", "govisetha")] == [["03"]]
+
+    monkeypatch.setattr(archive_module, "COMPACT_ROWS", 2)
+    append_draws(path, "nlb", "govisetha", [{"draw": "8", "date": "", "letter": "", "numbers": ["04"]}])
+    assert os.path.getsize(path + ".tail") == 0
+    with DrawArchive(path) as archive:
+        assert archive.count("nlb", "govisetha") == 2 and archive.count("dlb", "Ada Kotipathi") == 2
+        assert next(archive.iter_records("dlb", "Ada Kotipathi"))["numbers"] == ["11", "22", "33", "44"]
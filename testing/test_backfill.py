@@ -0,0 +1,100 @@
+"""
+Tests for the resumable backfill (srilanka_lottery.backfill).
+
+Runs against the fake upstream from testing/load_test.py.
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import LATEST_DRAW
+from srilanka_lottery import backfill
+
+LOTTERIES = [("dlb", "Jayoda"), ("dlb", "Shanida"), ("nlb", "govisetha")]
+HISTORY = 40
+
+
+@pytest.fixture
+def upstream_pages():
+    return {"draws": HISTORY}
+
+
+def read_draws(path):
+    with open(path, encoding="utf-8") as fp:
+        records = [json.loads(line) for line in fp]
+    return sorted((r["board"], r["lottery"], r["draw"]) for r in records)
+
+
+def expected_draws():
+    draws = range(LATEST_DRAW - HISTORY + 1, LATEST_DRAW + 1)
+    return sorted((board, name, draw) for board, name in LOTTERIES for draw in draws)
+
+
+def test_backfill_all_lotteries(upstream, tmp_path):
+    """Every draw of every lottery is written once and the checkpoint says done"""
+    output = str(tmp_path / "history.ndjson")
+
+    summary = backfill.run_backfill(output, lotteries=LOTTERIES, rate=None, batch_size=15, progress=None)
+
+    assert summary["written"] == len(expected_draws())
+    assert summary["pending"] == []
+    assert read_draws(output) == expected_draws()
+
+
+def test_backfill_resumes_after_interruption(upstream, tmp_path, monkeypatch):
+    """A stopped run leaves a checkpoint and the next run writes only the rest"""
+    output = str(tmp_path / "history.ndjson")
+    stop = threading.Event()
+    write = backfill.BackfillSink.write
+
+    def stop_after_first_batch(self, *args, **kwargs):
+        write(self, *args, **kwargs)
+        stop.set()
+
+    monkeypatch.setattr(backfill.BackfillSink, "write", stop_after_first_batch)
+    first = backfill.run_backfill(output, lotteries=LOTTERIES, workers=1, rate=None, batch_size=15,
+                                  progress=None, stop=stop)
+    monkeypatch.setattr(backfill.BackfillSink, "write", write)
+
+    assert first["pending"]
+    with open(output + ".checkpoint.json", encoding="utf-8") as fp:
+        assert json.load(fp)["lotteries"]["dlb:Jayoda"]["page"] > 0
+
+    second = backfill.run_backfill(output, lotteries=LOTTERIES, rate=None, batch_size=15, progress=None)
+
+    assert second["pending"] == []
+    assert first["written"] + second["written"] == len(expected_draws())
+    assert read_draws(output) == expected_draws()
+
+
+def test_batch_written_after_the_last_checkpoint_is_not_duplicated(upstream, tmp_path, monkeypatch):
+    """A crash between writing a batch and saving the checkpoint does not write it twice"""
+    output = str(tmp_path / "history.ndjson")
+    save = backfill.Checkpoint.save
+    saves = []
+
+    def crash_on_second_batch(self):
+        saves.append(True)
+        if len(saves) == 3:  # the start-up save, then one per batch
+            raise KeyboardInterrupt
+        save(self)
+
+    monkeypatch.setattr(backfill.Checkpoint, "save", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        backfill.run_backfill(output, lotteries=LOTTERIES[:1], workers=1, rate=None, batch_size=15,
+                              progress=None)
+    monkeypatch.setattr(backfill.Checkpoint, "save", save)
+    with open(output, encoding="utf-8") as fp:
+        assert len(fp.readlines()) > 15  # the second batch reached the file
+
+    backfill.run_backfill(output, lotteries=LOTTERIES[:1], rate=None, batch_size=15, progress=None)
+
+    draws = range(LATEST_DRAW - HISTORY + 1, LATEST_DRAW + 1)
+    assert read_draws(output) == sorted(("dlb", "Jayoda", draw) for draw in draws)
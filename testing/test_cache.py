@@ -0,0 +1,95 @@
+"""
+Tests for the cross-process shared cache (srilanka_lottery.cache).
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery.cache import SharedCache
+from srilanka_lottery.transport import deadline_scope
+
+
+def test_set_get_and_expiry(tmp_path):
+    """Values round-trip as JSON and disappear after their TTL"""
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("dlb:names", {"DLB": ["Ada Kotipathi"]}, ttl=60)
+    cache.set("dlb:latest", {"DLB_Results": []}, ttl=-1)
+
+    assert cache.get("dlb:names") == {"DLB": ["Ada Kotipathi"]}
+    assert cache.get("dlb:latest") is None
+    assert cache.get("missing") is None
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    """Writes beyond max_bytes evict the oldest entries"""
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), max_bytes=250)
+    for i in range(5):
+        cache.set(f"key{i}", {"value": "x" * 80}, ttl=60)
+        time.sleep(0.01)
+
+    assert cache.stats()["bytes"] <= 250
+    assert cache.get("key0") is None
+    assert cache.get("key4") == {"value": "x" * 80}
+
+
+def test_errors_are_not_cached(tmp_path):
+    """Values rejected by cache_if are returned but not stored"""
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"))
+    result = cache.get_or_compute("k", 60, lambda: {"error": "boom"}, cache_if=lambda r: "error" not in r)
+    assert result == {"error": "boom"}
+    assert cache.get("k") is None
+
+
+def test_waiter_gives_up_at_its_deadline(tmp_path):
+    """A caller waiting on another's slow compute returns its own value when its deadline runs out"""
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"))
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(1)
+        return {"from": "slow"}
+
+    holder = threading.Thread(target=cache.get_or_compute, args=("k", 60, slow))
+    holder.start()
+    started.wait()
+    began = time.monotonic()
+    with deadline_scope(0.2):
+        result = cache.get_or_compute("k", 60, lambda: {"from": "waiter"})
+    waited = time.monotonic() - began
+    holder.join()
+
+    assert result == {"from": "waiter"}
+    assert waited < 0.6
+    assert cache.get("k") == {"from": "slow"}
+
+
+def _worker(path, counter_path):
+    def compute():
+        with open(counter_path, "a") as fp:
+            fp.write("x")
+        time.sleep(0.3)
+        return {"NLB_Results": ["4263"]}
+
+    assert SharedCache(path).get_or_compute("nlb:latest:govisetha:1", 60, compute) == {"NLB_Results": ["4263"]}
+
+
+def test_single_flight_across_processes(tmp_path):
+    """Concurrent misses in several processes compute the value once"""
+    path = str(tmp_path / "cache.sqlite3")
+    counter_path = str(tmp_path / "calls")
+    SharedCache(path)
+    processes = [multiprocessing.Process(target=_worker, args=(path, counter_path)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(counter_path) as fp:
+        assert fp.read() == "x"
@@ -0,0 +1,20 @@
+"""
+Tests for draw date parsing (srilanka_lottery.dates).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery.dates import parse_draw_date
+
+
+def test_parse_draw_date():
+    """NLB and DLB date formats are recognised"""
+    assert parse_draw_date("2025-11-22").isoformat() == "2025-11-22"
+    assert parse_draw_date("2025-May-01 Thursday").isoformat() == "2025-05-01"
+    assert parse_draw_date("Saturday November 22, 2025").isoformat() == "2025-11-22"
+    assert parse_draw_date("22 Nov 2025").isoformat() == "2025-11-22"
+    assert parse_draw_date("2025-02-30") is None
+    assert parse_draw_date("no date") is None
@@ -0,0 +1,78 @@
+"""
+Tests for delta queries on the latest-results scrapers and tools (since_draw /
+since_date).
+
+Runs against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from load_test import LATEST_DRAW, draw_date
+from srilanka_lottery import scraper
+
+
+@pytest.fixture(autouse=True)
+def newest(monkeypatch):
+    monkeypatch.setattr(server, "_newest", {})
+
+
+def draws(result, key):
+    return [int(row["draw"]) for row in result[key]]
+
+
+def test_nlb_delta(upstream):
+    """Only draws past the watermark come back, with the newest draw as the new watermark"""
+    result = scraper.scrape_nlb_latest_results(None, "govisetha", 5, since_draw=LATEST_DRAW - 2)
+    assert draws(result, "NLB_Results") == [LATEST_DRAW, LATEST_DRAW - 1]
+    assert result["changed"] and result["watermark"] == str(LATEST_DRAW) and "has_more" not in result
+
+    result = scraper.scrape_nlb_latest_results(None, "govisetha", 5, since_draw=LATEST_DRAW)
+    assert result == {"NLB_Results": [], "changed": False, "watermark": str(LATEST_DRAW),
+                      "watermark_date": result["watermark_date"]}
+
+    result = scraper.scrape_nlb_latest_results(None, "govisetha", 5, since_date=draw_date(LATEST_DRAW - 1))
+    assert draws(result, "NLB_Results") == [LATEST_DRAW]
+
+
+def test_dlb_delta_stops_paginating_at_watermark(upstream):
+    """Pages past the one holding the watermark are never requested"""
+    result = scraper.scrape_dlb_latest_results("Jayoda", 50, since_draw=LATEST_DRAW - 3)
+    assert draws(result, "DLB_Results") == [LATEST_DRAW, LATEST_DRAW - 1, LATEST_DRAW - 2]
+    assert upstream.hits == 1
+
+    result = scraper.scrape_dlb_latest_results("Jayoda", 50, since_draw=LATEST_DRAW - 25)
+    assert draws(result, "DLB_Results") == list(range(LATEST_DRAW, LATEST_DRAW - 25, -1))
+    assert upstream.hits == 1 + 3
+
+    result = scraper.scrape_dlb_latest_results("Jayoda", 5, since_draw=LATEST_DRAW - 25)
+    assert len(result["DLB_Results"]) == 5 and result["has_more"]
+
+
+def test_parser_stops_at_first_seen_row(upstream):
+    """Rows after the watermark row are not parsed"""
+    with scraper.requests.Session() as session:
+        html = scraper.fetch_dlb_results_page(session, scraper.DLB_LOTTERY_IDS["Jayoda"], 0)
+    rows = scraper.parse_dlb_results_page(html, until=scraper.Watermark(since_draw=LATEST_DRAW - 2))
+    assert draws({"rows": rows}, "rows") == [LATEST_DRAW, LATEST_DRAW - 1, LATEST_DRAW - 2]
+
+
+def test_unchanged_poll_is_answered_locally(upstream):
+    """Once the newest draw is known, polling with it as since_draw costs no upstream request"""
+    latest = server.get_dlb_latest_results.fn("Jayoda", 5)
+    hits = upstream.hits
+
+    result = server.get_dlb_latest_results.fn("Jayoda", 5, since_draw=int(latest["DLB_Results"][0]["draw"]))
+    assert result["changed"] is False and result["DLB_Results"] == []
+    assert result["watermark"] == str(LATEST_DRAW)
+    assert upstream.hits == hits
+
+    result = server.get_dlb_latest_results.fn("Jayoda", 5, since_draw=LATEST_DRAW - 1)
+    assert draws(result, "DLB_Results") == [LATEST_DRAW] and upstream.hits == hits + 1
+    assert "error" in server.get_nlb_latest_results.fn("govisetha", 5, since_date="23/11/2025")
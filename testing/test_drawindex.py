@@ -0,0 +1,122 @@
+"""
+Tests for the number/letter draw index (srilanka_lottery.drawindex) and the
+search_draws tool.
+
+The tool test runs against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from load_test import LATEST_DRAW, draw_date, draw_numbers
+from srilanka_lottery.archive import append_draws
+from srilanka_lottery.drawindex import DrawIndex
+
+
+def fake_draws(first, last):
+    draws = []
+    for draw in range(first, last + 1):
+        letter, numbers = draw_numbers(draw)
+        draws.append({"draw": str(draw), "date": draw_date(draw), "letter": letter, "numbers": numbers})
+    return draws
+
+
+def brute_force(draws, numbers, letters, match):
+    found = []
+    for row in draws:
+        terms = [f"{n:02d}" in row["numbers"] for n in numbers] + [row["letter"] == l for l in letters]
+        if (all if match == "all" else any)(terms):
+            found.append(row["draw"])
+    return sorted(found, key=int, reverse=True)
+
+
+@pytest.mark.parametrize("numbers,letters,match", [
+    ([27], [], "all"),
+    ([27, 41], [], "any"),
+    ([12], ["K"], "all"),
+    ([], ["K", "Q"], "any"),
+])
+def test_search_matches_full_scan(numbers, letters, match):
+    """AND/OR over numbers and letters gives the same draws as scanning every row"""
+    draws = fake_draws(1, 1500)
+    index = DrawIndex()
+    assert index.add("nlb", "govisetha", draws) == 1500
+
+    result = index.search("nlb", "govisetha", numbers, [l.lower() for l in letters], match, limit=5000)
+
+    expected = brute_force(draws, numbers, letters, match)
+    assert result["matches"] == len(expected)
+    assert [row["draw"] for row in result["draws"]] == expected
+    assert (result["first_draw"], result["latest_draw"], result["indexed_draws"]) == ("1", "1500", 1500)
+
+
+def test_incremental_updates():
+    """Known draws are skipped; new draws become searchable"""
+    index = DrawIndex()
+    index.add("dlb", "Jayoda", [{"draw": "10", "date": "", "letter": "A", "numbers": ["05", "07"]}])
+    assert index.add("dlb", "Jayoda", [
+        {"draw": "10", "date": "", "letter": "A", "numbers": ["05", "07"]},
+        {"draw": "11", "date": "", "letter": "B", "numbers": ["07", "09"]},
+    ]) == 1
+    result = index.search("dlb", "Jayoda", numbers=[7], limit=1)
+    assert result["matches"] == 2
+    assert result["draws"] == [{"draw": "11", "date": "", "letter": "B", "numbers": ["07", "09"]}]
+    assert index.search("dlb", "Kapruka", numbers=[7])["matches"] == 0
+    with pytest.raises(ValueError):
+        index.search("dlb", "Jayoda")
+
+
+def test_update_from_archive_reads_only_new_draws(tmp_path):
+    """A grown archive adds just the draws past the indexed ones"""
+    path = str(tmp_path / "draws.lkda")
+    append_draws(path, "nlb", "govisetha", fake_draws(1, 100))
+    index = DrawIndex()
+    assert index.update_from_archive(path) == 100
+
+    append_draws(path, "nlb", "govisetha", fake_draws(101, 120))
+    assert index.update_from_archive(path) == 20
+    assert index.latest_draw("nlb", "govisetha") == 120
+
+
+def test_search_draws_tool(upstream, monkeypatch, tmp_path):
+    """The tool searches the archive plus the newest draws from the board"""
+    path = str(tmp_path / "draws.lkda")
+    append_draws(path, "nlb", "govisetha", fake_draws(1, LATEST_DRAW - 5))
+    monkeypatch.setattr(server, "ARCHIVE_PATH", path)
+    monkeypatch.setattr(server, "draw_index", DrawIndex())
+    monkeypatch.setattr(server, "_archive_mtime", None)
+    monkeypatch.setattr(server, "_topped_up", {})
+    search = server.search_draws.fn
+    result = search("nlb", "Govisetha", numbers=[27], letters=["k"], match="any", limit=3)
+    hits = upstream.hits
+    again = search("nlb", "govisetha", numbers=[27], letters=["K"], match="any", limit=3)
+
+    expected = brute_force(fake_draws(1, LATEST_DRAW), [27], ["K"], "any")
+    assert result["indexed_draws"] == LATEST_DRAW and "note" not in result
+    assert result["matches"] == len(expected)
+    assert [row["draw"] for row in result["draws"]] == expected[:3]
+    assert again == result and upstream.hits == hits  # topped up at most every LATEST_TTL
+    assert "error" in search("nlb", "govisetha")
+    assert "error" in search("xyz", "govisetha", numbers=[1])
+
+
+def test_search_without_archive_names_the_indexed_window(upstream, monkeypatch):
+    """Without an archive a miss is reported as not seen since the oldest indexed draw"""
+    monkeypatch.setattr(server, "ARCHIVE_PATH", None)
+    monkeypatch.setattr(server, "draw_index", DrawIndex())
+    monkeypatch.setattr(server, "_topped_up", {})
+
+    miss = server.search_draws.fn("nlb", "govisetha", numbers=[999])
+    hit = server.search_draws.fn("nlb", "govisetha", numbers=[int(draw_numbers(LATEST_DRAW)[1][0])])
+
+    first = int(miss["first_draw"])
+    assert 1 < first <= LATEST_DRAW and miss["matches"] == 0
+    assert miss["note"].startswith(f"Not seen since draw {first}; only draws {first} to {LATEST_DRAW} are indexed")
+    assert "LOTTERY_ARCHIVE_PATH" in miss["note"]
+    assert hit["note"].startswith(f"Searched draws {first} to {LATEST_DRAW} only")
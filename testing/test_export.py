@@ -0,0 +1,74 @@
+"""
+Tests for the bulk draw export (srilanka_lottery.export).
+
+These run offline: the draw source is replaced with canned records.
+"""
+
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery import export
+from srilanka_lottery.scraper import parse_dlb_results_page
+
+
+def fake_draws(board, lottery_name, draw_from=None, draw_to=None):
+    for draw in range(2610, 2600, -1):
+        if draw_to is not None and draw > draw_to:
+            continue
+        if draw_from is not None and draw < draw_from:
+            return
+        yield export.make_record(board, lottery_name, draw, "2025-05-01", "Y", ["11", "22", "33", "44"])
+
+
+def test_parse_dlb_results_page():
+    """DLB pagination rows are parsed into draw dicts"""
+    html = """
+    <table><tr>
+      <td>2608 | 2025-05-01</td><td>x</td>
+      <td><ul><li class="res_eng_letter">Y</li><li>11</li><li>22</li></ul></td>
+    </tr><tr><td>header</td><td>row</td><td></td></tr></table>
+    """
+    assert parse_dlb_results_page(html) == [
+        {"draw": "2608", "date": "2025-05-01", "letter": "Y", "numbers": ["11", "22"]}
+    ]
+
+
+def test_export_ndjson_draw_range(tmp_path, monkeypatch):
+    """Only draws inside the requested range are written"""
+    monkeypatch.setattr(export, "iter_draws", fake_draws)
+    path = str(tmp_path / "ada.ndjson")
+
+    summary = export.export_lottery("dlb", "Ada Kotipathi", path, draw_from=2603, draw_to=2606)
+
+    with open(path) as fp:
+        draws = [json.loads(line)["draw"] for line in fp]
+    assert draws == [2606, 2605, 2604, 2603]
+    assert summary == {"path": path, "format": "ndjson", "written": 4, "last_draw": 2603}
+
+
+def test_export_csv_resume_after_partial_line(tmp_path, monkeypatch):
+    """Resuming drops a torn last line and continues below the lowest draw"""
+    monkeypatch.setattr(export, "iter_draws", fake_draws)
+    path = str(tmp_path / "ada.csv")
+    export.export_lottery("dlb", "Ada Kotipathi", path, draw_from=2607)
+    with open(path, "a") as fp:
+        fp.write("dlb,Ada Kotipathi,26")
+
+    summary = export.export_lottery("dlb", "Ada Kotipathi", path, resume=True)
+
+    with open(path, newline="") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [int(row["draw"]) for row in rows] == list(range(2610, 2600, -1))
+    assert rows[0]["numbers"] == "11 22 33 44"
+    assert summary["resumed_below"] == 2607
+    assert summary["written"] == 6
+
+
+def test_export_unknown_dlb_lottery(tmp_path):
+    """Unknown DLB lotteries are rejected before any request is made"""
+    result = export.export_lottery("dlb", "Invalid Lottery", str(tmp_path / "x.ndjson"))
+    assert "error" in result
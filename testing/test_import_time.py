@@ -0,0 +1,35 @@
+"""
+Startup budget tests: importing the package must stay cheap.
+
+The package budget is a generous multiple of its typical timing; the server
+budget sits just above its typical 1.2-1.6 s (mostly fastmcp), so a
+regression shows up without slow CI machines failing. The module checks are
+the exact guard. Override with LOTTERY_PACKAGE_IMPORT_BUDGET_MS /
+LOTTERY_SERVER_IMPORT_BUDGET_MS.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from import_time_report import measure_imports
+
+PACKAGE_BUDGET_MS = float(os.environ.get("LOTTERY_PACKAGE_IMPORT_BUDGET_MS", 100))
+SERVER_BUDGET_MS = float(os.environ.get("LOTTERY_SERVER_IMPORT_BUDGET_MS", 2000))
+
+
+def test_package_import_defers_http_and_parser():
+    """Importing srilanka_lottery does not load requests or bs4"""
+    data = measure_imports("srilanka_lottery")
+    assert "requests" not in data["modules"]
+    assert "bs4" not in data["modules"]
+    assert data["total_ms"] < PACKAGE_BUDGET_MS, f"import took {data['total_ms']:.1f} ms"
+
+
+def test_server_import_within_budget():
+    """The server registers its tools without loading the scraping stack"""
+    data = measure_imports("lottery_result_server")
+    assert "requests" not in data["modules"]
+    assert "bs4" not in data["modules"]
+    assert data["total_ms"] < SERVER_BUDGET_MS, f"import took {data['total_ms']:.1f} ms"
@@ -0,0 +1,46 @@
+"""
+Tests for the load-test harness (testing/load_test.py).
+
+Runs a short in-process load against the fake upstream, which also exercises
+every tool end to end without network access.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from load_test import WORKLOAD, compare_reports, run_load_test
+from srilanka_lottery import scraper
+
+
+def test_in_process_load_report():
+    """Every tool succeeds against the fake upstream and the report adds up"""
+    base_urls = (scraper.NLB_BASE_URL, scraper.DLB_BASE_URL)
+    watchlist_path = server.WATCHLIST_PATH
+
+    report = asyncio.run(run_load_test(clients=3, calls_per_client=16, latency=0, seed=7))
+
+    assert report["calls"] == 48
+    assert report["errors"] == 0, report["tools"]
+    assert sum(tool["calls"] for tool in report["tools"].values()) == 48
+    assert set(report["tools"]) <= {entry[0] for entry in WORKLOAD}
+    assert {"search_draws", "add_to_watchlist", "check_watchlist"} <= set(report["tools"])
+    assert server.WATCHLIST_PATH == watchlist_path
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+    assert report["upstream_requests"] > 0
+    assert (scraper.NLB_BASE_URL, scraper.DLB_BASE_URL) == base_urls
+
+
+def test_compare_reports_flags_regressions():
+    """Latency and throughput beyond the allowed margin are reported"""
+    baseline = {"p50_ms": 100, "p95_ms": 200, "p99_ms": 300, "throughput_rps": 50, "error_rate": 0.0}
+    slower = dict(baseline, p95_ms=300, throughput_rps=30)
+
+    assert compare_reports(baseline, baseline, 20) == []
+    problems = compare_reports(baseline, slower, 20)
+    assert any(problem.startswith("p95_ms") for problem in problems)
+    assert any(problem.startswith("throughput_rps") for problem in problems)
@@ -0,0 +1,90 @@
+"""
+Tests for negative caching of lookups that found nothing (scraper layer).
+
+Runs against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import LATEST_DRAW
+from srilanka_lottery import scraper
+
+
+@pytest.fixture(autouse=True)
+def misses(monkeypatch):
+    scraper.negative_cache.clear()
+    monkeypatch.setattr(scraper, "newest_draws", {})
+    yield
+    scraper.negative_cache.clear()
+
+
+def test_future_draw_answered_locally(upstream):
+    """A draw that is not published yet is only fetched once per TTL"""
+    first = scraper.scrape_nlb_result("govisetha", LATEST_DRAW + 1)
+    hits = upstream.hits
+    second = scraper.scrape_nlb_result("govisetha", LATEST_DRAW + 1)
+
+    assert first == {"error": "Result block not found", "retry_after": scraper.NEGATIVE_TTLS["not_published"]}
+    assert second["error"] == first["error"]
+    assert upstream.hits == hits
+    assert "error" not in scraper.scrape_nlb_result("govisetha", LATEST_DRAW)
+
+
+def test_ttl_depends_on_kind_of_miss(upstream):
+    """Unknown lotteries are remembered longer than unpublished draws, and for every draw"""
+    unknown = scraper.scrape_nlb_latest_results(None, "govisetah", 5)
+    hits = upstream.hits
+
+    assert unknown["retry_after"] == scraper.NEGATIVE_TTLS["unknown_lottery"]
+    assert scraper.scrape_nlb_result("govisetah", LATEST_DRAW)["error"] == unknown["error"]
+    assert scraper.scrape_nlb_latest_results(None, "govisetah", 3)["error"] == unknown["error"]
+    assert upstream.hits == hits
+
+    past = scraper.scrape_dlb_result("Jayoda", "2001-01-01")
+    assert past == {"error": "Result not found", "retry_after": scraper.NEGATIVE_TTLS["no_draw"]}
+
+
+def test_negative_entries_expire(upstream, monkeypatch):
+    """After the TTL the board is asked again"""
+    monkeypatch.setitem(scraper.NEGATIVE_TTLS, "not_published", 0.1)
+    scraper.scrape_dlb_result("Jayoda", LATEST_DRAW + 1)
+    hits = upstream.hits
+
+    time.sleep(0.15)
+    scraper.scrape_dlb_result("Jayoda", LATEST_DRAW + 1)
+
+    assert upstream.hits > hits
+
+
+def test_missing_draw_page_is_a_per_draw_miss(upstream):
+    """A 404 on one draw's page does not mark the whole lottery unknown"""
+    scraper.newest_draws[("nlb", "govisetah")] = LATEST_DRAW
+    missing = scraper.scrape_nlb_result("govisetah", LATEST_DRAW)
+    hits = upstream.hits
+
+    assert missing["retry_after"] == scraper.NEGATIVE_TTLS["no_draw"]
+    assert scraper.scrape_nlb_result("govisetah", LATEST_DRAW) == missing
+    assert upstream.hits == hits
+    scraper.scrape_nlb_result("govisetah", LATEST_DRAW - 1)
+    assert upstream.hits > hits
+
+
+def test_draw_numbers_classified_against_the_newest_draw(upstream):
+    """Past the newest known draw a miss is short-lived; at or below it, long-lived"""
+    assert scraper.scrape_nlb_result("govisetha", 5)["retry_after"] == scraper.NEGATIVE_TTLS["not_published"]
+    scraper.negative_cache.clear()
+
+    scraper.scrape_nlb_latest_results(None, "govisetha", 1)
+    scraper.scrape_dlb_latest_results("Jayoda", 1)
+    assert scraper.newest_draws == {("nlb", "govisetha"): LATEST_DRAW, ("dlb", "Jayoda"): LATEST_DRAW}
+    assert scraper.scrape_nlb_result("govisetha", 5)["retry_after"] == scraper.NEGATIVE_TTLS["no_draw"]
+    assert scraper.scrape_dlb_result("Jayoda", 5)["retry_after"] == scraper.NEGATIVE_TTLS["no_draw"]
+    future = scraper.scrape_nlb_result("govisetha", LATEST_DRAW + 1)
+    assert future["retry_after"] == scraper.NEGATIVE_TTLS["not_published"]
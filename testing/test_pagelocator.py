@@ -0,0 +1,134 @@
+"""
+Tests for the DLB results page locator (srilanka_lottery.pagelocator).
+
+The scraper tests run against the fake upstream from testing/load_test.py.
+"""
+
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import LATEST_DRAW, FakeUpstream, draw_date
+from srilanka_lottery import export, scraper
+from srilanka_lottery.pagelocator import PageLocator
+
+
+def listing(draws, page_size):
+    """fetch_page over a newest-first listing; counts the pages fetched"""
+    draws = sorted(draws, reverse=True)
+    fetched = []
+
+    def fetch_page(page):
+        fetched.append(page)
+        chunk = draws[page * page_size:(page + 1) * page_size]
+        start = date(2000, 1, 1)
+        return [{"draw": str(d), "date": (start + timedelta(days=d)).isoformat()} for d in chunk]
+
+    return fetch_page, fetched
+
+
+@pytest.mark.parametrize("target", [4999, 4321, 2500, 777, 1])
+def test_locate_takes_logarithmic_probes(target):
+    """Draws with gaps are still found in O(log pages) fetches"""
+    draws = [d for d in range(1, 5000) if d % 7 and d % 11 or d in (777, 4321)]
+    fetch_page, fetched = listing(draws, page_size=10)
+    page, rows = PageLocator().locate(fetch_page, draw=target)
+
+    assert str(target) in [row["draw"] for row in rows]
+    assert page == fetched[-1]
+    assert len(fetched) <= 2 * math.log2(len(draws) / 10) + 3
+
+
+def test_locate_by_date_and_missing_draws():
+    """Dates are located like draw numbers; absent draws give (None, None)"""
+    fetch_page, fetched = listing(range(1, 3001), page_size=25)
+    locator = PageLocator()
+
+    page, rows = locator.locate(fetch_page, date=date(2000, 1, 1) + timedelta(days=1234))
+    assert "1234" in [row["draw"] for row in rows]
+    assert locator.locate(fetch_page, draw=5000) == (None, None)
+    assert locator.locate(fetch_page, draw=0) == (None, None)
+    with pytest.raises(ValueError):
+        locator.locate(fetch_page)
+
+
+def test_nearest_page_for_draws_not_in_the_history():
+    """With nearest, a draw in a gap or outside the history gives the page to start from"""
+    draws = [d for d in range(1, 3001) if not 1000 <= d <= 1020]
+    fetch_page, fetched = listing(draws, page_size=10)
+    locator = PageLocator()
+
+    page, rows = locator.locate(fetch_page, draw=1010, nearest=True)
+    assert rows is None
+    assert int(fetch_page(page)[0]["draw"]) < 1010 < int(fetch_page(page - 1)[-1]["draw"])
+    assert locator.locate(fetch_page, draw=5000, nearest=True) == (0, None)
+    page, _ = locator.locate(fetch_page, draw=0, nearest=True)
+    assert fetch_page(page) == [] and fetch_page(page - 1)
+    assert locator.locate(fetch_page, draw=1010) == (None, None)
+
+
+def test_learned_ranges_make_nearby_lookups_one_fetch():
+    """Page ranges seen by one lookup start the next one on the right page"""
+    fetch_page, fetched = listing(range(1, 3001), page_size=10)
+    locator = PageLocator()
+    locator.locate(fetch_page, draw=1050)
+
+    fetched.clear()
+    page, rows = locator.locate(fetch_page, draw=1043)
+    assert "1043" in [row["draw"] for row in rows]
+    assert len(fetched) == 1
+
+
+@pytest.mark.parametrize("upstream_pages", [{"draws": 2000}])
+def test_locate_dlb_result(upstream):
+    """Draws and dates deep in the DLB history cost a few page requests"""
+    by_draw = scraper.locate_dlb_result("Ada Kotipathi", 150)
+    first_hits = upstream.hits
+    by_date = scraper.locate_dlb_result("Ada Kotipathi", draw_date(160))
+    second_hits = upstream.hits - first_hits
+    missing = scraper.locate_dlb_result("Ada Kotipathi", LATEST_DRAW + 1)
+
+    assert by_draw["draw"] == "150" and by_draw["page"] == (LATEST_DRAW - 150) // 10
+    assert by_date["draw"] == "160"
+    assert first_hits <= 2 * math.log2(200) + 3
+    assert second_hits == 1
+    assert missing == {"error": "Result not found"}
+    assert "error" in scraper.locate_dlb_result("Ada Kotipathi", "someday")
+    assert "error" in scraper.locate_dlb_result("Nope", 1)
+
+
+@pytest.mark.parametrize("upstream_pages", [{"draws": 2000}])
+def test_export_starts_at_the_draw_to_page(upstream):
+    """A DLB export with an upper bound skips the newer pages"""
+    records = list(export.iter_dlb_draws("Ada Kotipathi", draw_from=95, draw_to=105))
+
+    assert [r["draw"] for r in records] == list(range(105, 94, -1))
+    assert upstream.hits < 30  # walking from page 0 would take ~190 pages
+
+
+class GappyUpstream(FakeUpstream):
+    """Fake upstream whose history has no draws 100 to 120"""
+
+    def _page_draws(self, page):
+        draws = [d for d in range(LATEST_DRAW, LATEST_DRAW - self.draws, -1) if not 100 <= d <= 120]
+        return draws[page * self.page_size:(page + 1) * self.page_size]
+
+
+@pytest.fixture
+def upstream_pages():
+    return GappyUpstream(latency=0, draws=2000)
+
+
+@pytest.mark.parametrize("draw_to, expected", [(110, [99, 98, 97, 96, 95]), (0, [])])
+def test_export_starts_near_a_missing_draw_to(upstream, draw_to, expected):
+    """A draw_to in a gap, or older than the history, does not walk from page 0"""
+    records = list(export.iter_dlb_draws("Ada Kotipathi", draw_from=95, draw_to=draw_to))
+
+    assert [r["draw"] for r in records] == expected
+    assert upstream.hits < 30
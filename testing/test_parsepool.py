@@ -0,0 +1,72 @@
+"""
+Tests for process-pool page parsing (srilanka_lottery.parsepool).
+"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery import scraper
+from srilanka_lottery.export import iter_nlb_draws
+from srilanka_lottery.parsepool import ordered_map, parse_pool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with parse_pool(2) as executor:
+        yield executor
+
+
+@pytest.fixture
+def upstream_pages():
+    return {"draws": 45}
+
+
+def test_ordered_map_keeps_order_and_bounds_in_flight(pool):
+    """Results come back in input order with at most `window` items pulled ahead"""
+    pulled = []
+    yielded = []
+    in_flight = []
+
+    def items():
+        for i in range(20):
+            pulled.append(i)
+            in_flight.append(len(pulled) - len(yielded))
+            yield i, str(i)
+
+    for key, value in ordered_map(int, items(), pool, window=3):
+        yielded.append(key)
+        assert value == key
+
+    assert yielded == list(range(20))
+    assert max(in_flight) <= 3
+
+
+def test_ordered_map_yields_in_flight_results_before_error(pool):
+    """A failing fetch surfaces only after the pages already fetched"""
+    def items():
+        yield 0, "0"
+        yield 1, "1"
+        raise requests.ConnectionError("upstream gone")
+
+    seen = []
+    with pytest.raises(requests.ConnectionError):
+        for key, _ in ordered_map(int, items(), pool, window=5):
+            seen.append(key)
+    assert seen == [0, 1]
+
+
+def test_pooled_crawls_match_inline(upstream, pool):
+    """DLB pagination and NLB history give the same draws with and without the pool"""
+    with requests.Session() as session:
+        inline = list(scraper.iter_dlb_results(session, scraper.DLB_LOTTERY_IDS["Jayoda"]))
+        pooled = list(scraper.iter_dlb_results(session, scraper.DLB_LOTTERY_IDS["Jayoda"], parse_pool=pool))
+    assert pooled == inline
+    assert len(inline) == 45
+
+    assert list(iter_nlb_draws("govisetha", parse_pool=pool)) == list(iter_nlb_draws("govisetha"))
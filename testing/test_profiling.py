@@ -0,0 +1,99 @@
+"""
+Tests for sampled profiling of tool calls (srilanka_lottery.profiling).
+
+The server test runs against the fake upstream from testing/load_test.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+from fastmcp import Client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from srilanka_lottery.profiling import Profiler, parse_rates, profiled
+
+
+def busy(seconds):
+    """Spin and allocate so both the stack sampler and tracemalloc see it"""
+    chunks = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        chunks.append(bytes(1024))
+    return len(chunks)
+
+
+def test_parse_rates():
+    """A bare number is the default rate; tool=rate overrides one tool"""
+    assert parse_rates(None) == (0.0, {})
+    assert parse_rates("0.05, get_all_latest_results=1") == (0.05, {"get_all_latest_results": 1.0})
+    with pytest.raises(ValueError):
+        parse_rates("1.5")
+
+
+def test_disabled_profiler_records_nothing():
+    """With no rate set calls go straight through"""
+    profiler = Profiler()
+    tool = profiled(profiler, "slow_tool")(busy)
+
+    assert tool(0.01) > 0
+    assert profiler.report()["tools"] == {}
+    assert profiler.folded() == ""
+
+
+def test_sampled_call_collects_profile_stacks_and_allocations():
+    """Every call at rate 1 is profiled; stacks are rooted at the tool name"""
+    profiler = Profiler(rates={"slow_tool": 1.0}, interval=0.001)
+    tool = profiled(profiler, "slow_tool")(busy)
+
+    tool(0.1)
+    report = profiler.report()["tools"]["slow_tool"]
+
+    assert report["calls"] == report["sampled"] == 1
+    assert report["wall_ms"]["max"] >= 100
+    assert report["allocations"]["calls"] == 1
+    assert report["allocations"]["peak_bytes_max"] > 100 * 1024
+    assert any(row["function"].endswith("(busy)") for row in report["functions"])
+    lines = profiler.folded().splitlines()
+    assert lines and all(line.startswith("slow_tool;test_profiling:busy") for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == report["stack_samples"] > 10
+
+
+def test_rate_applies_per_tool():
+    """Other tools keep the default rate of 0"""
+    profiler = Profiler(rates={"slow_tool": 1.0})
+    profiled(profiler, "slow_tool")(busy)(0)
+    profiled(profiler, "other_tool")(busy)(0)
+
+    tools = profiler.report()["tools"]
+    assert tools["slow_tool"]["sampled"] == 1
+    assert tools["other_tool"] == {**tools["other_tool"], "calls": 1, "sampled": 0}
+
+
+def test_server_exposes_profiles(upstream, monkeypatch):
+    """Profiled tool calls show up in the lottery://metrics/profile resources"""
+    monkeypatch.setattr(server.profiler, "rates", {})
+    server.configure_profiling(rate=1, tool_name="get_nlb_latest_results", reset=True)
+
+    async def scenario():
+        async with Client(server.mcp) as client:
+            await client.call_tool("get_nlb_latest_results", {"lottery_name": "govisetha", "limit": 3})
+            report = await client.read_resource("lottery://metrics/profile")
+            folded = await client.read_resource("lottery://metrics/profile/folded")
+            return json.loads(report[0].text), folded[0].text
+
+    try:
+        report, folded = asyncio.run(scenario())
+    finally:
+        server.configure_profiling(rate=0, tool_name="get_nlb_latest_results", reset=True)
+
+    assert report["rates"] == {"get_nlb_latest_results": 1.0}
+    assert report["tools"]["get_nlb_latest_results"]["sampled"] == 1
+    assert all(line.startswith("get_nlb_latest_results;") for line in folded.splitlines())
+    assert server.configure_profiling(rate=2) == {"error": "Sampling rate must be between 0 and 1"}
@@ -0,0 +1,156 @@
+"""
+Tests for the raw response store (srilanka_lottery.rawstore).
+
+Responses are recorded from the fake upstream in testing/load_test.py, then
+replayed and re-parsed with the upstream shut down.
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import LATEST_DRAW, draw_numbers
+from srilanka_lottery import scraper, transport
+from srilanka_lottery.rawstore import RawStore, main, reparse
+
+
+@pytest.fixture
+def store(upstream, tmp_path):
+    raw = RawStore(str(tmp_path / "raw"))
+    transport.set_raw_store(raw)
+    yield raw, upstream
+    transport.set_raw_store(None)
+
+
+def record_some_pages():
+    return [
+        scraper.scrape_nlb_result("govisetha", LATEST_DRAW - 3),
+        scraper.scrape_dlb_result("Jayoda", LATEST_DRAW - 5),
+        scraper.scrape_dlb_latest_results("Shanida", 12),
+    ]
+
+
+def test_replay_answers_without_network(store):
+    """Scrapes in replay mode return the recorded results after upstream is gone"""
+    raw, fake = store
+    recorded = record_some_pages()
+    fake.stop()
+
+    transport.set_raw_store(raw, replay=True)
+    assert record_some_pages() == recorded
+    missing = scraper.scrape_nlb_result("govisetha", 1)
+    assert missing["error"].startswith("Request failed")
+
+
+def test_identical_bodies_stored_once(store):
+    """Requests are indexed separately but share an object when bodies match"""
+    raw, _ = store
+    by_draw = scraper.scrape_nlb_result("govisetha", LATEST_DRAW)
+    by_date = scraper.scrape_nlb_result("govisetha", "2025-11-23")  # same page as draw LATEST_DRAW
+
+    assert by_draw == by_date
+    stats = raw.stats()
+    assert stats["responses"] == 3  # names page plus the two result URLs
+    assert stats["objects"] == 2
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+
+def test_reparse_rebuilds_draws_offline(store, tmp_path):
+    """Stored pages are re-parsed into export records without any requests"""
+    raw, fake = store
+    record_some_pages()
+    fake.stop()
+    hits = fake.hits
+
+    records = reparse(raw)
+
+    assert fake.hits == hits
+    shanida = [r for r in records if r["lottery"] == "Shanida"]
+    assert [r["draw"] for r in shanida] == list(range(LATEST_DRAW, LATEST_DRAW - 20, -1))
+    jayoda = next(r for r in records if r["lottery"] == "Jayoda")
+    assert (jayoda["draw"], jayoda["letter"], jayoda["numbers"]) == (LATEST_DRAW - 5, *draw_numbers(LATEST_DRAW - 5))
+    assert any(r["board"] == "nlb" and r["draw"] == LATEST_DRAW - 3 for r in records)
+
+    output = tmp_path / "history.ndjson"
+    assert main(["reparse", raw.root, str(output)]) == 0
+    assert len(output.read_text().splitlines()) == len(records)
+    assert json.loads(output.read_text().splitlines()[0])["board"] == "dlb"
+
+
+def test_reparse_reads_every_stored_version(store):
+    """A page that changed between fetches keeps both bodies, and reparse reads both"""
+    raw, fake = store
+    url = f"{scraper.DLB_BASE_URL}/result/pagination_re"
+    form = {"pageId": "0", "lotteryID": str(scraper.DLB_LOTTERY_IDS["Jayoda"])}
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    raw.put("POST", url, form, 200, headers, fake.dlb_page(1).encode())
+    raw.put("POST", url, form, 200, headers, fake.dlb_page(0).encode())
+    raw.put("POST", url, form, 200, headers, fake.dlb_page(0).encode())
+
+    stats = raw.stats()
+    assert (stats["responses"], stats["versions"], stats["objects"]) == (1, 2, 2)
+    assert raw.read(raw.lookup("POST", url, form)["digest"]) == fake.dlb_page(0).encode()
+    draws = {r["draw"] for r in reparse(raw) if r["lottery"] == "Jayoda"}
+    assert draws == set(range(LATEST_DRAW, LATEST_DRAW - 20, -1))
+
+
+@pytest.mark.parametrize("upstream_pages", [{"draws": 2000, "page_size": 2000}])
+def test_streamed_pages_recorded_only_when_read_in_full(store):
+    """An early stop still reads a fraction of the body, and stores nothing"""
+    raw, fake = store
+    scraper.negative_cache.clear()
+    transport.reset_metrics()
+    page_url = f"{scraper.NLB_BASE_URL}/results/govisetha"
+    latest = scraper.scrape_nlb_latest_results(None, "govisetha", 3)
+    streamed = transport.get_metrics()["bytes_streamed"]
+    stored_early = raw.lookup("GET", page_url)
+    rows = scraper.fetch_nlb_latest_results(scraper.requests.Session(), "govisetha", None)
+
+    assert len(latest["NLB_Results"]) == 3
+    assert streamed < len(fake.nlb_latest_page().encode()) / 10
+    assert stored_early is None
+    assert len(rows) == 2000
+    assert raw.read(raw.lookup("GET", page_url)["digest"]) == fake.nlb_latest_page().encode()
+
+
+def test_conditional_get_served_from_store(tmp_path):
+    """A stored ETag is sent back and a 304 is answered with the stored body"""
+    validators = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            validators.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", "5")
+            self.end_headers()
+            self.wfile.write(b"hello")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+    transport.set_raw_store(RawStore(str(tmp_path / "raw")))
+    try:
+        first = transport.request(None, "GET", url, timeout=5)
+        second = transport.request(None, "GET", url, timeout=5)
+    finally:
+        transport.set_raw_store(None)
+        server.shutdown()
+
+    assert validators == [None, '"v1"']
+    assert (first.status_code, first.text) == (second.status_code, second.text) == (200, "hello")
@@ -0,0 +1,113 @@
+"""
+Tests for the response cache (srilanka_lottery.responsecache) and the server
+middleware answering tool calls from it.
+
+The server test runs against the fake upstream from testing/load_test.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+from fastmcp import Client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from load_test import LATEST_DRAW, draw_date
+from srilanka_lottery.cache import SharedCache
+from srilanka_lottery.responsecache import ALL, ResponseCache
+
+
+def test_bump_drops_only_its_scope_and_all():
+    """A new draw of one lottery leaves other lotteries' responses cached"""
+    cache = ResponseCache()
+    for key, scope in (("gov", "nlb:govisetha"), ("mega", "nlb:mega-power"), ("all", ALL), ("names", None)):
+        assert cache.put(key, key.upper(), scope, cache.token(scope), ttl=60, cost=0.5, size=10)
+
+    assert cache.bump("nlb:govisetha") == 2
+    assert [cache.get(key) for key in ("gov", "mega", "all", "names")] == [None, "MEGA", None, "NAMES"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidated"], stats["entries"]) == (2, 2, 2, 2)
+    assert stats["saved_call_seconds"] == 1.0 and stats["bytes"] == 20
+
+
+def test_stale_builds_expiry_and_size_bound():
+    """Responses built across a bump are not stored; old and excess entries go"""
+    cache = ResponseCache(max_entries=2)
+    token = cache.token("dlb:Jayoda")
+    cache.bump("dlb:Jayoda")
+    assert not cache.put("jayoda", 1, "dlb:Jayoda", token, ttl=60)
+    assert cache.stats()["stale_builds"] == 1
+
+    cache.put("short", 1, None, 0, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None and cache.stats()["expired"] == 1
+
+    for key in "abc":
+        cache.put(key, key, None, 0, ttl=60)
+    assert cache.get("a") is None and cache.get("c") == "c"
+    assert not ResponseCache(max_entries=0).put("a", 1, None, 0, ttl=60)
+
+
+def test_server_serves_repeats_from_cache_until_a_new_draw(upstream, monkeypatch):
+    """Repeated calls skip upstream; a newer draw invalidates just that lottery"""
+    monkeypatch.setattr(server, "response_cache", ResponseCache())
+    monkeypatch.setattr(server, "_newest", {})
+
+    async def call(client, tool, arguments):
+        result = await client.call_tool(tool, arguments)
+        return result.content[0].text
+
+    async def scenario():
+        async with Client(server.mcp) as client:
+            first = await call(client, "get_nlb_latest_results", {"lottery_name": "govisetha", "limit": 3})
+            dlb = await call(client, "get_dlb_latest_results", {"lottery_name": "Jayoda", "limit": 3})
+            hits = upstream.hits
+            again = await call(client, "get_nlb_latest_results",
+                               {"lottery_name": "Govisetha", "limit": 3, "timeout_seconds": 5})
+            await call(client, "get_dlb_latest_results", {"lottery_name": "Jayoda", "limit": 3})
+            cached_hits = upstream.hits - hits
+
+            server.note_newest("nlb", "govisetha", [{"draw": str(LATEST_DRAW + 1), "date": draw_date(LATEST_DRAW)}])
+            hits = upstream.hits
+            await call(client, "get_nlb_latest_results", {"lottery_name": "govisetha", "limit": 3})
+            await call(client, "get_dlb_latest_results", {"lottery_name": "Jayoda", "limit": 3})
+            refetch_hits = upstream.hits - hits
+
+            await call(client, "get_dlb_latest_results", {"lottery_name": "Nope", "limit": 3})
+            stats = await client.read_resource("lottery://metrics/responses")
+            return first, dlb, again, cached_hits, refetch_hits, json.loads(stats[0].text)
+
+    first, dlb, again, cached_hits, refetch_hits, stats = asyncio.run(scenario())
+
+    assert json.loads(first)["NLB_Results"][0]["draw"] == str(LATEST_DRAW)
+    assert again == first
+    assert cached_hits == 0
+    assert refetch_hits > 0 and stats["invalidated"] == 1
+    assert (stats["hits"], stats["stores"], stats["entries"]) == (3, 3, 2)  # the error was not stored
+    assert stats["saved_call_seconds"] > 0
+
+
+def test_shared_entries_older_than_the_newest_draw_are_refetched_once(upstream, monkeypatch, tmp_path):
+    """A stored result older than a draw already seen is refetched; the refreshed one is reused"""
+    monkeypatch.setattr(server, "response_cache", ResponseCache(max_entries=0))
+    monkeypatch.setattr(server, "shared_cache", SharedCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(server, "_newest", {})
+    stale = {"NLB_Results": [{"draw": str(LATEST_DRAW - 1), "date": "", "letter": "", "numbers": []}]}
+    server.shared_cache.set("nlb:latest:govisetha:3", stale, ttl=60)
+    server.note_newest("nlb", "govisetha", [{"draw": str(LATEST_DRAW), "date": ""}])
+
+    hits = upstream.hits
+    first = server.get_nlb_latest_results.fn("govisetha", 3)
+    refetch_hits = upstream.hits - hits
+    hits = upstream.hits
+    second = server.get_nlb_latest_results.fn("govisetha", 3)
+    reuse_hits = upstream.hits - hits
+
+    assert first["NLB_Results"][0]["draw"] == str(LATEST_DRAW) and second == first
+    assert refetch_hits > 0 and reuse_hits == 0
+    assert server.all_latest_is_fresh({"results": [{"board": "nlb", "lottery": "Govisetha", "draw": "1"}]}) is False
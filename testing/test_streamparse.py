@@ -0,0 +1,107 @@
+"""
+Tests for incremental parsing of result tables (srilanka_lottery.streamparse)
+and the streamed latest-result fetches built on it.
+
+The fetch tests run against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import LATEST_DRAW, FakeUpstream
+from srilanka_lottery import scraper, transport
+from srilanka_lottery.streamparse import iter_dlb_rows, iter_nlb_rows, take_rows
+
+NLB_PAGE = """
+<table>
+  <thead><tr><td><b>Draw</b></td><td>Numbers</td></tr></thead>
+  <tbody>
+    <tr><td><b> 4263 </b><br>Saturday &amp; November 22, 2025</td>
+        <td><ol class="B"><li class="Letter">T</li><li>13</li><li> 25 </li><li class="More">More</li></ol></td></tr>
+    <tr><td><b>4262</b> 2025-11-21</td><td><ul><li>99</li></ul><ol class="B"><li>07</li></ol></td></tr>
+    <tr><td>no draw number</td><td></td></tr>
+  </tbody>
+</table>
+"""
+
+DLB_PAGE = """
+<table><tr>
+  <td>2608 | 2025-May-01 Thursday</td><td>x</td>
+  <td><ul><li class="res_eng_letter">Y</li><li>11</li><li><span>2</span>2</li><li></li></ul></td>
+</tr><tr><td>header</td><td>row</td><td></td></tr>
+<tr><td>2607 | 2025-Apr-30</td><td>only two cells</td></tr></table>
+"""
+
+
+def chunked(text, size):
+    return iter([text[i:i + size] for i in range(0, len(text), size)])
+
+
+@pytest.mark.parametrize("size", [1, 7, 10 ** 6])
+def test_rows_match_the_full_page_parsers(size):
+    """Whatever the chunking, rows come out as the BeautifulSoup parsers build them"""
+    fake = FakeUpstream(latency=0, draws=60, page_size=25)
+    for html in (NLB_PAGE, fake.nlb_latest_page()):
+        assert list(iter_nlb_rows(chunked(html, size))) == scraper.parse_nlb_results_page(html)
+    for html in (DLB_PAGE, fake.dlb_page(1)):
+        assert list(iter_dlb_rows(chunked(html, size))) == scraper.parse_dlb_results_page(html)
+
+
+def test_take_rows_stops_and_closes_the_source():
+    """The chunk source is closed as soon as limit or until is reached"""
+    closed = []
+
+    def source():
+        try:
+            yield from chunked(FakeUpstream(draws=50, page_size=50).nlb_latest_page(), 100)
+        finally:
+            closed.append(True)
+
+    rows = take_rows(iter_nlb_rows(source()), limit=2)
+    assert [row["draw"] for row in rows] == [str(LATEST_DRAW), str(LATEST_DRAW - 1)]
+    assert closed == [True]
+
+    rows = take_rows(iter_nlb_rows(source()), until=lambda row: row["draw"] == str(LATEST_DRAW - 3))
+    assert len(rows) == 4 and closed == [True, True]
+    assert take_rows(iter_nlb_rows(source()), limit=0) == []
+
+
+@pytest.fixture
+def upstream_pages():
+    return {"draws": 2000, "page_size": 2000}
+
+
+@pytest.fixture
+def big_pages(upstream):
+    scraper.negative_cache.clear()
+    transport.reset_metrics()
+    return upstream
+
+
+def test_latest_results_stop_reading_after_limit(big_pages):
+    """A small limit on a long page reads a fraction of the body"""
+    page_bytes = len(big_pages.nlb_latest_page().encode()) + len(big_pages.dlb_page(0).encode())
+
+    nlb = scraper.scrape_nlb_latest_results(None, "govisetha", 3)
+    dlb = scraper.scrape_dlb_latest_results("Jayoda", 3)
+
+    assert [row["draw"] for row in nlb["NLB_Results"]] == [str(d) for d in range(LATEST_DRAW, LATEST_DRAW - 3, -1)]
+    assert dlb["DLB_Results"] == scraper.parse_dlb_results_page(big_pages.dlb_page(0))[:3]
+    metrics = transport.get_metrics()
+    assert metrics["streams_stopped_early"] == 2
+    assert metrics["bytes_streamed"] < page_bytes / 10
+
+
+def test_full_reads_and_errors_still_work(big_pages):
+    """Reading a whole page is not counted as stopped early; 404s still raise"""
+    rows = scraper.fetch_nlb_latest_results(scraper.requests.Session(), "govisetha", None)
+    assert len(rows) == 2000
+    assert transport.get_metrics()["streams_stopped_early"] == 0
+
+    result = scraper.scrape_nlb_latest_results(None, "no-such-lottery", 3)
+    assert result["error"] == "Lottery no-such-lottery not found on NLB"
@@ -0,0 +1,117 @@
+"""
+Tests for push notifications on lottery://<board>/<name>/latest resources.
+
+Upstream is replaced by a canned sequence of results; no network is used.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastmcp import Client
+from fastmcp.client.messages import MessageHandler
+from pydantic import AnyUrl
+
+import lottery_result_server as server
+
+URI = "lottery://dlb/Ada%20Kotipathi/latest"
+
+
+class UpdateRecorder(MessageHandler):
+    def __init__(self):
+        self.updated = asyncio.Event()
+        self.uris = []
+
+    async def on_resource_updated(self, message):
+        self.uris.append(str(message.params.uri))
+        self.updated.set()
+
+
+def test_subscribers_notified_once_per_new_draw(monkeypatch):
+    """One watcher polls upstream and a new draw number triggers one push"""
+    draws = iter(["2608", "2608", "2609"])
+    calls = []
+
+    def fake_fetch(board, lottery_name):
+        calls.append((board, lottery_name))
+        draw = next(draws, "2609")
+        return {"DLB_Results": [{"draw": draw, "date": "2025-05-02", "letter": "Y", "numbers": ["1"]}]}
+
+    monkeypatch.setattr(server, "fetch_latest_draw", fake_fetch)
+    monkeypatch.setattr(server, "WATCH_INTERVAL", 0.05)
+
+    async def scenario():
+        recorder = UpdateRecorder()
+        async with Client(server.mcp, message_handler=recorder) as client:
+            capabilities = client.initialize_result.capabilities
+            assert capabilities.resources.subscribe is True
+
+            await client.session.subscribe_resource(AnyUrl(URI))
+            await asyncio.wait_for(recorder.updated.wait(), timeout=5)
+
+            contents = await client.read_resource(URI)
+            assert json.loads(contents[0].text)["DLB_Results"][0]["draw"] == "2609"
+
+            await client.session.unsubscribe_resource(AnyUrl(URI))
+        return recorder
+
+    recorder = asyncio.run(scenario())
+    assert recorder.uris == [URI]
+    assert set(calls) == {("dlb", "Ada Kotipathi")}
+    assert server.watchers == {}
+
+
+def test_failed_session_is_dropped_and_watcher_stopped(monkeypatch):
+    """A session that can no longer be notified is unsubscribed; the last one stops the watcher"""
+    key = ("dlb", "Ada Kotipathi")
+
+    class GoneSession:
+        async def send_resource_updated(self, uri):
+            raise ConnectionError("client went away")
+
+    class LiveSession:
+        def __init__(self):
+            self.sent = []
+
+        async def send_resource_updated(self, uri):
+            self.sent.append(str(uri))
+
+    class Watcher:
+        stopped = False
+
+        def stop(self):
+            self.stopped = True
+
+    gone, live, watcher = GoneSession(), LiveSession(), Watcher()
+    monkeypatch.setattr(server, "subscribers", {key: {URI: {gone, live}}})
+    monkeypatch.setattr(server, "watchers", {key: watcher})
+
+    asyncio.run(server.notify_subscribers(key))
+    assert live.sent == [URI]
+    assert server.subscribers == {key: {URI: {live}}} and not watcher.stopped
+
+    server.subscribers[key][URI] = {gone}
+    asyncio.run(server.notify_subscribers(key))
+    assert server.subscribers == {} and server.watchers == {}
+    assert watcher.stopped
+
+
+def test_closed_session_drops_its_subscriptions(monkeypatch):
+    """Disconnecting stops the watcher without waiting for a failed notification"""
+    monkeypatch.setattr(server, "fetch_latest_draw", lambda board, lottery_name: {"DLB_Results": []})
+    monkeypatch.setattr(server, "WATCH_INTERVAL", 60)
+
+    async def scenario():
+        async with Client(server.mcp) as client:
+            await client.session.subscribe_resource(AnyUrl(URI))
+            subscribed = dict(server.subscribers)
+            watcher = server.watchers[("dlb", "Ada Kotipathi")]
+        return subscribed, watcher
+
+    subscribed, watcher = asyncio.run(scenario())
+    assert list(subscribed) == [("dlb", "Ada Kotipathi")]
+    assert server.subscribers == {} and server.watchers == {}
+    assert not watcher.running
@@ -0,0 +1,139 @@
+"""
+Tests for the upstream request policy (srilanka_lottery.transport).
+
+A local HTTP server stands in for nlb.lk/dlb.lk.
+"""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srilanka_lottery import transport
+
+
+@pytest.fixture
+def scripted():
+    """Serve scripted (status, delay) replies in order, then 200s"""
+    script = []
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            status, delay = script.pop(0) if script else (200, 0)
+            time.sleep(delay)
+            body = f"reply {len(hits)}".encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport.reset_metrics()
+    yield f"http://127.0.0.1:{server.server_port}", script, hits
+    server.shutdown()
+
+
+def test_retries_retryable_status(scripted):
+    """503s are retried with backoff until a 200 arrives"""
+    url, script, hits = scripted
+    script.extend([(503, 0), (503, 0)])
+    policy = transport.RequestPolicy(retries=2, backoff=0.01)
+
+    response = transport.request(None, "GET", url, policy=policy, timeout=5)
+
+    assert response.status_code == 200
+    assert len(hits) == 3
+    assert transport.get_metrics()["retries"] == 2
+
+
+def test_gives_up_after_retries(scripted):
+    """The last error response is returned once retries are used up"""
+    url, script, hits = scripted
+    script.extend([(500, 0)] * 3)
+    policy = transport.RequestPolicy(retries=1, backoff=0.01)
+
+    response = transport.request(None, "GET", url, policy=policy, timeout=5)
+
+    assert response.status_code == 500
+    assert len(hits) == 2
+    assert transport.get_metrics()["failures"] == 1
+
+
+def test_connection_errors_raise_after_retries():
+    """Unreachable hosts raise RequestException once retries are exhausted"""
+    policy = transport.RequestPolicy(retries=1, backoff=0.01)
+    with pytest.raises(requests.RequestException):
+        transport.request(None, "GET", "http://127.0.0.1:9/", policy=policy, timeout=1)
+
+
+def test_hedge_wins_against_stalled_request(scripted):
+    """A stalled request is hedged after the latency percentile and the hedge wins"""
+    url, script, hits = scripted
+    policy = transport.RequestPolicy(hedge=True, hedge_min_samples=5, hedge_min_delay=0.05)
+    session = requests.Session()
+    for _ in range(5):
+        transport.request(session, "GET", url, policy=policy, timeout=5)
+
+    script.append((200, 2))
+    started = time.monotonic()
+    response = transport.request(session, "GET", url, policy=policy, timeout=5)
+
+    assert time.monotonic() - started < 1.5
+    assert response.text == "reply 7"
+    metrics = transport.get_metrics()
+    assert metrics["hedges_sent"] == 1
+    assert metrics["hedges_won"] == 1
+    assert metrics["hedge_win_rate"] == 1.0
+
+
+def test_deadline_caps_slow_request(scripted):
+    """A slow reply is abandoned when the surrounding deadline runs out"""
+    url, script, hits = scripted
+    script.append((200, 2))
+    policy = transport.RequestPolicy(retries=3, backoff=0.01)
+
+    started = time.monotonic()
+    with transport.deadline_scope(0.3):
+        with pytest.raises(requests.Timeout):
+            transport.request(None, "GET", url, policy=policy, timeout=10)
+
+    assert time.monotonic() - started < 1.5
+
+
+def test_nested_deadline_never_extends_outer():
+    """An inner scope with a longer budget keeps the outer deadline"""
+    with transport.deadline_scope(0.5) as outer:
+        with transport.deadline_scope(60) as inner:
+            assert inner is outer
+        with transport.deadline_scope(0.1) as inner:
+            assert inner.expires_at < outer.expires_at
+    assert transport.current_deadline() is None
+
+
+def test_rate_limit_spaces_requests(scripted):
+    """Requests to a rate-limited host are spread out to the configured rate"""
+    url, _, hits = scripted
+    host = url.split("//", 1)[1]
+    transport.set_rate_limit(host, 20)
+    try:
+        started = time.monotonic()
+        for _ in range(5):
+            transport.request(None, "GET", url, timeout=5)
+        elapsed = time.monotonic() - started
+    finally:
+        transport.set_rate_limit(host, None)
+
+    assert len(hits) == 5
+    assert elapsed >= 4 / 20 - 0.01
@@ -0,0 +1,145 @@
+"""
+Tests for incremental watchlist matching (srilanka_lottery.watchlist) and the
+watchlist tools.
+
+The tool test runs against the fake upstream from testing/load_test.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lottery_result_server as server
+from load_test import LATEST_DRAW, draw_numbers
+from srilanka_lottery import scraper
+from srilanka_lottery.drawindex import DrawIndex
+from srilanka_lottery.watchlist import Watchlist
+
+
+def row(draw, numbers, letter="A"):
+    return {"draw": str(draw), "date": f"day {draw}", "letter": letter, "numbers": numbers}
+
+
+@pytest.fixture
+def watchlist(tmp_path):
+    return Watchlist(str(tmp_path / "watchlist.sqlite3"))
+
+
+def test_new_draws_produce_hits_once(watchlist):
+    """Only draws past the watermark are evaluated, each exactly once"""
+    pair = watchlist.add("family", "nlb", "govisetha", [13, 25, 29, 51], min_matches=2, after_draw=100)
+    single = watchlist.add("family", "nlb", "govisetha", [7], letter="k", after_draw=100)
+    watchlist.add("other", "nlb", "govisetha", [13, 25], after_draw=100)
+
+    events = watchlist.ingest("nlb", "govisetha", [
+        row(102, ["13", "25", "60", "70"], "K"),
+        row(101, ["13", "40", "60", "70"]),
+        row(100, ["13", "25", "29", "51"]),  # not after after_draw
+    ])
+    assert [(e["watchlist"], e["ticket"], e["draw"]) for e in events] == [
+        ("other", 3, 101), ("family", 1, 102), ("family", 2, 102), ("other", 3, 102)]
+    assert watchlist.watermark("nlb", "govisetha") == 102
+    assert watchlist.ingest("nlb", "govisetha", [row(102, ["13", "25"], "K")]) == []
+
+    hits = watchlist.hits("family")
+    assert [(h["ticket"], h["matched"], h["letter_match"]) for h in hits] == [
+        (pair["ticket"], [13, 25], False), (single["ticket"], [], True)]
+    assert hits[0]["numbers"] == ["13", "25", "60", "70"]
+    assert watchlist.hits("family", since_draw=102) == []
+    assert watchlist.hits("other", since_draw=101)[0]["draw"] == 102
+
+
+def test_tickets_only_see_draws_after_they_were_added(watchlist):
+    """after_draw defaults to the lottery's watermark"""
+    watchlist.ingest("dlb", "Jayoda", [row(50, ["01", "02"])])
+    ticket = watchlist.add("family", "dlb", "Jayoda", [1, 2])
+    assert ticket["after_draw"] == 50
+    assert watchlist.ingest("dlb", "Jayoda", [row(50, ["01"]), row(51, ["02"])])[0]["draw"] == 51
+
+
+def test_watermark_stops_at_a_gap(watchlist):
+    """Draws after a missing one wait until it is read, unless the read was complete"""
+    watchlist.ingest("nlb", "govisetha", [row(100, ["01"])])
+    watchlist.add("family", "nlb", "govisetha", [7], after_draw=100)
+
+    assert watchlist.ingest("nlb", "govisetha", [row(103, ["07"])]) == []
+    assert watchlist.watermark("nlb", "govisetha") == 100
+    events = watchlist.ingest("nlb", "govisetha", [row(101, ["07"]), row(103, ["07"])])
+    assert [e["draw"] for e in events] == [101] and watchlist.watermark("nlb", "govisetha") == 101
+
+    events = watchlist.ingest("nlb", "govisetha", [row(103, ["07"]), row(104, ["07"])], complete=True)
+    assert [e["draw"] for e in events] == [103, 104] and watchlist.watermark("nlb", "govisetha") == 104
+
+
+def test_validation_and_remove(watchlist):
+    """Bad tickets are rejected; removal drops the ticket and its hits"""
+    with pytest.raises(ValueError):
+        watchlist.add("family", "nlb", "govisetha", [])
+    with pytest.raises(ValueError):
+        watchlist.add("family", "nlb", "govisetha", [1, 2], min_matches=3)
+    ticket = watchlist.add("family", "nlb", "govisetha", [1], after_draw=0)["ticket"]
+    watchlist.ingest("nlb", "govisetha", [row(1, ["01"])])
+
+    assert not watchlist.remove("other", ticket)
+    assert watchlist.remove("family", ticket)
+    assert watchlist.tickets("family") == [] and watchlist.hits("family") == []
+    assert watchlist.ingest("nlb", "govisetha", [row(2, ["01"])]) == []
+
+
+def test_watchlist_tools(upstream, monkeypatch, tmp_path):
+    """Tickets start at the board's latest draw; a new draw shows up as a hit"""
+    monkeypatch.setattr(server, "WATCHLIST_PATH", str(tmp_path / "watchlist.sqlite3"))
+    monkeypatch.setattr(server, "_watchlist", None)
+    monkeypatch.setattr(server, "_topped_up", {})
+    monkeypatch.setattr(server, "draw_index", DrawIndex())
+    ticket = server.add_to_watchlist.fn("family", "nlb", "Govisetha", [13, 25], letter="T")
+    server.ingest_draws("nlb", "govisetha", [row(LATEST_DRAW + 1, ["13", "33", "51", "70"], "B")])
+    result = server.check_watchlist.fn("family", since_draw=LATEST_DRAW)
+
+    assert ticket["after_draw"] == LATEST_DRAW and ticket["letter"] == "T"
+    assert [(h["draw"], h["matched"]) for h in result["hits"]] == [(LATEST_DRAW + 1, [13])]
+    assert result["checked_through"] == {"govisetha": LATEST_DRAW + 1}
+    assert server.remove_from_watchlist.fn("family", ticket["ticket"]) == {"removed": True}
+    assert "error" in server.remove_from_watchlist.fn("family", ticket["ticket"])
+    assert "error" in server.add_to_watchlist.fn("family", "xyz", "govisetha", [1])
+
+
+def test_skipped_draws_are_fetched_before_the_watermark_moves(upstream, monkeypatch, tmp_path):
+    """Ingesting only the newest draw fills the gap from the board first"""
+    monkeypatch.setattr(server, "_watchlist", Watchlist(str(tmp_path / "watchlist.sqlite3")))
+    monkeypatch.setattr(server, "_newest", {})
+    monkeypatch.setattr(server, "draw_index", DrawIndex())
+    scraper.negative_cache.clear()
+    letter, numbers = draw_numbers(LATEST_DRAW - 3)
+    server._watchlist.ingest("nlb", "govisetha", [row(LATEST_DRAW - 5, [])])
+    ticket = server._watchlist.add("family", "nlb", "govisetha", [int(n) for n in numbers],
+                                   min_matches=len(set(numbers)))
+    newest = scraper.scrape_nlb_latest_results(None, "govisetha", 1)["NLB_Results"]
+    server.ingest_draws("nlb", "govisetha", newest)
+
+    hits = server._watchlist.hits("family")
+    assert [(h["ticket"], h["draw"], h["letter"]) for h in hits] == [(ticket["ticket"], LATEST_DRAW - 3, letter)]
+    assert server._watchlist.watermark("nlb", "govisetha") == LATEST_DRAW
+
+
+@pytest.mark.parametrize("board,name", [("nlb", "govisetha"), ("dlb", "Jayoda")])
+def test_gaps_longer_than_a_delta_read_are_paged_through(upstream, monkeypatch, tmp_path, board, name):
+    """A gap the delta read cannot cover in one go is read oldest first and still matched"""
+    monkeypatch.setattr(server, "_watchlist", Watchlist(str(tmp_path / "watchlist.sqlite3")))
+    monkeypatch.setattr(server, "_newest", {})
+    monkeypatch.setattr(server, "draw_index", DrawIndex())
+    monkeypatch.setattr(server, "latest_delta", lambda *args: {"error": "Request failed", "truncated": True})
+    scraper.negative_cache.clear()
+    letter, numbers = draw_numbers(LATEST_DRAW - 22)
+    server._watchlist.ingest(board, name, [row(LATEST_DRAW - 25, [])])
+    ticket = server._watchlist.add("family", board, name, [int(n) for n in numbers],
+                                   min_matches=len(set(numbers)))
+    server.ingest_draws(board, name, [row(LATEST_DRAW, [])])
+
+    hits = server._watchlist.hits("family")
+    assert [(h["ticket"], h["draw"]) for h in hits] == [(ticket["ticket"], LATEST_DRAW - 22)]
+    assert server._watchlist.watermark(board, name) == LATEST_DRAW